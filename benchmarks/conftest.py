@@ -0,0 +1,20 @@
+"""
+Shared fixtures for the benchmark suite.
+
+The suite is kept out of the default test run; use ``make benchmark`` or
+``pytest benchmarks``.
+"""
+import pytest
+from xblock.runtime import DictKeyValueStore, KvsFieldData
+from xblock.test.tools import TestRuntime
+
+
+@pytest.fixture
+def kvs_runtime():
+    """
+    A TestRuntime backed by a key-value store that, like the LMS, does not copy on read.
+    """
+    runtime = TestRuntime(services={"field-data": KvsFieldData(DictKeyValueStore())})
+    runtime.publish = lambda *args, **kwargs: None
+    runtime.handler_url = lambda block, handler_name, *args, **kwargs: f"/handler/{handler_name}"
+    return runtime
@@ -0,0 +1,102 @@
+"""
+Micro-benchmarks of validation, graph passes and handlers across scenario shapes and sizes.
+
+Each operation runs on generated chain, fan-out, diamond and deep-tree
+scenarios of 10, 30, 300 and 3,000 nodes through the pytest-benchmark
+fixture; results are grouped by operation. ``make benchmark`` saves them to
+``var/benchmarks.json`` so two releases can be compared with
+``pytest-benchmark compare``.
+"""
+import copy
+import json
+
+import pytest
+from django.test.client import RequestFactory
+
+from branching_xblock.generator import generate_nodes
+from test_utils.blocks import load_block, store_scenario
+
+NODE_COUNTS = [10, 30, 300, 3000]
+SHAPES = ["chain", "fan_out", "diamond", "deep_tree"]
+
+# Total node visits per benchmark; keeps small scenarios statistically stable and large ones short.
+NODE_VISITS_PER_BENCHMARK = 10000
+
+
+def _request(payload):
+    return RequestFactory().post("/", data=json.dumps(payload), content_type="application/json")
+
+
+def _setup(runtime, payload, prepare):
+    """
+    Return a pytest-benchmark setup that loads a fresh block, as each LMS request does.
+    """
+    def setup():
+        block = load_block(runtime)
+        return (block, *prepare(block, payload)), {}
+    return setup
+
+
+def _stored(block):
+    scenario_data = block._scenario_data_read_only()
+    return scenario_data["nodes"], scenario_data["start_node_id"]
+
+
+# Operation name -> (prepare(block, payload) -> extra call arguments, timed call(block, *arguments)).
+OPERATIONS = {
+    "validate_scenario": (
+        lambda block, payload: ({"nodes": copy.deepcopy(payload)},),
+        lambda block, studio_payload: block.validate_scenario(studio_payload),
+    ),
+    "compute_max_attainable_score": (
+        lambda block, payload: _stored(block),
+        lambda block, nodes, start_node_id: block._compute_max_attainable_score(nodes, start_node_id),
+    ),
+    "find_cycle_node_ids": (
+        lambda block, payload: _stored(block)[:1],
+        lambda block, nodes: block._find_cycle_node_ids(nodes),
+    ),
+    "get_state": (
+        lambda block, payload: (),
+        lambda block: block._get_state(),
+    ),
+    "select_choice": (
+        lambda block, payload: (_request({"choice_index": 0}),),
+        lambda block, request: (block.select_choice(request), block.save()),
+    ),
+    "index_dictionary": (
+        lambda block, payload: (),
+        lambda block: block.index_dictionary(),
+    ),
+    "export_nodes": (
+        lambda block, payload: (_request({}),),
+        lambda block, request: block.export_nodes(request),
+    ),
+    "import_nodes": (
+        lambda block, payload: (_request({"nodes": payload}),),
+        lambda block, request: (block.import_nodes(request), block.save()),
+    ),
+}
+
+
+@pytest.mark.parametrize("node_count", NODE_COUNTS)
+@pytest.mark.parametrize("shape", SHAPES)
+@pytest.mark.parametrize("operation", list(OPERATIONS))
+def test_operation(benchmark, kvs_runtime, settings, operation, shape, node_count):
+    settings.BRANCHING_XBLOCK_MAX_NODES = max(NODE_COUNTS)
+    settings.DATA_UPLOAD_MAX_MEMORY_SIZE = 32 * 1024 * 1024
+    payload = generate_nodes(node_count, shape=shape, content_size=256)
+    store_scenario(kvs_runtime, {"nodes": {}, "start_node_id": None}, enable_scoring=True)
+    author_block = load_block(kvs_runtime)
+    assert json.loads(author_block.studio_submit(_request({"nodes": payload})).body)["result"] == "success"
+    author_block.save()
+
+    prepare, call = OPERATIONS[operation]
+    benchmark.group = operation
+    benchmark.extra_info.update({"shape": shape, "node_count": node_count})
+    benchmark.pedantic(
+        call,
+        setup=_setup(kvs_runtime, payload, prepare),
+        rounds=max(3, NODE_VISITS_PER_BENCHMARK // node_count),
+        warmup_rounds=1,
+    )
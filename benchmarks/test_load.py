@@ -0,0 +1,32 @@
+"""
+A short run of the learner load harness.
+
+Checks that concurrent learners complete without handler errors and prints
+the per-handler report; ``make load-test`` runs a launch-sized load.
+"""
+import pytest
+
+from branching_xblock.generator import generate_nodes
+from test_utils.load import LoadHarness, format_report, run_load
+
+
+@pytest.mark.parametrize("delta", [False, True])
+def test_concurrent_learners(capsys, delta):
+    harness = LoadHarness(
+        generate_nodes(30, content_size=1024),
+        delta=delta,
+        enable_scoring=True,
+        enable_undo=True,
+        enable_reset_activity=True,
+    )
+
+    report = run_load(harness, learners=200, concurrency=16, passes=2, undo_rate=0.1)
+
+    with capsys.disabled():
+        print(f"\ndelta={delta}\n{format_report(report)}")
+
+    handlers = report["handlers"]
+    assert set(handlers) == {"get_current_state", "select_choice", "undo_choice", "reset_activity"}
+    assert all(entry["errors"] == 0 for entry in handlers.values())
+    assert handlers["get_current_state"]["calls"] == handlers["reset_activity"]["calls"] == 200
+    assert handlers["select_choice"]["field_writes_per_call"]["current_node_id"] == 1
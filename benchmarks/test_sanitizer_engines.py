@@ -0,0 +1,76 @@
+"""
+Timing benchmark for `_build_final_nodes` under each sanitizer engine.
+
+Every node's content and hint is sanitized when an author saves, so the
+engine dominates save time once node content gets large. The sanitizer
+memo is disabled so each round measures the engine rather than the cache.
+"""
+import time
+from unittest import mock
+
+import pytest
+
+from branching_xblock import compat
+from branching_xblock.generator import generate_nodes
+from test_utils.blocks import load_block
+
+ROUNDS = 3
+
+# Rich but allowed markup, plus attributes and tags both engines must strip.
+CONTENT_CHUNK = (
+    '<p>Paragraph with <strong>bold</strong>, <em>emphasis</em> and a '
+    '<a href="https://example.com/page" title="Example" onclick="track()">link</a>.</p>'
+    '<ul><li>First &amp; foremost</li><li><code>value &lt; limit</code></li></ul>'
+    '<div class="callout"><img src="figure.png" onerror="alert(1)">Figure caption</div>'
+)
+
+
+def _studio_nodes(node_count, content_size):
+    """
+    Return a studio payload `nodes` list whose content is about `content_size` characters each.
+    """
+    content = CONTENT_CHUNK * max(1, content_size // len(CONTENT_CHUNK))
+    nodes = generate_nodes(node_count, shape="chain", content_size=0)
+    for node in nodes:
+        node["content"] = content
+        node["hint"] = "<em>Hint</em> with <span>markup</span>"
+    return nodes
+
+
+def _seconds_per_build(block, staged, engine):
+    """
+    Return the best wall time over `ROUNDS` calls to `_build_final_nodes` with `engine`.
+    """
+    timings = []
+    with mock.patch.object(compat.settings, "BRANCHING_XBLOCK_SANITIZER_ENGINE", engine, create=True):
+        for _ in range(ROUNDS):
+            started = time.perf_counter()
+            block._build_final_nodes(staged, set(), {}, block._empty_validation_errors())
+            timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+@pytest.mark.parametrize("node_count, content_size", [(30, 16 * 1024), (300, 4 * 1024)])
+def test_nh3_build_final_nodes_speedup(kvs_runtime, capsys, node_count, content_size):
+    if compat.bleach is None:
+        pytest.skip("bleach is not installed")
+
+    block = load_block(kvs_runtime)
+    _, staged = block._build_staged_nodes(_studio_nodes(node_count, content_size))
+
+    cache_bounds = compat.sanitizer_cache.maxsize, compat.sanitizer_cache.max_bytes
+    compat.sanitizer_cache.configure(maxsize=0)
+    try:
+        bleach_seconds = _seconds_per_build(block, staged, "bleach")
+        nh3_seconds = _seconds_per_build(block, staged, "nh3")
+    finally:
+        compat.sanitizer_cache.configure(*cache_bounds)
+
+    with capsys.disabled():
+        print(
+            f"\n_build_final_nodes, {node_count} nodes x {content_size // 1024} KiB: "
+            f"bleach {bleach_seconds * 1000:.1f} ms, nh3 {nh3_seconds * 1000:.1f} ms, "
+            f"{bleach_seconds / nh3_seconds:.1f}x faster"
+        )
+
+    assert nh3_seconds < bleach_seconds
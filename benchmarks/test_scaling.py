@@ -0,0 +1,104 @@
+"""
+Per-request latency of Studio and learner handlers on large scenarios.
+
+Each handler is timed on a generated diamond-lattice scenario, where every
+node links to two nodes of the next level, so edges grow with nodes. The
+budgets are the ones documented in ``docs/how-tos/large_scenarios.rst``; they
+are generous enough to absorb a slow CI machine while still catching any pass
+that turns quadratic.
+"""
+import json
+import time
+
+import pytest
+from django.test.client import RequestFactory
+
+from branching_xblock.generator import generate_nodes
+from test_utils.blocks import load_block, store_scenario
+
+ROUNDS = 3
+
+# Milliseconds per request, by node count.
+LATENCY_BUDGET_MS = {
+    1000: {
+        "studio_submit": 1000,
+        "import_nodes": 1000,
+        "export_nodes": 100,
+        "get_current_state": 250,
+        "select_choice": 250,
+    },
+    5000: {
+        "studio_submit": 5000,
+        "import_nodes": 5000,
+        "export_nodes": 500,
+        "get_current_state": 1250,
+        "select_choice": 1250,
+    },
+}
+
+
+def _best_ms(call):
+    """
+    Return the best wall time of `call` over `ROUNDS` runs, in milliseconds.
+    """
+    timings = []
+    for _ in range(ROUNDS):
+        started = time.perf_counter()
+        call()
+        timings.append(time.perf_counter() - started)
+    return min(timings) * 1000
+
+
+def _post(handler, payload):
+    """
+    Call a JSON handler and return its decoded response.
+    """
+    request = RequestFactory().post("/", data=json.dumps(payload), content_type="application/json")
+    return json.loads(handler(request).body.decode("utf-8"))
+
+
+@pytest.mark.parametrize("node_count", sorted(LATENCY_BUDGET_MS))
+def test_large_scenario_latency_budget(kvs_runtime, settings, capsys, node_count):
+    settings.BRANCHING_XBLOCK_MAX_NODES = max(LATENCY_BUDGET_MS)
+    # A 5k-node save is several megabytes, past Django's 2.5 MB default.
+    settings.DATA_UPLOAD_MAX_MEMORY_SIZE = 32 * 1024 * 1024
+    nodes = generate_nodes(node_count, shape="diamond", content_size=1024)
+    store_scenario(kvs_runtime, {"nodes": {}, "start_node_id": None}, enable_scoring=True)
+
+    def studio_submit():
+        block = load_block(kvs_runtime)
+        assert _post(block.studio_submit, {"nodes": nodes, "enable_scoring": True})["result"] == "success"
+        block.save()
+
+    def import_nodes():
+        block = load_block(kvs_runtime)
+        assert _post(block.import_nodes, {"nodes": json.loads(json.dumps(nodes))})["success"] is True
+        block.save()
+
+    def export_nodes():
+        assert len(_post(load_block(kvs_runtime).export_nodes, {})["nodes"]) == node_count
+
+    def get_current_state():
+        _post(load_block(kvs_runtime).get_current_state, {})
+
+    def select_choice():
+        block = load_block(kvs_runtime)
+        _post(block.reset_activity, {})
+        _post(block.select_choice, {"choice_index": 1})
+        block.save()
+
+    timings = {}
+    for name, call in [
+        ("studio_submit", studio_submit),
+        ("import_nodes", import_nodes),
+        ("export_nodes", export_nodes),
+        ("get_current_state", get_current_state),
+        ("select_choice", select_choice),
+    ]:
+        timings[name] = _best_ms(call)
+
+    with capsys.disabled():
+        print(f"\n{node_count} nodes: " + ", ".join(f"{name} {ms:.0f} ms" for name, ms in timings.items()))
+
+    budget = LATENCY_BUDGET_MS[node_count]
+    assert {name: ms for name, ms in timings.items() if ms > budget[name]} == {}
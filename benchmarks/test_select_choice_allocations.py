@@ -0,0 +1,72 @@
+"""
+Allocation benchmark for `select_choice` with and without the read-only content path.
+
+Each iteration mirrors one LMS request: construct the block over stored field
+data, call the handler and save. The baseline block reads `scenario_data`
+through the field descriptor, which is what every learner handler did before
+`_scenario_data_read_only` existed.
+"""
+import json
+import tracemalloc
+
+import pytest
+from django.test.client import RequestFactory
+
+from branching_xblock.branching_xblock import BranchingXBlock
+from branching_xblock.generator import generate_nodes, scenario_data
+from test_utils.blocks import load_block, store_scenario
+
+ITERATIONS = 20
+
+
+class DirtyTrackedBranchingXBlock(BranchingXBlock):
+    """
+    BranchingXBlock that reads content through the dirty-tracked field descriptor.
+    """
+
+    def _scenario_data_read_only(self):
+        return self.scenario_data
+
+
+def _peak_bytes_per_request(runtime, block_class, body):
+    """
+    Return the mean peak of traced allocations over one request cycle.
+    """
+    request_factory = RequestFactory()
+    peaks = []
+    tracemalloc.start()
+    try:
+        for _ in range(ITERATIONS):
+            request = request_factory.post("/", data=body, content_type="application/json")
+            baseline, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            block = load_block(runtime, block_class)
+            block.select_choice(request)
+            block.save()
+            _, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - baseline)
+            del block
+    finally:
+        tracemalloc.stop()
+    return sum(peaks) / len(peaks)
+
+
+@pytest.mark.parametrize("node_count", [30, 300])
+def test_select_choice_allocation_saved(kvs_runtime, capsys, node_count):
+    nodes = generate_nodes(node_count, shape="chain", content_size=1024)
+    store_scenario(kvs_runtime, scenario_data(nodes), enable_scoring=True)
+    body = json.dumps({"choice_index": 0})
+
+    # Warm the compiled scenario cache so both variants measure the steady state.
+    load_block(kvs_runtime).select_choice(RequestFactory().post("/", data=body, content_type="application/json"))
+
+    dirty_tracked = _peak_bytes_per_request(kvs_runtime, DirtyTrackedBranchingXBlock, body)
+    read_only = _peak_bytes_per_request(kvs_runtime, BranchingXBlock, body)
+
+    with capsys.disabled():
+        print(
+            f"\nselect_choice, {node_count} nodes: dirty-tracked {dirty_tracked / 1024:.1f} KiB, "
+            f"read-only {read_only / 1024:.1f} KiB, saved {(dirty_tracked - read_only) / 1024:.1f} KiB per call"
+        )
+
+    assert read_only < dirty_tracked
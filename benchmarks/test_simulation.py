@@ -0,0 +1,39 @@
+"""
+Throughput of the Monte Carlo learner simulator.
+
+A million learners through a branching scenario should take seconds on one
+core; the budget leaves room for a slow CI machine.
+"""
+import time
+
+import pytest
+
+from branching_xblock import simulation
+from branching_xblock.generator import generate_nodes, scenario_data
+from branching_xblock.simulation import simulate_learners
+
+LEARNERS = 1_000_000
+BUDGET_SECONDS = 20
+
+
+@pytest.mark.parametrize("policy, options", [
+    ("uniform", {}),
+    ("uniform", {"enable_undo": True, "enable_reset_activity": True, "undo_rate": 0.1, "reset_rate": 0.02}),
+])
+def test_million_learner_simulation(capsys, policy, options):
+    if simulation.np is None:
+        pytest.skip("NumPy is not installed")
+    nodes = scenario_data(generate_nodes(30, shape="diamond", content_size=0))["nodes"]
+
+    started = time.perf_counter()
+    result = simulate_learners(nodes, "node-0", LEARNERS, policy, **options)
+    seconds = time.perf_counter() - started
+
+    with capsys.disabled():
+        print(
+            f"\n{LEARNERS} learners, 30 nodes, {policy} {options or ''}: {seconds:.2f} s, "
+            f"{sum(result['actions'].values()) / seconds / 1e6:.1f}M actions/s"
+        )
+
+    assert result["completed"] + result["incomplete"] == LEARNERS
+    assert seconds < BUDGET_SECONDS
@@ -1,39 +1,323 @@
 """Branching Scenario XBlock."""
+import copy
+import functools
 import html
+import json
 import os
+import threading
 import uuid
-from collections import deque
+from collections import Counter, deque
 from typing import Any, Optional
+from xml.sax.saxutils import quoteattr
 
 import nh3
 from django.conf import settings
 from web_fragments.fragment import Fragment
 from xblock.core import XBlock
-from xblock.fields import Boolean, Dict, Integer, List, Scope, String
+from xblock.exceptions import JsonHandlerError
+from xblock.fields import NO_CACHE_VALUE, Boolean, Dict, Integer, List, Scope, String
 from xblock.utils.resources import ResourceLoader
 
-from .compat import get_site_configuration_value, sanitize_html
+from . import simulation
+from .compat import (
+    SANITIZER_POLICY_VERSION,
+    get_site_configuration_value,
+    has_site_configuration,
+    sanitize_html,
+    sanitizer_cache,
+)
+from .distribution import compute_score_distribution
+from .graph import compute_path_metrics, find_cycles
+from .instrumentation import handler_body, instrumented, phase, timed
+from .scenario import CompiledScenario, _clean_hint, compiled_scenarios, is_sanitized, scenario_content_hash
 
 resource_loader = ResourceLoader(__name__)
 
-DFS_STATE_UNVISITED = 0
-DFS_STATE_VISITING = 1
-DFS_STATE_VISITED = 2
-
+# Default node limit per scenario. Deployments that need larger scenarios
+# raise it through the BRANCHING_XBLOCK_MAX_NODES Django setting.
 MAX_NODES = 30
 
+# Learners the Studio outcome preview may simulate per request.
+SIMULATION_DEFAULT_LEARNERS = 10000
+SIMULATION_MAX_LEARNERS = 100000
+# Bounds learners × nodes, as each learner can take up to two steps per node:
+# the full learner cap at the default node limit, fewer on larger scenarios.
+SIMULATION_MAX_LEARNER_NODES = SIMULATION_MAX_LEARNERS * MAX_NODES
+
+# Events whose last payload per learner is remembered so repeats are not published.
+COALESCED_EVENTS = ("grade", "completion")
+
+# Longest client request token remembered for replay detection.
+MAX_REQUEST_TOKEN_LENGTH = 128
+
+# Most choices ahead of the learner that frontier payloads and ``get_nodes`` reach.
+MAX_FRONTIER_DEPTH = 5
+
+STRIP_HTML_POLICY_KEY = ("nh3", "plain-text")
+
+# Where webpack writes the frontend bundles; one subdirectory and manifest per build.
+BUNDLE_DIR = "static/bundles"
+
+# Where and for how long the frontend keeps the MFE config in sessionStorage;
+# must match STORAGE_PREFIX and MFE_CONFIG_TTL_MS in frontend/src/mfeConfig.ts.
+MFE_CONFIG_STORAGE_PREFIX = "branching-xblock:mfe-config:"
+MFE_CONFIG_TTL_MS = 10 * 60 * 1000
+
+# Adds a preload hint for the MFE config unless a fresh copy is stored.
+MFE_CONFIG_PRELOAD_SCRIPT = """(function (url, key, ttl) {
+  try {
+    var stored = JSON.parse(window.sessionStorage.getItem(key) || "null");
+    if (stored && Date.now() - stored.fetchedAt < ttl) {
+      return;
+    }
+  } catch (e) {
+    // Treated as not stored.
+  }
+  var link = document.createElement("link");
+  link.rel = "preload";
+  link.as = "fetch";
+  link.crossOrigin = "anonymous";
+  link.href = url;
+  document.head.appendChild(link);
+}(%s, %s, %d));
+"""
+
+
+def _html_to_text(text: str) -> str:
+    """Reduce HTML to plain text with nh3, dropping script/style contents."""
+    text = text.replace("<", " <")
+    return " ".join(html.unescape(nh3.clean(text, tags=set())).split())
+
 
 def _strip_html(text: str) -> str:
     """Reduce HTML to searchable plain text; script/style contents are dropped."""
-    text = (text or "").replace("<", " <")
-    return " ".join(html.unescape(nh3.clean(text, tags=set())).split())
+    if not text:
+        return ""
+    return sanitizer_cache.get_or_compute(STRIP_HTML_POLICY_KEY, text, _html_to_text)
+
+
+def _script_literal(value: str) -> str:
+    """Return `value` as a JavaScript string literal that is safe inside a ``<script>`` element."""
+    return json.dumps(value).replace("<", "\\u003c")
+
+
+def get_max_nodes() -> int:
+    """
+    Return the maximum number of nodes a scenario may have.
+    """
+    return int(getattr(settings, "BRANCHING_XBLOCK_MAX_NODES", None) or MAX_NODES)
 
 
-def _clean_hint(value: Any) -> str:
+@functools.lru_cache(maxsize=None)
+def _bundle_manifest(build: str) -> dict[str, Any]:
+    """
+    Return the manifest of the ``modern`` or ``legacy`` frontend build, or {} when it was not built.
     """
-    Return a node hint as sanitized HTML.
+    try:
+        manifest = json.loads(resource_loader.load_unicode(f"{BUNDLE_DIR}/{build}/manifest.json"))
+    except (OSError, ValueError):
+        return {}
+    return manifest if isinstance(manifest, dict) else {}
+
+
+def _manifest_files(entry: str) -> Optional[dict[str, Any]]:
     """
-    return sanitize_html(str(value or ''))
+    Return the manifest entry of the `entry` bundle in the served build, or None when it was not built.
+
+    The modern build is served unless the ``BRANCHING_XBLOCK_LEGACY_BUNDLES``
+    Django setting asks for the ES5 one.
+    """
+    build = "legacy" if getattr(settings, "BRANCHING_XBLOCK_LEGACY_BUNDLES", False) else "modern"
+    files = _bundle_manifest(build).get(entry)
+    if not isinstance(files, dict) or not files.get("js"):
+        return None
+    return files
+
+
+def get_bundle_files(entry: str) -> dict[str, list[str]]:
+    """
+    Return the JS and CSS files, relative to `BUNDLE_DIR` and in load order, of the `entry` bundle.
+
+    Without a build manifest, the unhashed ``<entry>.js`` of older builds is used.
+    """
+    files = _manifest_files(entry)
+    if files is None:
+        return {"js": [f"{entry}.js"], "css": []}
+    return {"js": list(files["js"]), "css": list(files.get("css") or [])}
+
+
+def _learner_bundle_built() -> bool:
+    """
+    Return whether the learner UI comes from a build manifest.
+
+    The unhashed bundle served without one predates deferred publishing,
+    client traversal and frontier payloads, so those stay off.
+    """
+    return _manifest_files("student") is not None
+
+
+def _request_token(data: dict[str, Any]) -> Optional[str]:
+    """
+    Return the client's ``request_token`` for an action, or None when missing or malformed.
+    """
+    token = data.get("request_token")
+    if isinstance(token, str) and 0 < len(token) <= MAX_REQUEST_TOKEN_LENGTH:
+        return token
+    return None
+
+
+def _saved_node_count(block: "BranchingXBlock") -> int:
+    """
+    Return the number of nodes in the block's saved scenario.
+    """
+    return len(block._scenario_data_read_only().get("nodes") or {})  # pylint: disable=protected-access
+
+
+# Site configuration values looked up during the current handler or view call.
+_request_local = threading.local()
+
+
+def _per_request_site_values(method):
+    """
+    Make the site configuration lookups of one handler or view call share their results.
+
+    In Studio each lookup is a database query, and one call can ask for the
+    same key several times.
+    """
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        if getattr(_request_local, "site_values", None) is not None:
+            return method(*args, **kwargs)
+        _request_local.site_values = {}
+        try:
+            return method(*args, **kwargs)
+        finally:
+            _request_local.site_values = None
+    return wrapper
+
+
+def _site_value(config_key: str) -> Any:
+    """
+    Return `config_key` from the current site's ``branching_xblock`` configuration, or None.
+    """
+    if not has_site_configuration():
+        return None
+    site_values = getattr(_request_local, "site_values", None)
+    if site_values is not None and config_key in site_values:
+        return site_values[config_key]
+    try:
+        value = get_site_configuration_value("branching_xblock", config_key)
+    except Exception:  # pylint: disable=broad-exception-caught
+        # A failing lookup must not fail the learner's request.
+        value = None
+    if site_values is not None:
+        site_values[config_key] = value
+    return value
+
+
+def _site_flag(config_key: str) -> bool:
+    """
+    Return whether `config_key` is set in the current site's ``branching_xblock`` configuration.
+    """
+    return bool(_site_value(config_key))
+
+
+def _server_timing_enabled() -> bool:
+    """
+    Return whether the current site wants ``Server-Timing`` headers on handler responses.
+    """
+    return _site_flag("SERVER_TIMING")
+
+
+def _publishing_deferred() -> bool:
+    """
+    Return whether the current site defers grade and completion events after undo and reset.
+
+    Only a learner UI from a build manifest publishes them as the learner leaves.
+    """
+    return _learner_bundle_built() and _site_flag("DEFER_GRADE_PUBLISHING")
+
+
+def _client_traversal_enabled() -> bool:
+    """
+    Return whether the current site lets the learner UI move through the scenario locally.
+    """
+    return _learner_bundle_built() and _site_flag("CLIENT_TRAVERSAL")
+
+
+def _frontier_depth() -> Optional[int]:
+    """
+    Return how many choices ahead of the learner the state payload carries nodes, or None for the whole map.
+
+    Client traversal replays paths over the whole node map, so it always gets
+    it, as does a learner UI that is not from a build manifest.
+    """
+    if not _learner_bundle_built():
+        return None
+    depth = _site_value("FRONTIER_DEPTH")
+    if isinstance(depth, bool) or not isinstance(depth, int) or depth < 1 or _client_traversal_enabled():
+        return None
+    return min(depth, MAX_FRONTIER_DEPTH)
+
+
+class PublishCounters:
+    """
+    Per-process counts of grade and completion events by outcome.
+
+    Outcomes are ``published``, ``suppressed`` (the learner's last published
+    payload was the same) and ``deferred`` (held back until
+    ``publish_progress``).
+    """
+
+    def __init__(self):
+        """
+        Start with every count at zero.
+        """
+        self._lock = threading.Lock()
+        self._counts: Counter = Counter()
+
+    def add(self, event_type: str, outcome: str) -> None:
+        """
+        Count one `event_type` event with `outcome`.
+        """
+        with self._lock:
+            self._counts[event_type, outcome] += 1
+
+    def clear(self) -> None:
+        """
+        Reset every count.
+        """
+        with self._lock:
+            self._counts.clear()
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        """
+        Return the counts as ``{event_type: {outcome: count}}``.
+        """
+        with self._lock:
+            stats: dict[str, dict[str, int]] = {}
+            for (event_type, outcome), count in sorted(self._counts.items()):
+                stats.setdefault(event_type, {})[outcome] = count
+            return stats
+
+
+publish_counters = PublishCounters()
+
+
+# Wrap views and handlers; no-ops unless an instrumentation sink is configured
+# or, for handlers, the site asks for Server-Timing headers.
+_instrument = instrumented(node_count=_saved_node_count)
+_instrument_handler = instrumented(node_count=_saved_node_count, server_timing=_server_timing_enabled)
+
+
+def _json_handler(func):
+    """
+    Make `func` a JSON handler with ``XBlock.json_handler``, instrumented like the views.
+
+    Sites that set ``SERVER_TIMING`` also get the phase breakdown as a
+    ``Server-Timing`` response header, with or without an instrumentation sink.
+    """
+    return _per_request_site_values(_instrument_handler(XBlock.json_handler(handler_body(func))))
 
 
 def _default_node(**overrides):
@@ -73,6 +357,7 @@ IMPORT_TEMPLATE_NODES = (
 )
 
 
+@XBlock.wants("user")
 class BranchingXBlock(XBlock):
     """
     Branching Scenario XBlock.
@@ -197,8 +482,73 @@ class BranchingXBlock(XBlock):
         help="Completion status"
     )
 
+    state_version = Integer(
+        scope=Scope.user_state,
+        default=0,
+        help="Incremented on every learner state change; lets clients request delta responses"
+    )
+
+    last_request_token = String(
+        scope=Scope.user_state,
+        default=None,
+        help="Client token of the last applied learner action; repeats of it are not applied again"
+    )
+
+    last_request_state_version = Integer(
+        scope=Scope.user_state,
+        default=0,
+        help="state_version produced by the action carrying last_request_token"
+    )
+
+    published_events = Dict(
+        scope=Scope.user_state,
+        default={},
+        help="Last grade and completion payloads published; unchanged ones are not published again"
+    )
+
     has_custom_completion = True
     _migrated_nodes_ref: Optional[dict[str, Any]] = None
+    _compiled_scenario_ref: Optional[tuple[dict[str, Any], CompiledScenario]] = None
+
+    def _scenario_data_read_only(self) -> dict[str, Any]:
+        """
+        Return `scenario_data` for reading, bypassing XBlock's dirty tracking.
+
+        Reading a mutable field through its descriptor deep-copies the value as
+        a baseline, and `save()` later diffs the whole node graph against that
+        copy. Learner handlers never change content, so they load the value
+        into the field cache without marking it dirty. Callers must not mutate
+        the result; code that edits content assigns `self.scenario_data`.
+        """
+        # pylint: disable=protected-access
+        field = type(self).scenario_data
+        value = field._get_cached_value(self)
+        if value is NO_CACHE_VALUE:
+            with phase("field_data"):
+                if self._field_data.has(self, field.name):
+                    value = field.from_json(self._field_data.get(self, field.name))
+                else:
+                    value = copy.deepcopy(field.default)
+            field._set_cached_value(self, value)
+        return value
+
+    def _compiled_scenario(self) -> CompiledScenario:
+        """
+        Return the compiled form of the current `scenario_data`.
+
+        The per-process cache is keyed by usage id and the content version
+        stamped at save time, so one compile serves every learner of this block
+        until the content changes. The result is also remembered per
+        `scenario_data` object, so a handler looks it up at most once.
+        """
+        scenario_data = self._scenario_data_read_only()
+        if self._compiled_scenario_ref is not None and self._compiled_scenario_ref[0] is scenario_data:
+            return self._compiled_scenario_ref[1]
+
+        usage_key = str(getattr(self.scope_ids, "usage_id", None) or "")
+        compiled = compiled_scenarios.get_or_compile(usage_key, scenario_data)
+        self._compiled_scenario_ref = (scenario_data, compiled)
+        return compiled
 
     def start_node(self) -> None:
         """
@@ -211,22 +561,28 @@ class BranchingXBlock(XBlock):
             self.score_history = []
             self.choice_history = []
             self.has_completed = False
-        if not self.current_node_id and self.scenario_data.get("start_node_id"):
-            self.current_node_id = self.scenario_data["start_node_id"]
+        start_node_id = self._compiled_scenario().start_node_id
+        if not self.current_node_id and start_node_id:
+            self.current_node_id = start_node_id
 
     def get_node(self, node_id: str) -> Optional[dict[str, Any]]:
         """
         Get a node by its ID.
         """
-        nodes = self.scenario_data.get("nodes", {})
-        if not isinstance(nodes, dict):
-            return None
+        return self._compiled_scenario().get_node(node_id)
 
-        node = nodes.get(node_id)
-        if not isinstance(node, dict):
-            return None
+    @classmethod
+    def parse_xml(cls, node, runtime, keys, *args, **kwargs):
+        """
+        Build the block from OLX, bringing its scenario to the current schema.
 
-        return node
+        OLX edits and course imports can change the nodes without updating
+        the stored content hash; migrating here replaces a stale one before
+        learners see the imported content.
+        """
+        block = super().parse_xml(node, runtime, keys, *args, **kwargs)
+        block._migrate_and_save_legacy_nodes()  # pylint: disable=protected-access
+        return block
 
     def _migrate_and_save_legacy_nodes(self) -> None:
         """
@@ -243,6 +599,11 @@ class BranchingXBlock(XBlock):
         - Drops malformed non-dict nodes/choices.
         - Upgrades each node via `_migrate_legacy_node` (fills missing keys,
           fixes the media shape, converts legacy single images, cleans choices).
+        - Re-sanitizes content and hints only when the scenario is not stamped
+          with the current `SANITIZER_POLICY_VERSION`, then stamps it.
+        - Stamps the content hash learner requests key compiled scenarios on,
+          replacing a stamp that does not match the nodes, and recomputes the
+          path metrics, which are only trusted alongside it.
         - Writes the result back to `scenario_data` only when something changed.
         - Runs once per `nodes` object via `_migrated_nodes_ref`.
 
@@ -255,33 +616,51 @@ class BranchingXBlock(XBlock):
             return
 
         if not isinstance(nodes, dict):
-            self.scenario_data = {**self.scenario_data, "nodes": {}}
+            self.scenario_data = {
+                **self.scenario_data,
+                "nodes": {},
+                "sanitizer_version": SANITIZER_POLICY_VERSION,
+                "content_hash": scenario_content_hash({}, self.scenario_data.get("start_node_id")),
+                "path_metrics": {},
+            }
             self._migrated_nodes_ref = self.scenario_data["nodes"]
             return
 
+        sanitize = not is_sanitized(self.scenario_data)
         migrated_nodes: dict[str, dict[str, Any]] = {}
-        changed = False
+        # A stamp that does not match the nodes, e.g. kept by an OLX edit,
+        # would serve learners a stale compiled scenario.
+        stamp = scenario_content_hash(nodes, self.scenario_data.get("start_node_id"))
+        changed = sanitize or self.scenario_data.get("content_hash") != stamp
         for node_id, node in nodes.items():
             if not isinstance(node, dict):
                 changed = True
                 continue
 
-            migrated_node, node_changed = self._migrate_legacy_node(node)
+            migrated_node, node_changed = self._migrate_legacy_node(node, sanitize=sanitize)
             if node_changed:
                 changed = True
 
             migrated_nodes[node_id] = migrated_node
 
         if changed:
-            self.scenario_data = {**self.scenario_data, "nodes": migrated_nodes}
+            self.scenario_data = {
+                **self.scenario_data,
+                "nodes": migrated_nodes,
+                "sanitizer_version": SANITIZER_POLICY_VERSION,
+                "content_hash": scenario_content_hash(migrated_nodes, self.scenario_data.get("start_node_id")),
+                "path_metrics": compute_path_metrics(migrated_nodes),
+            }
             nodes = self.scenario_data.get("nodes", {})
 
         self._migrated_nodes_ref = nodes
 
-    def _migrate_legacy_node(self, node: dict[str, Any]) -> tuple[dict[str, Any], bool]:
+    def _migrate_legacy_node(self, node: dict[str, Any], sanitize: bool = True) -> tuple[dict[str, Any], bool]:
         """
         Return one stored node upgraded to the current schema.
 
+        Content and hint are re-sanitized unless `sanitize` is False, which
+        callers pass for scenarios already stamped with the current policy.
         Returns a ``(node_copy, changed)`` tuple and it does not mutate
         the input or persist anything.
         """
@@ -331,10 +710,16 @@ class BranchingXBlock(XBlock):
 
         # Hints persisted before hints were sanitized (or written straight to
         # OLX) can still hold raw HTML, which the learner UI renders as HTML.
-        cleaned_hint = _clean_hint(migrated_node.get("hint"))
-        if cleaned_hint != migrated_node.get("hint"):
-            migrated_node["hint"] = cleaned_hint
-            changed = True
+        if sanitize:
+            cleaned_hint = _clean_hint(migrated_node.get("hint"))
+            if cleaned_hint != migrated_node.get("hint"):
+                migrated_node["hint"] = cleaned_hint
+                changed = True
+            raw_content = migrated_node.get("content")
+            cleaned_content = sanitize_html(raw_content) if isinstance(raw_content, str) else raw_content
+            if cleaned_content != raw_content:
+                migrated_node["content"] = cleaned_content
+                changed = True
 
         raw_choices = migrated_node.get("choices", [])
         choices_were_invalid = not isinstance(raw_choices, list)
@@ -449,34 +834,10 @@ class BranchingXBlock(XBlock):
         """
         Return node IDs that participate in a directed cycle.
         """
-        state = {}
-        stack = []
-        cycle_node_ids = set()
-
-        def visit(node_id: str) -> None:
-            state[node_id] = DFS_STATE_VISITING
-            stack.append(node_id)
-            node = nodes.get(node_id, {})
-            for choice in node.get("choices", []) or []:
-                target_node_id = choice.get("target_node_id")
-                if target_node_id not in nodes:
-                    continue
-                target_state = state.get(target_node_id, DFS_STATE_UNVISITED)
-                if target_state == DFS_STATE_UNVISITED:
-                    visit(target_node_id)
-                elif target_state == DFS_STATE_VISITING:
-                    if target_node_id in stack:
-                        cycle_start_index = stack.index(target_node_id)
-                        cycle_node_ids.update(stack[cycle_start_index:])
-            stack.pop()
-            state[node_id] = DFS_STATE_VISITED
-
-        for node_id in nodes:
-            if state.get(node_id, DFS_STATE_UNVISITED) == DFS_STATE_UNVISITED:
-                visit(node_id)
-
+        cycle_node_ids, _ = find_cycles(nodes)
         return cycle_node_ids
 
+    @timed("graph")
     def _compute_max_attainable_score(
         self,
         nodes: dict[str, dict[str, Any]],
@@ -658,9 +1019,9 @@ class BranchingXBlock(XBlock):
         """
         Check if node is a leaf node.
         """
-        node = self.get_node(node_id)
-        return bool(node) and not node.get("choices")
+        return self._compiled_scenario().is_end_node(node_id)
 
+    @timed("validation")
     def validate_scenario(self, payload: dict[str, Any]) -> dict[str, Any]:
         """
         Validate studio payload and return structured validation results.
@@ -704,8 +1065,9 @@ class BranchingXBlock(XBlock):
         )
         final = self._build_final_nodes(staged, resolved_deleted_node_ids, id_map, validation_errors)
 
-        if len(final) > MAX_NODES:
-            self._add_global_error(validation_errors, f"Too many nodes (max {MAX_NODES}).")
+        max_nodes = get_max_nodes()
+        if len(final) > max_nodes:
+            self._add_global_error(validation_errors, f"Too many nodes (max {max_nodes}).")
 
         if not final:
             self._add_global_error(validation_errors, "At least one node is required")
@@ -724,17 +1086,28 @@ class BranchingXBlock(XBlock):
             for node in final
         }
 
-        cycle_node_ids = self._find_cycle_node_ids(nodes_dict)
-        if cycle_node_ids:
-            sorted_cycle_ids = sorted(cycle_node_ids)
-            for node_id in sorted_cycle_ids:
-                client_node_id = client_id_by_node_id.get(node_id, node_id)
-                self._add_node_error(
-                    validation_errors,
-                    node_client_id=client_node_id,
-                    title="Circular path detected",
-                    detail="This node links back through branching choices. Remove one link in the loop.",
-                )
+        cycle_node_ids, cycles = find_cycles(nodes_dict)
+        cycle_path_by_node_id = {}
+        for cycle in cycles:
+            path = " → ".join(
+                f"Node {node_number_by_id[node_id]}" if node_id in node_number_by_id else node_id
+                for node_id in cycle + cycle[:1]
+            )
+            for node_id in cycle:
+                cycle_path_by_node_id[node_id] = path
+        for node_id in sorted(cycle_node_ids):
+            client_node_id = client_id_by_node_id.get(node_id, node_id)
+            path = cycle_path_by_node_id.get(node_id)
+            self._add_node_error(
+                validation_errors,
+                node_client_id=client_node_id,
+                title="Circular path detected",
+                detail=(
+                    f"This node links back through branching choices ({path}). Remove one link in the loop."
+                    if path else
+                    "This node links back through branching choices. Remove one link in the loop."
+                ),
+            )
 
         return {
             "validation_errors": validation_errors,
@@ -763,10 +1136,37 @@ class BranchingXBlock(XBlock):
     def _publish_event(self, event_type: str, event_data: dict[str, Any]) -> None:
         """
         Publish an XBlock runtime event, skipped outside a course context.
+
+        Each grade or completion event makes the LMS recalculate grades, so
+        one repeating the payload last published for this learner is skipped.
         """
         if not self._in_course_context():
             return
+        if event_type in COALESCED_EVENTS:
+            if self.published_events.get(event_type) == event_data:
+                publish_counters.add(event_type, "suppressed")
+                return
+            self.published_events = {**self.published_events, event_type: event_data}
         self.runtime.publish(self, event_type, event_data)
+        if event_type in COALESCED_EVENTS:
+            publish_counters.add(event_type, "published")
+
+    def _publish_after_action(self, completion: Optional[float] = None) -> None:
+        """
+        Publish the grade, and `completion` if given, after an undo or reset.
+
+        Sites with ``DEFER_GRADE_PUBLISHING`` hold them back until the learner
+        completes the scenario again or leaves the unit (`publish_progress`).
+        """
+        if _publishing_deferred():
+            if self.enable_scoring:
+                publish_counters.add("grade", "deferred")
+            if completion is not None:
+                publish_counters.add("completion", "deferred")
+            return
+        self.publish_grade()
+        if completion is not None:
+            self._publish_event("completion", {"completion": completion})
 
     def publish_grade(self) -> None:
         """
@@ -791,7 +1191,7 @@ class BranchingXBlock(XBlock):
         """
         xblock_body = super().index_dictionary()
         parts = []
-        nodes = (self.scenario_data or {}).get("nodes", {}) or {}
+        nodes = (self._scenario_data_read_only() or {}).get("nodes", {}) or {}
         # Nodes are normally a dict keyed by node id, but legacy data saved
         # before migration may store them as a list. Handle both.
         if isinstance(nodes, dict):
@@ -833,34 +1233,86 @@ class BranchingXBlock(XBlock):
         root_url = getattr(settings, "LMS_ROOT_URL", "") or ""
         return f"{root_url}/api/mfe_config/v1?mfe=learning" if root_url else ""
 
+    @staticmethod
+    def _preload_mfe_config(frag: Fragment, mfe_config_api: str) -> None:
+        """
+        Hint the browser to fetch the MFE config while the frontend bundle loads.
+
+        The hint is added from a script in the page head, and only when the
+        config is not already in sessionStorage. Every block on a page adds
+        the same resource, which the runtime includes once.
+        """
+        if mfe_config_api:
+            frag.add_resource(
+                MFE_CONFIG_PRELOAD_SCRIPT % (
+                    _script_literal(mfe_config_api),
+                    _script_literal(MFE_CONFIG_STORAGE_PREFIX + mfe_config_api),
+                    MFE_CONFIG_TTL_MS,
+                ),
+                "application/javascript",
+                placement="head",
+            )
+
+    def _add_bundle(self, frag: Fragment, entry: str) -> tuple[list[str], str]:
+        """
+        Add the scripts of the `entry` bundle to `frag`.
+
+        Returns the bundle's stylesheet URLs and the URL its lazily loaded
+        chunks are fetched from, or "" when the runtime's resource URLs do not
+        allow working it out; the bundle then finds it from its own script.
+        """
+        files = get_bundle_files(entry)
+        for name in files["js"]:
+            frag.add_javascript_url(self.runtime.local_resource_url(self, f"{BUNDLE_DIR}/{name}"))
+        entry_file = files["js"][-1]
+        entry_url = self.runtime.local_resource_url(self, f"{BUNDLE_DIR}/{entry_file}")
+        base_url = entry_url[:-len(entry_file)] if entry_url.endswith(f"/{entry_file}") else ""
+        style_urls = [self.runtime.local_resource_url(self, f"{BUNDLE_DIR}/{name}") for name in files["css"]]
+        return style_urls, base_url
+
+    @_per_request_site_values
+    @_instrument
     def student_view(self, context: Optional[dict[str, Any]] = None) -> Fragment:
         """
         Create primary view of the BranchingXBlock, shown to students when viewing courses.
         """
         frag = Fragment('<div data-react-root="true"></div>')
-        frag.add_javascript_url(self.runtime.local_resource_url(self, "static/bundles/student.js"))
+        mfe_config_api = self._mfe_config_api_url()
+        self._preload_mfe_config(frag, mfe_config_api)
+        bundle_style_urls, bundle_base_url = self._add_bundle(frag, "student")
         frag.initialize_js('BranchingXBlock', {
             "view": "student",
             "handler_urls": {
                 "select_choice": self.runtime.handler_url(self, "select_choice"),
                 "undo_choice": self.runtime.handler_url(self, "undo_choice"),
                 "reset_activity": self.runtime.handler_url(self, "reset_activity"),
+                "publish_progress": self.runtime.handler_url(self, "publish_progress"),
+                "submit_path": self.runtime.handler_url(self, "submit_path"),
+                "get_nodes": self.runtime.handler_url(self, "get_nodes"),
             },
             "initial_state": self._get_state(),
-            "mfe_config_api": self._mfe_config_api_url(),
+            "defer_publishing": _publishing_deferred(),
+            "client_traversal": _client_traversal_enabled(),
+            "mfe_config_api": mfe_config_api,
+            "bundle_base_url": bundle_base_url,
             "style_urls": [
+                *bundle_style_urls,
                 self.runtime.local_resource_url(self, "static/css/branching_xblock.css"),
             ],
         })
         return frag
 
+    @_per_request_site_values
+    @_instrument
     def studio_view(self, context: Optional[dict[str, Any]] = None) -> Fragment:
         """
         Studio editor view shown to course authors.
         """
         self._migrate_and_save_legacy_nodes()
         frag = Fragment('<div data-react-root="true"></div>')
-        frag.add_javascript_url(self.runtime.local_resource_url(self, "static/bundles/studio.js"))
+        mfe_config_api = self._mfe_config_api_url()
+        self._preload_mfe_config(frag, mfe_config_api)
+        bundle_style_urls, bundle_base_url = self._add_bundle(frag, "studio")
 
         authoring_help_html = sanitize_html(
             get_site_configuration_value("branching_xblock", "AUTHORING_HELP_HTML") or ""
@@ -871,10 +1323,12 @@ class BranchingXBlock(XBlock):
                 "studio_submit": self.runtime.handler_url(self, "studio_submit"),
                 "export_nodes": self.runtime.handler_url(self, "export_nodes"),
                 "import_nodes": self.runtime.handler_url(self, "import_nodes"),
+                "score_distribution": self.runtime.handler_url(self, "score_distribution"),
             },
-            "mfe_config_api": self._mfe_config_api_url(),
+            "mfe_config_api": mfe_config_api,
             "initial_state": {
                 "nodes": self.scenario_data.get("nodes", {}),
+                "path_metrics": self._compiled_scenario().path_metrics,
                 "enable_undo": bool(self.enable_undo),
                 "enable_scoring": bool(self.enable_scoring),
                 "enable_reset_activity": bool(self.enable_reset_activity),
@@ -888,46 +1342,36 @@ class BranchingXBlock(XBlock):
             "meta": {
                 "authoring_help_html": authoring_help_html,
                 "import_template": {"nodes": list(IMPORT_TEMPLATE_NODES)},
+                "max_nodes": get_max_nodes(),
             },
+            "bundle_base_url": bundle_base_url,
             "style_urls": [
+                *bundle_style_urls,
                 self.runtime.local_resource_url(self, "static/css/studio_editor.css"),
             ],
         })
         return frag
 
-    @staticmethod
-    def _hint_safe_node(node: Any) -> Any:
-        """
-        Return a copy of the node with its hint sanitized, or the node itself.
-
-        The save/import pipeline sanitizes hints on the way in, but scenarios
-        stored before that (or edited straight into OLX) can still hold raw
-        HTML, and `_migrate_legacy_node` only cleans those for the Studio
-        editor. The learner UI renders hints as HTML, so clean on the way out
-        too.
-        """
-        if isinstance(node, dict) and node.get("hint"):
-            return {**node, "hint": _clean_hint(node.get("hint"))}
-        return node
-
+    @timed("state")
     def _get_state(self) -> dict[str, Any]:
         """
         Build the learner-facing runtime state payload.
         """
-        nodes = self.scenario_data.get("nodes", {})
-        start_node_id = self.scenario_data.get("start_node_id")
+        compiled = self._compiled_scenario()
+        client_traversal = _client_traversal_enabled()
+        frontier_depth = _frontier_depth()
 
         # The learner UI renders one hint: the current node's, falling back to
         # the start node's before there is any learner state. Those are the
-        # only hints that reach the DOM, so sanitize them.
-        if isinstance(nodes, dict) and start_node_id in nodes:
-            safe_start_node = self._hint_safe_node(nodes[start_node_id])
-            if safe_start_node is not nodes[start_node_id]:
-                nodes = {**nodes, start_node_id: safe_start_node}
+        # only hints that reach the DOM; the compiled scenario holds them
+        # already sanitized. Client traversal renders any node of the map, so
+        # it gets the map with every node sanitized.
+        current_node = compiled.get_safe_node(self.current_node_id) if self.current_node_id else None
 
         return {
-            "nodes":           nodes,
-            "start_node_id":   self.scenario_data.get("start_node_id"),
+            "nodes":           self._learner_nodes(compiled, frontier_depth, client_traversal),
+            "frontier_depth":  frontier_depth,
+            "start_node_id":   compiled.start_node_id,
             "enable_undo":     bool(self.enable_undo),
             "enable_scoring":  bool(self.enable_scoring),
             "enable_reset_activity": bool(self.enable_reset_activity),
@@ -937,27 +1381,135 @@ class BranchingXBlock(XBlock):
             "max_score":       self.max_score,
             "grade_ranges":    self.grade_ranges,
             "display_name":    self.display_name,
-            "current_node":    self._hint_safe_node(self.get_current_node()),
+            "current_node":    current_node,
+            "current_node_metrics": compiled.get_path_metrics(self.current_node_id),
+            "next_image_urls": compiled.get_next_image_urls(self.current_node_id or compiled.start_node_id),
             "history":         list(self.history),
             "score_history":   list(self.score_history),
             "choice_history":  list(self.choice_history),
             "has_completed":   bool(self.has_completed),
             "score":           self._current_score(),
             "grade_report":    self._build_grade_report(),
+            "state_version":   self.state_version,
+            "content_version": compiled.content_hash,
+        }
+
+    def _learner_nodes(
+        self, compiled: CompiledScenario, frontier_depth: Optional[int], client_traversal: bool = False
+    ) -> Any:
+        """
+        Return the nodes the learner UI holds: the whole map, or the frontier in frontier mode.
+
+        The frontier is the start node, for the first render and reset, plus
+        the current node and the nodes up to `frontier_depth` choices beyond
+        it. The learner UI fetches nodes further ahead with `get_nodes`.
+        """
+        if frontier_depth is None:
+            return compiled.safe_learner_nodes if client_traversal else compiled.learner_nodes
+        return {
+            **compiled.frontier([compiled.start_node_id], 0),
+            **compiled.frontier([self.current_node_id or compiled.start_node_id], frontier_depth),
+        }
+
+    @timed("state")
+    def _get_state_delta(self) -> dict[str, Any]:
+        """
+        Build the learner state fields an action can change.
+
+        Content, settings and the node map are left out: the client already
+        holds them for `content_version`. The grade report is only rendered
+        at end nodes, so it is only sent there.
+        """
+        compiled = self._compiled_scenario()
+        delta = {
+            "delta":           True,
+            "current_node":    compiled.get_safe_node(self.current_node_id) if self.current_node_id else None,
+            "current_node_metrics": compiled.get_path_metrics(self.current_node_id),
+            "next_image_urls": compiled.get_next_image_urls(self.current_node_id or compiled.start_node_id),
+            "history":         list(self.history),
+            "score_history":   list(self.score_history),
+            "choice_history":  list(self.choice_history),
+            "has_completed":   bool(self.has_completed),
+            "score":           self._current_score(),
+            "state_version":   self.state_version,
         }
+        if compiled.is_end_node(self.current_node_id):
+            delta["grade_report"] = self._build_grade_report()
+        return delta
+
+    def _state_response(self, data: dict[str, Any], previous_state_version: Optional[int]) -> dict[str, Any]:
+        """
+        Build the learner state for an action response.
+
+        Clients opt into a delta by sending ``response_mode: "delta"`` with the
+        `state_version` and `content_version` they hold. A delta is only safe
+        when both match what the action started from,
+        `previous_state_version`; anything else (a stale tab, a re-imported
+        scenario, an old client) gets the full state.
+        """
+        if (
+            data.get("response_mode") == "delta"
+            and previous_state_version is not None
+            and data.get("state_version") == previous_state_version
+            and data.get("content_version") == self._compiled_scenario().content_hash
+        ):
+            return self._get_state_delta()
+        return self._get_state()
+
+    def _action_response(self, data: dict[str, Any]) -> dict[str, Any]:
+        """
+        Record a learner state change and build the action handler response.
+
+        A ``request_token`` sent with the action is remembered, so a repeat of
+        the same request is answered by `_replayed_response`.
+        """
+        previous_state_version = self.state_version
+        self.state_version = previous_state_version + 1
+        token = _request_token(data)
+        if token is not None:
+            self.last_request_token = token
+            self.last_request_state_version = self.state_version
+        return {"success": True, **self._state_response(data, previous_state_version)}
+
+    def _replayed_response(self, data: dict[str, Any]) -> Optional[dict[str, Any]]:
+        """
+        Return the response for an action request that must not be applied, or None.
+
+        Two kinds of request are answered with the current state, flagged
+        ``replayed``, without writing learner state or publishing grades or
+        completion again:
+
+        * a retry, carrying the ``request_token`` of the last applied action;
+          while nothing happened since, the response is the one that action
+          returned;
+        * a stale request, such as the second of a double click, whose
+          ``expected_state_version`` is not the current `state_version`.
+        """
+        token = _request_token(data)
+        if token is not None and token == self.last_request_token:
+            unchanged_since = self.state_version == self.last_request_state_version
+            previous_state_version = self.state_version - 1 if unchanged_since else None
+        elif "expected_state_version" in data and data["expected_state_version"] != self.state_version:
+            previous_state_version = None
+        else:
+            return None
+        return {"success": True, "replayed": True, **self._state_response(data, previous_state_version)}
 
-    @XBlock.json_handler
+    @_json_handler
     def get_current_state(self, data: dict[str, Any], suffix: str = '') -> dict[str, Any]:
         """
         Fetch current state of the XBlock.
         """
         return self._get_state()
 
-    @XBlock.json_handler
+    @_json_handler
     def select_choice(self, data: dict[str, Any], suffix: str = '') -> dict[str, Any]:
         """
         Handle choice selection.
         """
+        replayed = self._replayed_response(data)
+        if replayed is not None:
+            return replayed
         self.start_node()
         current_node = self.get_current_node()
         choice_index = data.get("choice_index")
@@ -993,13 +1545,16 @@ class BranchingXBlock(XBlock):
                 self.publish_grade()
             self._publish_event("completion", {"completion": 1.0})
 
-        return {"success": True, **self._get_state()}
+        return self._action_response(data)
 
-    @XBlock.json_handler
+    @_json_handler
     def undo_choice(self, data: dict[str, Any], suffix: str = '') -> dict[str, Any]:
         """
         Handle undo choice.
         """
+        replayed = self._replayed_response(data)
+        if replayed is not None:
+            return replayed
         if not self.enable_undo or not self.history:
             return {"success": False, "error": "Undo not allowed"}
 
@@ -1011,16 +1566,19 @@ class BranchingXBlock(XBlock):
                 self.score_history.pop()
             if self.choice_history:
                 self.choice_history.pop()
-            self.publish_grade()
+            self._publish_after_action()
 
         self.has_completed = False
-        return {"success": True, **self._get_state()}
+        return self._action_response(data)
 
-    @XBlock.json_handler
+    @_json_handler
     def reset_activity(self, data: dict[str, Any], suffix: str = '') -> dict[str, Any]:
         """
         Reset learner state to the start node.
         """
+        replayed = self._replayed_response(data)
+        if replayed is not None:
+            return replayed
         if not self.enable_reset_activity:
             return {"success": False, "error": "Reset not allowed"}
 
@@ -1030,12 +1588,136 @@ class BranchingXBlock(XBlock):
 
         self.score_history = []
         self.choice_history = []
-        if self.enable_scoring:
-            self.publish_grade()
 
         self.start_node()
-        self._publish_event("completion", {"completion": 0.0})
-        return {"success": True, **self._get_state()}
+        self._publish_after_action(completion=0.0)
+        return self._action_response(data)
+
+    @_json_handler
+    def submit_path(self, data: dict[str, Any], suffix: str = '') -> dict[str, Any]:
+        """
+        Record a whole path of choices made in the learner UI in one request.
+
+        ``choice_indices`` lists the index of the choice taken at each node,
+        starting from the start node. The path is replayed against the saved
+        scenario under the same rules as `select_choice`, the learner fields
+        are written once and grade and completion are published once for the
+        resulting state. Without undo or reset, a learner's recorded progress
+        can only be continued, not rewritten.
+        """
+        replayed = self._replayed_response(data)
+        if replayed is not None:
+            return replayed
+
+        choice_indices = data.get("choice_indices")
+        if not isinstance(choice_indices, list):
+            return {"success": False, "error": "Invalid path"}
+        compiled = self._compiled_scenario()
+        if compiled.start_node_id is None:
+            return {"success": False, "error": "Invalid path"}
+        if len(choice_indices) > len(compiled.nodes):
+            return {"success": False, "error": "Path is longer than the scenario"}
+
+        node_id = compiled.start_node_id
+        visited = [node_id]
+        history = []
+        score_history = []
+        choice_history = []
+        for step, choice_index in enumerate(choice_indices, start=1):
+            node = compiled.get_node(node_id)
+            if node is None:
+                return {"success": False, "error": "Invalid choice"}
+            choices = node.get("choices") or []
+            if isinstance(choice_index, bool) or not isinstance(choice_index, int) \
+                    or not 0 <= choice_index < len(choices):
+                return {"success": False, "error": f"Invalid choice index at step {step}"}
+            choice = choices[choice_index]
+            target_node_id = choice.get("target_node_id")
+            if not compiled.get_node(target_node_id):
+                return {"success": False, "error": f"Target node {target_node_id} not found"}
+            if self.enable_scoring:
+                awarded_points = self._clean_choice_score(choice.get("score", 0))
+                if awarded_points is None:
+                    return {"success": False, "error": f"Invalid choice score at step {step}"}
+                score_history.append(awarded_points)
+                choice_history.append({
+                    "source_node_id": node_id,
+                    "choice_text": (choice.get("text") or "").strip(),
+                    "awarded_points": awarded_points,
+                })
+            if self.enable_undo:
+                history.append(node_id)
+            node_id = target_node_id
+            visited.append(node_id)
+
+        if not (self.enable_undo or self.enable_reset_activity) and not self._continues_progress(
+            visited, choice_history,
+        ):
+            return {"success": False, "error": "Path does not continue the recorded progress"}
+
+        was_completed = self.has_completed
+        self.current_node_id = node_id
+        self.history = history
+        self.score_history = score_history
+        self.choice_history = choice_history
+        self.has_completed = compiled.is_end_node(node_id)
+        if self.has_completed:
+            if self.enable_scoring:
+                self.publish_grade()
+            self._publish_event("completion", {"completion": 1.0})
+        elif was_completed:
+            self._publish_after_action(completion=0.0)
+        return self._action_response(data)
+
+    def _continues_progress(self, visited: list[str], choice_history: list[dict[str, Any]]) -> bool:
+        """
+        Return whether a replayed path passes through the learner's recorded position.
+
+        With scoring on, the recorded choices must also be the path's first choices.
+        """
+        current_node_id = self.current_node_id if self.get_node(self.current_node_id) else None
+        if current_node_id is not None and current_node_id not in visited:
+            return False
+        recorded = list(self.choice_history)
+        return choice_history[:len(recorded)] == recorded
+
+    @_json_handler
+    def get_nodes(self, data: dict[str, Any], suffix: str = '') -> dict[str, Any]:
+        """
+        Return learner nodes the learner UI fetches ahead of the learner in frontier mode.
+
+        ``node_ids`` lists the nodes wanted and ``depth`` adds the nodes up to
+        that many choices beyond them. Unknown IDs are skipped. Learner state
+        is neither read nor written.
+        """
+        compiled = self._compiled_scenario()
+        node_ids = data.get("node_ids")
+        if not isinstance(node_ids, list) or len(node_ids) > len(compiled.nodes) \
+                or not all(isinstance(node_id, str) for node_id in node_ids):
+            return {"success": False, "error": "Invalid node IDs"}
+        depth = data.get("depth", 0)
+        if isinstance(depth, bool) or not isinstance(depth, int) or not 0 <= depth <= MAX_FRONTIER_DEPTH:
+            return {"success": False, "error": f"Depth must be between 0 and {MAX_FRONTIER_DEPTH}"}
+        return {
+            "success": True,
+            "nodes": compiled.frontier(node_ids, depth),
+            "content_version": compiled.content_hash,
+        }
+
+    @_json_handler
+    def publish_progress(self, data: dict[str, Any], suffix: str = '') -> dict[str, Any]:
+        """
+        Publish the grade and completion that deferred publishing held back.
+
+        The learner UI calls this when the learner leaves the unit. Nothing
+        is published for a learner who never had a grade or completion
+        published, and unchanged values are not sent again.
+        """
+        if self.enable_scoring and (self.has_completed or "grade" in self.published_events):
+            self.publish_grade()
+        if self.has_completed or "completion" in self.published_events:
+            self._publish_event("completion", {"completion": 1.0 if self.has_completed else 0.0})
+        return {"success": True}
 
     def _build_staged_nodes(
         self,
@@ -1046,12 +1728,17 @@ class BranchingXBlock(XBlock):
         """
         id_map = {}
         staged = []
+        used_ids = {
+            raw['id'].strip()
+            for raw in raw_nodes
+            if isinstance(raw, dict) and isinstance(raw.get('id'), str)
+        }
         for raw in raw_nodes:
             if not isinstance(raw, dict):
                 continue
             raw_old_id = raw.get('id')
             old_id = raw_old_id.strip() if isinstance(raw_old_id, str) else ''
-            new_id = f"node-{uuid.uuid4().hex[:6]}" if old_id.startswith('temp-') or not old_id else old_id
+            new_id = self._new_node_id(used_ids) if old_id.startswith('temp-') or not old_id else old_id
             if old_id:
                 id_map[old_id] = new_id
             node = _default_node(
@@ -1075,6 +1762,20 @@ class BranchingXBlock(XBlock):
             staged.append(node)
         return id_map, staged
 
+    @staticmethod
+    def _new_node_id(used_ids: set[str]) -> str:
+        """
+        Return a fresh node ID not in `used_ids` and add it there.
+
+        Six hex digits collide often enough at a few thousand nodes that
+        uniqueness has to be checked rather than assumed.
+        """
+        while True:
+            new_id = f"node-{uuid.uuid4().hex[:6]}"
+            if new_id not in used_ids:
+                used_ids.add(new_id)
+                return new_id
+
     @staticmethod
     def _empty_validation_errors():
         """Return a fresh structured validation errors dict."""
@@ -1314,7 +2015,7 @@ class BranchingXBlock(XBlock):
             final.append(final_node)
         return final
 
-    @XBlock.json_handler
+    @_json_handler
     def studio_submit(self, data: dict[str, Any], suffix: str = '') -> dict[str, Any]:
         """
         Handle studio editor save.
@@ -1332,6 +2033,9 @@ class BranchingXBlock(XBlock):
         self.scenario_data = {
             'nodes': nodes_dict,
             'start_node_id': start_node_id,
+            'sanitizer_version': SANITIZER_POLICY_VERSION,
+            'content_hash': scenario_content_hash(nodes_dict, start_node_id),
+            'path_metrics': compute_path_metrics(nodes_dict),
         }
         self._migrated_nodes_ref = nodes_dict
         self.enable_undo = bool(payload.get('enable_undo', self.enable_undo))
@@ -1347,13 +2051,109 @@ class BranchingXBlock(XBlock):
         self.background_image_is_decorative = validation_result["background_image_is_decorative"]
         self.grade_ranges = validation_result["grade_ranges"]
 
-        return {"result": "success"}
+        return {"result": "success", "path_metrics": self.scenario_data["path_metrics"]}
+
+    def _user_is_staff(self) -> bool:
+        """
+        Return whether the current user authors or teaches this block.
+
+        Studio only serves handlers to course authors; in the LMS the user
+        service tells staff apart from learners.
+        """
+        if getattr(settings, "SERVICE_VARIANT", None) == "cms":
+            return True
+        user_service = self.runtime.service(self, "user")
+        if user_service is None:
+            return False
+        user = user_service.get_current_user()
+        return bool(getattr(user, "opt_attrs", {}).get("edx-platform.user_is_staff"))
+
+    def _require_staff(self) -> None:
+        """
+        Reject the request unless it comes from Studio or course staff.
 
-    @XBlock.json_handler
+        Guards the authoring analyses, which cost far more CPU than learner handlers.
+        """
+        if not self._user_is_staff():
+            raise JsonHandlerError(403, "Only course staff can run scenario analyses.")
+
+    @_json_handler
+    def score_distribution(self, data, suffix=''):
+        """
+        Return the distribution of total scores over every path through the saved scenario.
+
+        Path counts can exceed what JavaScript numbers hold exactly, so they
+        are sent as strings alongside each total's share of all paths.
+        """
+        self._require_staff()
+        compiled = self._compiled_scenario()
+        distribution = compute_score_distribution(compiled.nodes, compiled.start_node_id)
+        if distribution is None:
+            return {"success": False, "error": "Score distribution is unavailable: NumPy is not installed."}
+
+        total_paths = distribution["total_paths"]
+        path_counts = distribution["path_counts"]
+        return {
+            "success": True,
+            "total_paths": str(total_paths),
+            "min_score": distribution["min_score"],
+            "max_score": distribution["max_score"],
+            "expected_score": distribution["expected_score"],
+            "totals": list(path_counts),
+            "path_counts": [str(count) for count in path_counts.values()],
+            "path_shares": [count / total_paths for count in path_counts.values()],
+        }
+
+    @_json_handler
+    def simulate_learners(self, data, suffix=''):
+        """
+        Preview outcomes by sending virtual learners through the saved scenario.
+
+        Accepts ``learners``, ``policy``, ``seed``, ``choice_weights``,
+        ``undo_rate`` and ``reset_rate`` (see `simulation.simulate_learners`);
+        the scenario's own undo, reset and scoring settings apply.
+        """
+        self._require_staff()
+        learners = data.get("learners", SIMULATION_DEFAULT_LEARNERS)
+        if isinstance(learners, int) and learners > SIMULATION_MAX_LEARNERS:
+            return {"success": False, "error": f"At most {SIMULATION_MAX_LEARNERS} learners can be simulated."}
+
+        compiled = self._compiled_scenario()
+        max_learners = SIMULATION_MAX_LEARNER_NODES // max(len(compiled.node_ids), 1)
+        if isinstance(learners, int) and learners > max_learners:
+            return {
+                "success": False,
+                "error": f"At most {max_learners} learners can be simulated on a scenario of this size.",
+            }
+        try:
+            result = simulation.simulate_learners(
+                compiled.nodes,
+                compiled.start_node_id,
+                learners,
+                data.get("policy", "uniform"),
+                seed=data.get("seed", 0),
+                choice_weights=data.get("choice_weights"),
+                enable_scoring=bool(self.enable_scoring),
+                enable_undo=bool(self.enable_undo),
+                enable_reset_activity=bool(self.enable_reset_activity),
+                undo_rate=data.get("undo_rate", 0.0),
+                reset_rate=data.get("reset_rate", 0.0),
+                max_score=int(self.max_score or 0),
+                grade_ranges=self.grade_ranges,
+                score_of=lambda choice: self._clean_choice_score(choice.get("score", 0)),
+            )
+        except (TypeError, ValueError) as exc:
+            return {"success": False, "error": str(exc)}
+        if result is None:
+            return {"success": False, "error": "Simulation is unavailable: NumPy is not installed."}
+        return {"success": True, **result}
+
+    @_json_handler
     def export_nodes(self, data, suffix=''):
         """Return current scenario nodes as a JSON-serializable list for download."""
-        nodes = self.scenario_data.get("nodes", {})
-        start_node_id = self.scenario_data.get("start_node_id")
+        scenario_data = self._scenario_data_read_only()
+        nodes = scenario_data.get("nodes", {})
+        start_node_id = scenario_data.get("start_node_id")
 
         if not nodes:
             return {"success": False, "error": "No nodes to export."}
@@ -1362,15 +2162,13 @@ class BranchingXBlock(XBlock):
         ordered = []
         if start_node_id and start_node_id in nodes:
             ordered.append(start_node_id)
-        for node_id in nodes:
-            if node_id not in ordered:
-                ordered.append(node_id)
+        ordered.extend(node_id for node_id in nodes if node_id != start_node_id)
 
         nodes_list = [dict(nodes[node_id]) for node_id in ordered]
 
         return {"success": True, "nodes": nodes_list}
 
-    @XBlock.json_handler
+    @_json_handler
     def import_nodes(self, data, suffix=''):
         """
         Import nodes from uploaded JSON, replacing the current scenario.
@@ -1385,12 +2183,16 @@ class BranchingXBlock(XBlock):
         self.scenario_data = {
             "nodes": nodes_dict,
             "start_node_id": start_node_id,
+            "sanitizer_version": SANITIZER_POLICY_VERSION,
+            "content_hash": scenario_content_hash(nodes_dict, start_node_id),
+            "path_metrics": compute_path_metrics(nodes_dict),
         }
         self._migrated_nodes_ref = nodes_dict
         self.max_score = self._compute_max_attainable_score(nodes_dict, start_node_id)
 
         return {"success": True}
 
+    @timed("validation")
     def _validate_import(self, parsed):
         """
         Validate parsed import JSON and return built nodes dict or error.
@@ -1402,8 +2204,9 @@ class BranchingXBlock(XBlock):
         if not isinstance(raw_nodes, list) or not raw_nodes:
             return {"success": False, "error": "File must contain a \"nodes\" array with at least one node."}
 
-        if len(raw_nodes) > MAX_NODES:
-            return {"success": False, "error": f"File exceeds maximum of {MAX_NODES} nodes. Please try again."}
+        max_nodes = get_max_nodes()
+        if len(raw_nodes) > max_nodes:
+            return {"success": False, "error": f"File exceeds maximum of {max_nodes} nodes. Please try again."}
 
         # --- Validate IDs, collect targets, and pre-process for _build_staged_nodes ---
         seen_ids = {}
@@ -1458,11 +2261,19 @@ class BranchingXBlock(XBlock):
 
         start_node_id = next(iter(nodes_dict)) if nodes_dict else None
 
-        cycle_ids = self._find_cycle_node_ids(nodes_dict)
-        if cycle_ids:
+        _, cycles = find_cycles(nodes_dict)
+        if cycles:
+            original_id_by_node_id = {
+                node_id: temp_id.removeprefix("temp-")
+                for temp_id, node_id in id_map.items()
+            }
+            path = " → ".join(original_id_by_node_id.get(node_id, node_id) for node_id in cycles[0] + cycles[0][:1])
             return {
                 "success": False,
-                "error": "Import contains circular paths between nodes. Please remove loops and try again.",
+                "error": (
+                    f"Import contains circular paths between nodes ({path}). "
+                    "Please remove loops and try again."
+                ),
             }
 
         return {
@@ -1487,10 +2298,15 @@ class BranchingXBlock(XBlock):
 
     # TO-DO: change this to create the scenarios you'd like to see in the
     # workbench while developing your XBlock.
-    def workbench_scenarios(self) -> list[tuple[str, str]]:
+    @staticmethod
+    def workbench_scenarios() -> list[tuple[str, str]]:
         """
         Create canned scenario for display in the workbench.
         """
+        # Imported here: the generator builds on this module's node template.
+        from .generator import generate_nodes, scenario_data  # pylint: disable=import-outside-toplevel,cyclic-import
+
+        generated = json.dumps(scenario_data(generate_nodes(12, branching_factor=3, content_size=300, seed=1)))
         return [
             ("BranchingXBlock",
              """<branching_xblock/>
@@ -1502,4 +2318,8 @@ class BranchingXBlock(XBlock):
                 <branching_xblock/>
                 </vertical_demo>
              """),
+            ("BranchingXBlock with a generated scenario",
+             f"""<branching_xblock display_name="Generated scenario" enable_scoring="true" enable_undo="true"
+                enable_reset_activity="true" scenario_data={quoteattr(generated)}/>
+             """),
         ]
@@ -3,13 +3,21 @@ Compatibility helpers for optional Open edX imports and sanitization.
 """
 from __future__ import annotations
 
+import functools
+import hashlib
+import threading
+from collections import OrderedDict
 from html import escape
-from typing import Any
+from typing import Any, Callable
 
+import nh3
 from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+from .instrumentation import timed
 
 try:
-    import bleach  # pylint: disable=import-error
+    import bleach
 except Exception:  # pylint: disable=broad-exception-caught
     bleach = None
 
@@ -37,6 +45,25 @@ DEFAULT_ALLOWED_ATTRIBUTES = {
     "a": ["href", "title", "target", "rel"],
 }
 
+# URL schemes allowed in attributes such as ``href``; matches bleach's defaults.
+DEFAULT_ALLOWED_PROTOCOLS = ["http", "https", "mailto"]
+
+# Stamped on saved scenarios whose content and hints were sanitized with the
+# policy above. Bump it whenever the policy or sanitizer changes so stored
+# scenarios get sanitized again.
+SANITIZER_POLICY_VERSION = 2
+
+# Engine used by `sanitize_html`, overridable through the
+# BRANCHING_XBLOCK_SANITIZER_ENGINE Django setting.
+DEFAULT_SANITIZER_ENGINE = "nh3"
+
+# Defaults for the sanitizer memo, overridable through the
+# BRANCHING_XBLOCK_SANITIZER_CACHE_SIZE and
+# BRANCHING_XBLOCK_SANITIZER_CACHE_MAX_BYTES Django settings. The memo is
+# shared by every site the process serves, so its bounds are process-wide.
+SANITIZER_CACHE_SIZE = 2048
+SANITIZER_CACHE_MAX_BYTES = 16 * 1024 * 1024
+
 
 def _get_current_site_configuration_value(key: str, default: Any = None) -> Any:  # pragma: no cover
     """
@@ -76,6 +103,22 @@ def _get_site_configuration_value(domain: str, key: str, default: Any = None) ->
         return default
 
 
+@functools.lru_cache(maxsize=None)
+def has_site_configuration() -> bool:
+    """
+    Return whether the Open edX site configuration app is available.
+
+    Memoized: outside the platform every lookup would otherwise pay for a
+    failed import.
+    """
+    try:
+        # pylint: disable=import-outside-toplevel,unused-import
+        from openedx.core.djangoapps.site_configuration import helpers  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
 def get_site_configuration_value(block_settings_key: str, config_key: str) -> str | None:
     """
     Retrieve a value from site configuration for LMS/Studio contexts.
@@ -96,6 +139,191 @@ def get_site_configuration_value(block_settings_key: str, config_key: str) -> st
     return block_config.get(config_key)
 
 
+class SanitizerCache:
+    """
+    Bounded LRU of sanitizer output keyed by policy and a digest of the input.
+
+    Only the digest of the input is kept, so memory is bounded by the
+    sanitized values: at most `maxsize` entries and `max_bytes` characters.
+    Setting `maxsize` to 0 disables the cache.
+    """
+
+    def __init__(self, maxsize: int = SANITIZER_CACHE_SIZE, max_bytes: int = SANITIZER_CACHE_MAX_BYTES):
+        """
+        Create an empty cache with the given bounds.
+        """
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._bytes = 0
+        self._entries: OrderedDict[tuple[Any, bytes], str] = OrderedDict()
+        self._lock = threading.Lock()
+        self._configured = False
+
+    def get_or_compute(self, policy_key: Any, value: str, compute: Callable[[str], str]) -> str:
+        """
+        Return `compute(value)`, served from the cache when `value` was seen under `policy_key`.
+        """
+        self._refresh_config()
+        if self.maxsize <= 0:
+            return compute(value)
+
+        key = (policy_key, hashlib.blake2b(value.encode("utf-8"), digest_size=16).digest())
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return cached
+            self.misses += 1
+
+        result = compute(value)
+        if len(result) > self.max_bytes:
+            return result
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(previous)
+            self._entries[key] = result
+            self._bytes += len(result)
+            self._evict()
+        return result
+
+    def configure(self, maxsize: int | None = None, max_bytes: int | None = None) -> None:
+        """
+        Change the cache bounds, evicting entries that no longer fit.
+        """
+        with self._lock:
+            if maxsize is not None:
+                self.maxsize = maxsize
+            if max_bytes is not None:
+                self.max_bytes = max_bytes
+            self._evict()
+
+    def clear(self) -> None:
+        """
+        Drop every entry and reset the counters.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> dict[str, int]:
+        """
+        Return hit/miss/eviction counters and the current size.
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+                "bytes": self._bytes,
+                "maxsize": self.maxsize,
+                "max_bytes": self.max_bytes,
+            }
+
+    def _evict(self) -> None:
+        """
+        Drop least recently used entries until the cache is within bounds; call with the lock held.
+        """
+        while self._entries and (len(self._entries) > max(self.maxsize, 0) or self._bytes > self.max_bytes):
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= len(evicted)
+            self.evictions += 1
+
+    def _refresh_config(self) -> None:
+        """
+        Read the cache bounds from Django settings on first use.
+        """
+        if self._configured:
+            return
+        self._configured = True
+        maxsize = getattr(settings, "BRANCHING_XBLOCK_SANITIZER_CACHE_SIZE", None)
+        max_bytes = getattr(settings, "BRANCHING_XBLOCK_SANITIZER_CACHE_MAX_BYTES", None)
+        self.configure(
+            maxsize=int(maxsize) if maxsize is not None else SANITIZER_CACHE_SIZE,
+            max_bytes=int(max_bytes) if max_bytes is not None else SANITIZER_CACHE_MAX_BYTES,
+        )
+
+
+sanitizer_cache = SanitizerCache()
+
+
+def _policy_key(engine: str, allowed_tags, allowed_attributes) -> tuple:
+    """
+    Return a hashable key identifying a sanitizer engine and allow-list.
+    """
+    return (
+        engine,
+        tuple(allowed_tags),
+        tuple(sorted((tag, tuple(attributes)) for tag, attributes in allowed_attributes.items())),
+    )
+
+
+@functools.lru_cache(maxsize=16)
+def _nh3_cleaner(policy_key: tuple):
+    """
+    Return a reusable `nh3.Cleaner` for the allow-list in `policy_key`.
+    """
+    _, allowed_tags, allowed_attributes = policy_key
+    return nh3.Cleaner(
+        tags=set(allowed_tags),
+        # An explicit empty "*" entry drops nh3's default generic attributes.
+        attributes={**{tag: set(attributes) for tag, attributes in allowed_attributes}, "*": set()},
+        # Keep the author's rel attribute as bleach does.
+        link_rel=None,
+        url_schemes=set(DEFAULT_ALLOWED_PROTOCOLS),
+    )
+
+
+def _nh3_clean(value: str, allowed_tags, allowed_attributes) -> str:
+    """
+    Sanitize with nh3.
+
+    Unlike bleach, nh3 drops the contents of ``<script>`` and ``<style>``
+    elements rather than keeping them as text.
+    """
+    policy_key = _policy_key("nh3", allowed_tags, allowed_attributes)
+    return _nh3_cleaner(policy_key).clean(value)
+
+
+def _bleach_clean(value: str, allowed_tags, allowed_attributes) -> str | None:
+    """
+    Sanitize with bleach, stripping disallowed tags.
+    """
+    if bleach is None:
+        return None
+    return bleach.clean(value, tags=allowed_tags, attributes=allowed_attributes, strip=True)
+
+
+# Sanitizer engines by name. Each takes the HTML and the allow-lists and
+# returns the sanitized HTML, or None when its library is not installed
+# (bleach ships with the Open edX platform but is not a dependency here).
+SANITIZER_ENGINES: dict[str, Callable[[str, Any, Any], str | None]] = {
+    "nh3": _nh3_clean,
+    "bleach": _bleach_clean,
+}
+
+
+def get_sanitizer_engine() -> str:
+    """
+    Return the name of the configured sanitizer engine.
+    """
+    engine = getattr(settings, "BRANCHING_XBLOCK_SANITIZER_ENGINE", None) or DEFAULT_SANITIZER_ENGINE
+    if engine not in SANITIZER_ENGINES:
+        raise ImproperlyConfigured(
+            f"Unknown BRANCHING_XBLOCK_SANITIZER_ENGINE {engine!r}; "
+            f"expected one of {', '.join(sorted(SANITIZER_ENGINES))}."
+        )
+    return engine
+
+
+@timed("sanitization")
 def sanitize_html(
     value: str,
     allowed_tags=None,
@@ -103,17 +331,26 @@ def sanitize_html(
 ):
     """
     Sanitize HTML to a safe subset to avoid script injection.
+
+    Uses the engine named by `get_sanitizer_engine`. Results are memoized
+    in `sanitizer_cache`, so sanitizing the same HTML again costs a digest
+    and a dictionary lookup.
     """
     if not value:
         return ""
 
-    if bleach:
-        return bleach.clean(
-            value,
-            tags=allowed_tags or DEFAULT_ALLOWED_TAGS,
-            attributes=allowed_attributes or DEFAULT_ALLOWED_ATTRIBUTES,
-            strip=True,
-        )
+    allowed_tags = allowed_tags or DEFAULT_ALLOWED_TAGS
+    allowed_attributes = allowed_attributes or DEFAULT_ALLOWED_ATTRIBUTES
+    engine = get_sanitizer_engine()
+    clean = SANITIZER_ENGINES[engine]
+
+    def compute(html: str) -> str:
+        cleaned = clean(html, allowed_tags, allowed_attributes)
+        # Minimal fallback: escape everything if the engine is unavailable.
+        return escape(html) if cleaned is None else cleaned
 
-    # Minimal fallback: escape everything if bleach is unavailable.
-    return escape(value)
+    return sanitizer_cache.get_or_compute(
+        _policy_key(engine, allowed_tags, allowed_attributes),
+        value,
+        compute,
+    )
@@ -0,0 +1,141 @@
+"""
+Exact distribution of total scores over every path through a scenario.
+
+A path runs from the start node to an end node (a node with no choices),
+and its total is the sum of the scores of the choices taken. Paths are
+never enumerated: each node holds a histogram of the totals still to be
+earned from it, and a node's histogram is the sum of its children's
+histograms, each shifted by the score of the choice leading there. That
+shift is a convolution with a one-hot kernel at the choice's score, done
+as a slice addition on NumPy arrays.
+
+NumPy ships with the Open edX platform but is not a dependency of this
+package; without it `compute_score_distribution` returns None.
+"""
+from __future__ import annotations
+
+from collections import deque
+from typing import Any, Optional
+
+from .graph import choice_score, strongly_connected_components, successor_ids
+from .instrumentation import timed
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+# Path counts past this do not fit NumPy's int64; counting switches to
+# Python integers stored in object arrays, which are slower but exact.
+INT64_PATH_LIMIT = 2 ** 63 - 1
+
+
+def _reachable_nodes(nodes: dict[str, dict[str, Any]], start_node_id: str) -> dict[str, dict[str, Any]]:
+    """
+    Return the part of `nodes` reachable from `start_node_id`, in `nodes` order.
+    """
+    reachable = {start_node_id}
+    pending = deque([start_node_id])
+    while pending:
+        for target_node_id in successor_ids(nodes, pending.popleft()):
+            if target_node_id not in reachable:
+                reachable.add(target_node_id)
+                pending.append(target_node_id)
+    return {node_id: node for node_id, node in nodes.items() if node_id in reachable}
+
+
+def _exits(nodes: dict[str, dict[str, Any]], node_id: str, done: dict[str, Any]) -> list[tuple[int, str]]:
+    """
+    Return ``(score, target_node_id)`` for each choice leading to a node that can reach an end.
+    """
+    return [
+        (choice_score(choice), choice["target_node_id"])
+        for choice in nodes[node_id].get("choices") or []
+        if isinstance(choice, dict) and choice.get("target_node_id") in done
+    ]
+
+
+@timed("graph")
+def compute_score_distribution(
+    nodes: dict[str, dict[str, Any]],
+    start_node_id: Optional[str],
+) -> Optional[dict[str, Any]]:
+    """
+    Return the distribution of total scores over all start-to-end paths.
+
+    The result holds ``total_paths``, ``min_score``, ``max_score``, a
+    ``path_counts`` map from each reachable total to the number of paths
+    earning it, and ``expected_score``, the mean total for a learner who
+    picks uniformly among the choices that lead to an end. Counts are
+    exact Python integers. Returns None when NumPy is unavailable.
+
+    Nodes are processed in reverse topological order and each histogram is
+    dropped once every parent has used it. Saved scenarios are acyclic;
+    for malformed ones, links inside a loop are ignored.
+    """
+    if np is None:
+        return None
+    empty = {"total_paths": 0, "min_score": None, "max_score": None, "expected_score": None, "path_counts": {}}
+    if not start_node_id or start_node_id not in nodes:
+        return empty
+
+    reachable = _reachable_nodes(nodes, start_node_id)
+    order = [node_id for component in strongly_connected_components(reachable) for node_id in component]
+
+    # Count paths with Python integers first to pick an array type that cannot overflow.
+    path_totals: dict[str, int] = {}
+    for node_id in order:
+        if not reachable[node_id].get("choices"):
+            path_totals[node_id] = 1
+            continue
+        exits = _exits(reachable, node_id, path_totals)
+        if exits:
+            path_totals[node_id] = sum(path_totals[target_node_id] for _, target_node_id in exits)
+    if start_node_id not in path_totals:
+        return empty
+    dtype = np.int64 if max(path_totals.values()) <= INT64_PATH_LIMIT else object
+
+    remaining_parents = dict.fromkeys(reachable, 0)
+    for node_id in reachable:
+        for target_node_id in successor_ids(reachable, node_id):
+            remaining_parents[target_node_id] += 1
+
+    # histograms[node_id] is (lowest total, counts per total from there up).
+    histograms: dict[str, tuple[int, Any]] = {}
+    expected: dict[str, float] = {}
+    for node_id in order:
+        if node_id not in path_totals:
+            continue
+        if not reachable[node_id].get("choices"):
+            histograms[node_id] = (0, np.ones(1, dtype=dtype))
+            expected[node_id] = 0.0
+            continue
+
+        exits = _exits(reachable, node_id, histograms)
+        low = min(score + histograms[target_node_id][0] for score, target_node_id in exits)
+        high = max(
+            score + histograms[target_node_id][0] + len(histograms[target_node_id][1])
+            for score, target_node_id in exits
+        )
+        counts = np.zeros(high - low, dtype=dtype)
+        for score, target_node_id in exits:
+            offset, child_counts = histograms[target_node_id]
+            begin = score + offset - low
+            counts[begin:begin + len(child_counts)] += child_counts
+        histograms[node_id] = (low, counts)
+        expected[node_id] = sum(score + expected[target_node_id] for score, target_node_id in exits) / len(exits)
+
+        for target_node_id in successor_ids(reachable, node_id):
+            remaining_parents[target_node_id] -= 1
+            if remaining_parents[target_node_id] == 0 and target_node_id != start_node_id:
+                histograms.pop(target_node_id, None)
+
+    low, counts = histograms[start_node_id]
+    totals = np.flatnonzero(counts)
+    return {
+        "total_paths": path_totals[start_node_id],
+        "min_score": int(totals[0]) + low,
+        "max_score": int(totals[-1]) + low,
+        "expected_score": expected[start_node_id],
+        "path_counts": {int(total) + low: int(counts[total]) for total in totals},
+    }
@@ -0,0 +1,312 @@
+"""
+Seeded synthetic scenarios for load, scale and benchmark runs.
+
+`generate_nodes` returns a ``nodes`` list in the format of
+`IMPORT_TEMPLATE_NODES`, so the result can be posted as is to `import_nodes`
+(``{"nodes": [...]}``) or `studio_submit`. The same arguments and seed always
+produce the same scenario. The first node is the start node, and every node
+can be reached from it.
+
+Run ``python -m branching_xblock.generator --help`` to write one to a file.
+"""
+import argparse
+import copy
+import json
+import random
+import sys
+from typing import Any, Callable, Optional
+
+from .branching_xblock import IMPORT_TEMPLATE_NODES
+
+SHAPES = ("layered", "chain", "fan_out", "diamond", "deep_tree")
+
+MEDIA_TYPES = ("none", "image", "single_image", "video", "audio")
+
+SCORE_DISTRIBUTIONS: dict[str, Callable[[random.Random], int]] = {
+    "none": lambda rng: 0,
+    "constant": lambda rng: 10,
+    "uniform": lambda rng: rng.randint(0, 100),
+    # Most choices are worth little and a few are worth a lot.
+    "skewed": lambda rng: round(100 * rng.random() ** 3),
+}
+
+DEFAULT_MEDIA_BASE_URL = "https://example.com/branching-media"
+
+WORDS = (
+    "learner", "decision", "patient", "client", "policy", "review", "evidence", "team", "risk",
+    "budget", "schedule", "feedback", "option", "outcome", "meeting", "report", "customer",
+    "process", "safety", "quality", "consider", "choose", "explain", "escalate", "document",
+    "the", "a", "with", "before", "after", "because", "while", "carefully", "quickly", "now",
+)
+
+
+def _sentence(rng: random.Random, word_count: int) -> str:
+    words = [rng.choice(WORDS) for _ in range(word_count)]
+    return " ".join(words).capitalize() + "."
+
+
+def _content(rng: random.Random, node_index: int, content_size: int) -> str:
+    """
+    Return allowed HTML of about `content_size` characters: paragraphs with some emphasis and a list.
+    """
+    parts = [f"<p>Step {node_index + 1}.</p>"]
+    length = len(parts[0])
+    while length < content_size:
+        roll = rng.random()
+        if roll < 0.15:
+            part = "<ul>" + "".join(f"<li>{_sentence(rng, 4)}</li>" for _ in range(3)) + "</ul>"
+        elif roll < 0.4:
+            part = f"<p>{_sentence(rng, 6)} <strong>{_sentence(rng, 3)}</strong> {_sentence(rng, 8)}</p>"
+        else:
+            part = f"<p>{_sentence(rng, 10)} <em>{_sentence(rng, 4)}</em></p>"
+        parts.append(part)
+        length += len(part)
+    return "".join(parts)
+
+
+def _media_fields(media_type: str, node_id: str, media_base_url: str, rng: random.Random) -> dict[str, Any]:
+    """
+    Return the node fields for a media type, filled in the way the Studio editor requires.
+    """
+    base = f"{media_base_url.rstrip('/')}/{node_id}"
+    if media_type == "image":
+        return {
+            "media": {"type": "image", "url": "", "alt": ""},
+            "left_image_url": f"{base}-left.png",
+            "right_image_url": f"{base}-right.png",
+            "left_image_alt_text": f"Left character for {node_id}",
+            "right_image_alt_text": f"Right character for {node_id}",
+            "overlay_text": rng.random() < 0.5,
+        }
+    if media_type == "single_image":
+        return {"media": {"type": "single_image", "url": f"{base}.png", "alt": f"Illustration for {node_id}"}}
+    if media_type == "video":
+        return {"media": {"type": "video", "url": f"{base}.mp4", "alt": ""}, "transcript_url": f"{base}.vtt"}
+    if media_type == "audio":
+        return {"media": {"type": "audio", "url": f"{base}.mp3", "alt": ""}, "transcript_url": f"{base}.vtt"}
+    return {}
+
+
+def _layered_edges(node_count: int, branching_factor: int, depth: Optional[int], rng: random.Random):
+    """
+    Spread nodes over `depth` levels below the start; each node links to `branching_factor` of the next level.
+
+    Level sizes grow by `branching_factor` per level, as in a tree. When the
+    scenario has more nodes than such a tree of that depth holds, levels are
+    wider and some nodes get more choices so that every node has a parent.
+    """
+    below = node_count - 1
+    if depth is None:
+        depth, capacity = 0, 0
+        while capacity < below:
+            depth += 1
+            capacity += branching_factor ** depth
+    depth = max(1, min(depth, below))
+    weights = [branching_factor ** level for level in range(1, depth + 1)]
+    extra = below - depth
+    sizes = [1 + extra * weight // sum(weights) for weight in weights]
+    sizes[-1] += below - sum(sizes)
+
+    levels = [[0]]
+    next_index = 1
+    for size in sizes:
+        levels.append(list(range(next_index, next_index + size)))
+        next_index += size
+
+    edges: dict[int, list[int]] = {}
+    for level, next_level in zip(levels, levels[1:]):
+        for index in level:
+            edges[index] = []
+        # Give every node of the next level a parent, then add random links up to the branching factor.
+        for position, target in enumerate(next_level):
+            edges[level[position * len(level) // len(next_level)]].append(target)
+        for index in level:
+            candidates = [target for target in next_level if target not in edges[index]]
+            missing = max(0, min(branching_factor, len(next_level)) - len(edges[index]))
+            edges[index].extend(rng.sample(candidates, min(missing, len(candidates))))
+    return edges
+
+
+def _shape_edges(shape: str, node_count: int, branching_factor: int, depth: Optional[int], rng: random.Random):
+    """
+    Return ``{source_index: [target_index, ...]}`` for a scenario shape.
+    """
+    edges: dict[int, list[int]] = {index: [] for index in range(node_count)}
+    if shape == "layered":
+        edges.update(_layered_edges(node_count, branching_factor, depth, rng))
+    elif shape == "chain":
+        for index in range(node_count - 1):
+            edges[index].append(index + 1)
+    elif shape == "fan_out":
+        edges[0].extend(range(1, node_count))
+    elif shape == "diamond":
+        # Levels of 2 * branching_factor nodes between a start and an end node; the path count
+        # grows exponentially with depth, which exposes any pass that enumerates paths.
+        width = 2 * branching_factor
+        inner = list(range(1, node_count - 1))
+        levels = [inner[start:start + width] for start in range(0, len(inner), width)]
+        if node_count > 1:
+            edges[0].extend(levels[0] if levels else [node_count - 1])
+        for level, next_level in zip(levels, levels[1:]):
+            for position, index in enumerate(level):
+                for offset in range(min(branching_factor, len(next_level))):
+                    edges[index].append(next_level[(position + offset) % len(next_level)])
+        for index in levels[-1] if levels else []:
+            edges[index].append(node_count - 1)
+    elif shape == "deep_tree":
+        # A spine where each node links to the next spine node and to a side branch of three
+        # nodes ending at its own end node: about node_count / 4 levels deep, with many leaves.
+        spine = 0
+        while spine < node_count - 1:
+            branch = list(range(spine + 1, min(spine + 4, node_count)))
+            previous = spine
+            for index in branch:
+                edges[previous].append(index)
+                previous = index
+            next_spine = spine + 1 + len(branch)
+            if next_spine < node_count:
+                edges[spine].append(next_spine)
+            spine = next_spine
+    else:
+        raise ValueError(f"Unknown shape {shape!r}; expected one of {', '.join(SHAPES)}.")
+    return edges
+
+
+def generate_nodes(
+    node_count: int,
+    *,
+    shape: str = "layered",
+    branching_factor: int = 2,
+    depth: Optional[int] = None,
+    content_size: int = 512,
+    media_mix: Optional[dict[str, float]] = None,
+    scores: str = "uniform",
+    seed: int = 0,
+    media_base_url: str = DEFAULT_MEDIA_BASE_URL,
+) -> list[dict[str, Any]]:
+    """
+    Return a seeded synthetic scenario as an import or Studio ``nodes`` list.
+
+    `shape` is one of `SHAPES`. ``layered`` spreads the nodes over `depth`
+    levels below the start node (default: enough for a tree with
+    `branching_factor` children per node) and links each node to
+    `branching_factor` nodes of the next level; ``diamond`` uses levels of
+    ``2 * branching_factor`` nodes between a start and a single end node.
+    `media_mix` maps `MEDIA_TYPES` to relative weights (default: text only),
+    `scores` names one of `SCORE_DISTRIBUTIONS` for choice scores, and node
+    content is allowed HTML of about `content_size` characters.
+
+    Raises ValueError for invalid arguments.
+    """
+    if isinstance(node_count, bool) or not isinstance(node_count, int) or node_count < 1:
+        raise ValueError("node_count must be a positive integer.")
+    if isinstance(branching_factor, bool) or not isinstance(branching_factor, int) or branching_factor < 1:
+        raise ValueError("branching_factor must be a positive integer.")
+    if scores not in SCORE_DISTRIBUTIONS:
+        raise ValueError(f"Unknown score distribution {scores!r}; expected one of {', '.join(SCORE_DISTRIBUTIONS)}.")
+    media_mix = media_mix or {"none": 1}
+    unknown_media = set(media_mix) - set(MEDIA_TYPES)
+    if unknown_media:
+        raise ValueError(f"Unknown media types: {', '.join(sorted(unknown_media))}.")
+    if any(weight < 0 for weight in media_mix.values()) or sum(media_mix.values()) <= 0:
+        raise ValueError("Media weights must be non-negative with a positive total.")
+
+    rng = random.Random(seed)
+    edges = _shape_edges(shape, node_count, branching_factor, depth, rng)
+    media_types = list(media_mix)
+    media_weights = [media_mix[media_type] for media_type in media_types]
+    node_ids = [f"node-{index}" for index in range(node_count)]
+    score_of = SCORE_DISTRIBUTIONS[scores]
+
+    nodes = []
+    for index, node_id in enumerate(node_ids):
+        node = copy.deepcopy(IMPORT_TEMPLATE_NODES[0])
+        node.update({
+            "id": node_id,
+            "content": _content(rng, index, content_size),
+            "choices": [
+                {
+                    "text": f"Option {position + 1}: {_sentence(rng, 3)}",
+                    "target_node_id": node_ids[target],
+                    "score": score_of(rng),
+                }
+                for position, target in enumerate(edges[index])
+            ],
+            "hint": f"<p>{_sentence(rng, 6)}</p>" if rng.random() < 0.25 else "",
+        })
+        media_type = rng.choices(media_types, weights=media_weights)[0]
+        node.update(_media_fields(media_type, node_id, media_base_url, rng))
+        nodes.append(node)
+    return nodes
+
+
+def scenario_data(nodes: list[dict[str, Any]]) -> dict[str, Any]:
+    """
+    Return generated `nodes` in the stored ``scenario_data`` form, keyed by node ID.
+    """
+    return {"nodes": {node["id"]: node for node in nodes}, "start_node_id": nodes[0]["id"] if nodes else None}
+
+
+def _media_mix_argument(value: str) -> dict[str, float]:
+    """
+    Parse ``type=weight,...`` into a media mix.
+    """
+    media_mix = {}
+    for item in value.split(","):
+        media_type, _, weight = item.partition("=")
+        try:
+            media_mix[media_type.strip()] = float(weight) if weight else 1.0
+        except ValueError as exc:
+            raise argparse.ArgumentTypeError(f"Invalid media weight in {item!r}.") from exc
+    return media_mix
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """
+    Write a generated scenario as import JSON.
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m branching_xblock.generator",
+        description="Generate a seeded synthetic branching scenario in the import JSON format.",
+    )
+    parser.add_argument("node_count", type=int, help="number of nodes")
+    parser.add_argument("--shape", choices=SHAPES, default="layered")
+    parser.add_argument("--branching-factor", type=int, default=2, help="choices per node (layered, diamond)")
+    parser.add_argument("--depth", type=int, default=None, help="levels below the start node (layered)")
+    parser.add_argument("--content-size", type=int, default=512, help="approximate HTML characters per node")
+    parser.add_argument(
+        "--media-mix", type=_media_mix_argument, default=None,
+        help=f"relative weights, e.g. none=3,image=1,video=1 (types: {', '.join(MEDIA_TYPES)})",
+    )
+    parser.add_argument("--scores", choices=sorted(SCORE_DISTRIBUTIONS), default="uniform")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--media-base-url", default=DEFAULT_MEDIA_BASE_URL)
+    parser.add_argument("--output", "-o", default="-", help="output file (default: standard output)")
+    args = parser.parse_args(argv)
+
+    try:
+        nodes = generate_nodes(
+            args.node_count,
+            shape=args.shape,
+            branching_factor=args.branching_factor,
+            depth=args.depth,
+            content_size=args.content_size,
+            media_mix=args.media_mix,
+            scores=args.scores,
+            seed=args.seed,
+            media_base_url=args.media_base_url,
+        )
+    except ValueError as exc:
+        parser.error(str(exc))
+
+    encoded = json.dumps({"nodes": nodes}, indent=2)
+    if args.output == "-":
+        sys.stdout.write(encoded + "\n")
+    else:
+        with open(args.output, "w", encoding="utf-8") as output:
+            output.write(encoded + "\n")
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    sys.exit(main())
@@ -0,0 +1,185 @@
+"""
+Graph algorithms over a scenario's node map.
+
+Every function takes `nodes`, the stored ``{node_id: node}`` map, follows
+``choices[*].target_node_id`` edges to nodes that exist, and runs
+iteratively in time linear in nodes plus choices, so neither the recursion
+limit nor graph size is a concern.
+"""
+from collections import deque
+from typing import Any, Iterator
+
+from .instrumentation import timed
+
+
+def successor_ids(nodes: dict[str, dict[str, Any]], node_id: str) -> Iterator[str]:
+    """
+    Yield the targets of a node's choices that exist in `nodes`, in choice order.
+    """
+    for choice in nodes[node_id].get("choices", []) or []:
+        if isinstance(choice, dict):
+            target_node_id = choice.get("target_node_id")
+            if target_node_id in nodes:
+                yield target_node_id
+
+
+def _pop_component(component_stack: list[str], on_stack: set[str], root_id: str) -> list[str]:
+    """
+    Pop and return the component rooted at `root_id` from Tarjan's stack.
+    """
+    component = []
+    while True:
+        member_id = component_stack.pop()
+        on_stack.discard(member_id)
+        component.append(member_id)
+        if member_id == root_id:
+            return component
+
+
+def strongly_connected_components(nodes: dict[str, dict[str, Any]]) -> list[list[str]]:
+    """
+    Return the strongly connected components of the node graph.
+
+    Tarjan's algorithm with an explicit stack. Components come out in
+    reverse topological order: no component links to a later one.
+    """
+    index: dict[str, int] = {}
+    lowlink: dict[str, int] = {}
+    on_stack: set[str] = set()
+    component_stack: list[str] = []
+    components: list[list[str]] = []
+
+    for root_id in nodes:
+        if root_id in index:
+            continue
+        index[root_id] = lowlink[root_id] = len(index)
+        component_stack.append(root_id)
+        on_stack.add(root_id)
+        work = [(root_id, successor_ids(nodes, root_id))]
+        while work:
+            node_id, successors = work[-1]
+            for target_node_id in successors:
+                if target_node_id not in index:
+                    index[target_node_id] = lowlink[target_node_id] = len(index)
+                    component_stack.append(target_node_id)
+                    on_stack.add(target_node_id)
+                    work.append((target_node_id, successor_ids(nodes, target_node_id)))
+                    break
+                if target_node_id in on_stack:
+                    lowlink[node_id] = min(lowlink[node_id], index[target_node_id])
+            else:
+                work.pop()
+                if work:
+                    parent_id = work[-1][0]
+                    lowlink[parent_id] = min(lowlink[parent_id], lowlink[node_id])
+                if lowlink[node_id] == index[node_id]:
+                    components.append(_pop_component(component_stack, on_stack, node_id))
+
+    return components
+
+
+def _cycle_through(nodes: dict[str, dict[str, Any]], start_node_id: str, members: set[str]) -> list[str]:
+    """
+    Return a shortest cycle through `start_node_id` that stays within `members`.
+    """
+    parents = {start_node_id: None}
+    pending = deque([start_node_id])
+    while pending:
+        node_id = pending.popleft()
+        for target_node_id in successor_ids(nodes, node_id):
+            if target_node_id == start_node_id:
+                cycle = [node_id]
+                while parents[cycle[-1]] is not None:
+                    cycle.append(parents[cycle[-1]])
+                cycle.reverse()
+                return cycle
+            if target_node_id in members and target_node_id not in parents:
+                parents[target_node_id] = node_id
+                pending.append(target_node_id)
+    return []  # pragma: no cover - every member of a cyclic component is on a cycle
+
+
+@timed("graph")
+def find_cycles(nodes: dict[str, dict[str, Any]]) -> tuple[set[str], list[list[str]]]:
+    """
+    Return the IDs of nodes on a directed cycle and one cycle per looping component.
+
+    Each cycle lists its nodes in link order, starting from the component's
+    first node in `nodes` order; the last node links back to the first. A
+    component can hold many cycles, so the node set may be larger than the
+    union of the cycles returned. Cycles are ordered by their first node.
+    """
+    position = {node_id: order for order, node_id in enumerate(nodes)}
+    cycle_node_ids: set[str] = set()
+    cycles = []
+    for component in strongly_connected_components(nodes):
+        if len(component) == 1 and component[0] not in successor_ids(nodes, component[0]):
+            continue
+        cycle_node_ids.update(component)
+        start_node_id = min(component, key=position.__getitem__)
+        cycles.append(_cycle_through(nodes, start_node_id, set(component)))
+    cycles.sort(key=lambda cycle: position[cycle[0]])
+    return cycle_node_ids, cycles
+
+
+def choice_score(choice: dict[str, Any]) -> int:
+    """
+    Return a choice's score, treating malformed scores as 0.
+    """
+    score = choice.get("score", 0)
+    return score if isinstance(score, int) and not isinstance(score, bool) else 0
+
+
+@timed("graph")
+def compute_path_metrics(nodes: dict[str, dict[str, Any]]) -> dict[str, dict[str, Any]]:
+    """
+    Return metrics for the paths from each node to an end node.
+
+    An end node has no choices. For every node this records whether an end
+    is reachable and, if so, the best and minimum score still available and
+    the shortest and longest number of choices left. Nodes that cannot reach
+    an end have ``None`` for the rest.
+
+    One pass over the components in reverse topological order. Saved
+    scenarios are acyclic; for malformed ones, links inside a loop are
+    ignored rather than followed.
+    """
+    metrics: dict[str, dict[str, Any]] = {}
+    for component in strongly_connected_components(nodes):
+        for node_id in component:
+            node = nodes[node_id]
+            choices = node.get("choices") or []
+            if not choices:
+                metrics[node_id] = {
+                    "end_reachable": True,
+                    "best_remaining_score": 0,
+                    "min_remaining_score": 0,
+                    "shortest_remaining_depth": 0,
+                    "longest_remaining_depth": 0,
+                }
+                continue
+
+            exits = []
+            for choice in choices:
+                if not isinstance(choice, dict):
+                    continue
+                target = metrics.get(choice.get("target_node_id"))
+                if target is not None and target["end_reachable"]:
+                    exits.append((choice_score(choice), target))
+            if not exits:
+                metrics[node_id] = {
+                    "end_reachable": False,
+                    "best_remaining_score": None,
+                    "min_remaining_score": None,
+                    "shortest_remaining_depth": None,
+                    "longest_remaining_depth": None,
+                }
+                continue
+            metrics[node_id] = {
+                "end_reachable": True,
+                "best_remaining_score": max(score + target["best_remaining_score"] for score, target in exits),
+                "min_remaining_score": min(score + target["min_remaining_score"] for score, target in exits),
+                "shortest_remaining_depth": 1 + min(target["shortest_remaining_depth"] for _, target in exits),
+                "longest_remaining_depth": 1 + max(target["longest_remaining_depth"] for _, target in exits),
+            }
+    return metrics
@@ -0,0 +1,409 @@
+"""
+Opt-in timing and payload-size instrumentation for handlers and views.
+
+Handlers and views wrapped with `instrumented` record one `Measurement` per
+call: wall time, time spent in each phase, response size and the number of
+saved nodes. Phases are marked with `timed` or `phase` where the work
+happens: loading field data, validation, sanitization, graph passes and
+building learner state. For JSON handlers, `handler_body` separates the
+handler itself from request decoding and response encoding, reported as
+the ``json`` phase. Phase times are inclusive, so sanitization and graph
+time spent while validating also count towards validation; a phase
+entered again while open is only timed once.
+
+Nothing is measured unless the ``BRANCHING_XBLOCK_INSTRUMENTATION_SINK``
+Django setting names a sink:
+
+* ``"log"``: one ``key=value`` line per call on this module's logger.
+* ``"statsd"``: statsd-compatible UDP packets sent to
+  ``BRANCHING_XBLOCK_STATSD_ADDRESS`` (``"127.0.0.1:8125"`` by default)
+  under ``BRANCHING_XBLOCK_STATSD_PREFIX`` (``"branching_xblock"``).
+* ``"memory"``: the in-process `memory_sink`, for tests.
+* A dotted path to a callable returning a sink, or a sink object itself.
+  A sink is anything with a ``record(measurement)`` method.
+
+Independently of the sink, `instrumented` can add the phases to handler
+responses as a ``Server-Timing`` header for the browser's developer tools.
+"""
+from __future__ import annotations
+
+import functools
+import json
+import logging
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Optional
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
+
+log = logging.getLogger(__name__)
+
+# Phases reported on every measurement, even when a call never enters them.
+PHASES = ("field_data", "validation", "sanitization", "graph", "state", "json")
+
+DEFAULT_STATSD_ADDRESS = "127.0.0.1:8125"
+DEFAULT_STATSD_PREFIX = "branching_xblock"
+
+_local = threading.local()
+
+
+class Measurement:
+    """
+    Timings and sizes recorded for one handler or view call.
+
+    Times are in seconds; `as_dict` reports them in milliseconds.
+    """
+
+    __slots__ = ("name", "usage_id", "wall", "body", "phases", "response_bytes", "node_count", "error", "_open")
+
+    def __init__(self, name: str, usage_id: str = ""):
+        """
+        Start an empty measurement of the call `name` on the block `usage_id`.
+        """
+        self.name = name
+        self.usage_id = usage_id
+        self.wall = 0.0
+        # Time inside the handler body, set by `handler_body`.
+        self.body: Optional[float] = None
+        self.phases: dict[str, float] = dict.fromkeys(PHASES, 0.0)
+        self.response_bytes = 0
+        self.node_count = 0
+        self.error = False
+        self._open: set[str] = set()
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """
+        Add the time spent in the block to phase `name`.
+        """
+        if name in self._open:
+            yield
+            return
+        self._open.add(name)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - started
+            self._open.discard(name)
+
+    def as_dict(self) -> dict[str, Any]:
+        """
+        Return the measurement as plain data, with times in milliseconds.
+        """
+        return {
+            "name": self.name,
+            "usage_id": self.usage_id,
+            "wall_ms": self.wall * 1000,
+            "phases_ms": {name: seconds * 1000 for name, seconds in self.phases.items()},
+            "response_bytes": self.response_bytes,
+            "node_count": self.node_count,
+            "error": self.error,
+        }
+
+    def server_timing(self) -> str:
+        """
+        Return the phases and wall time as a ``Server-Timing`` header value.
+        """
+        metrics = [f"{name};dur={seconds * 1000:.3f}" for name, seconds in self.phases.items()]
+        metrics.append(f"total;dur={self.wall * 1000:.3f}")
+        return ", ".join(metrics)
+
+
+def current_measurement() -> Optional[Measurement]:
+    """
+    Return the measurement of the instrumented call running on this thread, if any.
+    """
+    return getattr(_local, "measurement", None)
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """
+    Count the time spent in the block towards phase `name` of the current measurement, if any.
+    """
+    measurement = current_measurement()
+    if measurement is None:
+        yield
+        return
+    with measurement.phase(name):
+        yield
+
+
+def timed(name: str) -> Callable[[Callable], Callable]:
+    """
+    Decorate a function so its run time counts towards phase `name` of the current measurement.
+
+    Outside an instrumented call this costs one thread-local lookup.
+    """
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            measurement = current_measurement()
+            if measurement is None:
+                return func(*args, **kwargs)
+            with measurement.phase(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def response_size(result: Any) -> int:
+    """
+    Return the size in bytes of a handler response or view fragment.
+    """
+    body = getattr(result, "body", None)
+    if isinstance(body, bytes):
+        return len(body)
+    if hasattr(result, "json_init_args"):
+        content = (result.content or "").encode("utf-8")
+        return len(content) + len(json.dumps(result.json_init_args).encode("utf-8"))
+    return 0
+
+
+def handler_body(func: Callable) -> Callable:
+    """
+    Mark the body of a handler wrapped by ``XBlock.json_handler``.
+
+    The rest of an instrumented handler call, decoding the request and
+    encoding the response, is then reported as the ``json`` phase.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        measurement = current_measurement()
+        if measurement is None:
+            return func(*args, **kwargs)
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            measurement.body = (measurement.body or 0.0) + time.perf_counter() - started
+    return wrapper
+
+
+def instrumented(
+    node_count: Optional[Callable[[Any], int]] = None,
+    server_timing: Optional[Callable[[], bool]] = None,
+) -> Callable[[Callable], Callable]:
+    """
+    Decorate a block method so each call is measured and sent to the configured sink.
+
+    The measurement is named after the method. `node_count`, given the
+    block, returns the number of nodes recorded after the call. When
+    `server_timing` returns true, the call is measured even without a sink
+    and the phases are added to the response as a ``Server-Timing`` header.
+    Handler markers set by ``XBlock.json_handler`` are kept, so this can
+    wrap handlers as well as views.
+    """
+    def decorator(method: Callable) -> Callable:
+        @functools.wraps(method)
+        def wrapper(block, *args, **kwargs):
+            sink = get_instrumentation_sink()
+            add_header = server_timing is not None and server_timing()
+            if sink is None and not add_header:
+                return method(block, *args, **kwargs)
+
+            usage_id = str(getattr(getattr(block, "scope_ids", None), "usage_id", "") or "")
+            measurement = Measurement(method.__name__, usage_id)
+            previous = current_measurement()
+            _local.measurement = measurement
+            started = time.perf_counter()
+            try:
+                result = method(block, *args, **kwargs)
+            except Exception:
+                measurement.error = True
+                raise
+            finally:
+                measurement.wall = time.perf_counter() - started
+                _local.measurement = previous
+                if measurement.body is not None:
+                    measurement.phases["json"] = max(measurement.wall - measurement.body, 0.0)
+                if measurement.error and sink is not None:
+                    sink.record(measurement)
+
+            measurement.response_bytes = response_size(result)
+            if add_header and hasattr(result, "headers"):
+                result.headers["Server-Timing"] = measurement.server_timing()
+            if sink is not None:
+                if node_count is not None:
+                    measurement.node_count = node_count(block)
+                sink.record(measurement)
+            return result
+        return wrapper
+    return decorator
+
+
+class LogSink:
+    """
+    Write each measurement as one ``key=value`` log line.
+    """
+
+    def __init__(self, logger: Optional[logging.Logger] = None, level: int = logging.INFO):
+        """
+        Log to `logger` (this module's by default) at `level`.
+        """
+        self.logger = logger or log
+        self.level = level
+
+    def record(self, measurement: Measurement) -> None:
+        """
+        Log `measurement`.
+        """
+        if not self.logger.isEnabledFor(self.level):
+            return
+        phases = " ".join(f"{name}_ms={seconds * 1000:.3f}" for name, seconds in measurement.phases.items())
+        self.logger.log(
+            self.level,
+            "branching_xblock handler=%s usage_id=%s wall_ms=%.3f %s response_bytes=%d node_count=%d error=%s",
+            measurement.name,
+            measurement.usage_id or "-",
+            measurement.wall * 1000,
+            phases,
+            measurement.response_bytes,
+            measurement.node_count,
+            str(measurement.error).lower(),
+        )
+
+
+class StatsdSink:
+    """
+    Send each measurement to a statsd-compatible server over UDP.
+
+    One packet per call carries a ``calls`` counter (and an ``errors``
+    counter on failure), ``wall`` and ``phase.<name>`` timers, and
+    ``response_bytes`` and ``node_count`` histograms, all under
+    ``<prefix>.<handler>``. Sending never raises: a lost packet only loses
+    that sample.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8125, prefix: str = DEFAULT_STATSD_PREFIX):
+        """
+        Send to `host`:`port` with metric names starting with `prefix`.
+        """
+        self.address = (host, port)
+        self.prefix = prefix
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def lines(self, measurement: Measurement) -> list[str]:
+        """
+        Return the statsd lines for `measurement`.
+        """
+        name = f"{self.prefix}.{measurement.name}" if self.prefix else measurement.name
+        lines = [f"{name}.calls:1|c"]
+        if measurement.error:
+            lines.append(f"{name}.errors:1|c")
+        lines.append(f"{name}.wall:{measurement.wall * 1000:.3f}|ms")
+        lines.extend(
+            f"{name}.phase.{phase}:{seconds * 1000:.3f}|ms"
+            for phase, seconds in measurement.phases.items()
+        )
+        lines.append(f"{name}.response_bytes:{measurement.response_bytes}|h")
+        lines.append(f"{name}.node_count:{measurement.node_count}|h")
+        return lines
+
+    def record(self, measurement: Measurement) -> None:
+        """
+        Send `measurement` as one packet.
+        """
+        try:
+            self._socket.sendto("\n".join(self.lines(measurement)).encode("utf-8"), self.address)
+        except OSError:
+            log.debug("Could not send branching_xblock metrics to %s:%s", *self.address, exc_info=True)
+
+    def close(self) -> None:
+        """
+        Close the socket.
+        """
+        self._socket.close()
+
+
+class MemorySink:
+    """
+    Keep measurements in memory, for tests.
+    """
+
+    def __init__(self):
+        """
+        Start with no measurements.
+        """
+        self._lock = threading.Lock()
+        self.measurements: list[Measurement] = []
+
+    def record(self, measurement: Measurement) -> None:
+        """
+        Store `measurement`.
+        """
+        with self._lock:
+            self.measurements.append(measurement)
+
+    def named(self, name: str) -> list[Measurement]:
+        """
+        Return the stored measurements of the handler or view `name`.
+        """
+        with self._lock:
+            return [measurement for measurement in self.measurements if measurement.name == name]
+
+    def clear(self) -> None:
+        """
+        Drop every stored measurement.
+        """
+        with self._lock:
+            self.measurements.clear()
+
+
+memory_sink = MemorySink()
+
+
+def _parse_address(address: str) -> tuple[str, int]:
+    """
+    Split a ``host:port`` statsd address.
+    """
+    host, _, port = address.rpartition(":")
+    try:
+        return host or "127.0.0.1", int(port)
+    except ValueError:
+        raise ImproperlyConfigured(
+            f"Invalid BRANCHING_XBLOCK_STATSD_ADDRESS {address!r}; expected \"host:port\"."
+        ) from None
+
+
+@functools.lru_cache(maxsize=8)
+def _build_sink(name: str, statsd_address: str, statsd_prefix: str):
+    """
+    Build the sink configured as `name`; cached so sockets are reused.
+    """
+    if name == "log":
+        return LogSink()
+    if name == "statsd":
+        host, port = _parse_address(statsd_address)
+        return StatsdSink(host, port, statsd_prefix)
+    if name == "memory":
+        return memory_sink
+    try:
+        factory = import_string(name)
+    except ImportError as exc:
+        raise ImproperlyConfigured(
+            f"Unknown BRANCHING_XBLOCK_INSTRUMENTATION_SINK {name!r}; "
+            "expected \"log\", \"statsd\", \"memory\" or a dotted path to a sink factory."
+        ) from exc
+    return factory()
+
+
+def get_instrumentation_sink():
+    """
+    Return the configured sink, or None when instrumentation is off.
+    """
+    configured = getattr(settings, "BRANCHING_XBLOCK_INSTRUMENTATION_SINK", None)
+    if not configured:
+        return None
+    if not isinstance(configured, str):
+        return configured
+    return _build_sink(
+        configured,
+        getattr(settings, "BRANCHING_XBLOCK_STATSD_ADDRESS", None) or DEFAULT_STATSD_ADDRESS,
+        getattr(settings, "BRANCHING_XBLOCK_STATSD_PREFIX", DEFAULT_STATSD_PREFIX),
+    )
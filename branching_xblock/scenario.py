@@ -0,0 +1,318 @@
+"""
+Compiled, read-only view of a stored branching scenario.
+
+Learner handlers only ever read the content-scoped node graph, so it is
+compiled once per content version into a `CompiledScenario` and shared
+between requests through a small per-process LRU.
+"""
+import copy
+import hashlib
+import json
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Optional
+
+from .compat import SANITIZER_POLICY_VERSION, sanitize_html
+from .graph import compute_path_metrics
+
+COMPILED_SCENARIO_CACHE_SIZE = 256
+
+NO_TARGET = -1
+
+
+def _clean_hint(value: Any) -> str:
+    """
+    Return a node hint as sanitized HTML.
+    """
+    return sanitize_html(str(value or ''))
+
+
+def is_sanitized(scenario_data: Any) -> bool:
+    """
+    Return True if `scenario_data` was saved under the current sanitizer policy.
+    """
+    return isinstance(scenario_data, dict) and scenario_data.get("sanitizer_version") == SANITIZER_POLICY_VERSION
+
+
+def sanitize_node(node: dict[str, Any]) -> dict[str, Any]:
+    """
+    Return a copy of the node with content and hint sanitized, or the node itself if already clean.
+    """
+    updates = {}
+    content = node.get("content")
+    if isinstance(content, str) and content:
+        cleaned_content = sanitize_html(content)
+        if cleaned_content != content:
+            updates["content"] = cleaned_content
+    if node.get("hint"):
+        cleaned_hint = _clean_hint(node.get("hint"))
+        if cleaned_hint != node.get("hint"):
+            updates["hint"] = cleaned_hint
+    return {**node, **updates} if updates else node
+
+
+def node_image_urls(node: dict[str, Any]) -> tuple[str, ...]:
+    """
+    Return the URLs of the images the learner UI shows for a node.
+
+    Audio, video and embeds are left out: they stream when played.
+    """
+    media = node.get("media")
+    media = media if isinstance(media, dict) else {}
+    if media.get("type") == "single_image":
+        candidates = [media.get("url")]
+    elif media.get("type") == "image":
+        candidates = [node.get("left_image_url"), node.get("right_image_url")]
+    else:
+        return ()
+    return tuple(dict.fromkeys(url.strip() for url in candidates if isinstance(url, str) and url.strip()))
+
+
+def scenario_content_hash(nodes: Any, start_node_id: Any) -> str:
+    """
+    Return a stable digest of a scenario's nodes and start node.
+
+    Keys are hashed in stored order: two orderings of the same content only
+    cost an extra compile, and skipping the sort keeps this cheap.
+    """
+    encoded = json.dumps(
+        {"nodes": nodes, "start_node_id": start_node_id}, separators=(",", ":"), default=str
+    ).encode("utf-8")
+    return hashlib.blake2b(encoded, digest_size=16).hexdigest()
+
+
+def scenario_content_version(scenario_data: Any) -> str:
+    """
+    Return the content version of `scenario_data`.
+
+    Saves and imports store the digest as ``content_hash``, so learner
+    requests read it instead of hashing the scenario; data saved before the
+    stamp existed is hashed here. OLX imports and the Studio view replace a
+    stamp that does not match the nodes.
+    """
+    if not isinstance(scenario_data, dict):
+        return scenario_content_hash(None, None)
+    stamp = scenario_data.get("content_hash")
+    if isinstance(stamp, str) and stamp:
+        return stamp
+    return scenario_content_hash(scenario_data.get("nodes", {}), scenario_data.get("start_node_id"))
+
+
+class CompiledScenario:
+    """
+    Immutable, pre-processed form of `scenario_data` used by the learner path.
+
+    Nodes are addressed by position: `node_ids[i]` is the interned id of the
+    node at index `i`, `successors[i]` lists the index targeted by each of its
+    choices (`NO_TARGET` when the target does not exist), `is_leaf[i]` marks
+    end nodes and `safe_nodes[i]` is the node as it may reach the DOM.
+    `next_image_urls[i]` lists the images of the nodes one choice away.
+    `path_metrics` maps node IDs to the metrics stored at save time. They are
+    only used when the stored ``content_hash`` matches the nodes, so metrics
+    left stale by an OLX edit, or saved before they existed, are computed here.
+
+    Every node's content and hint is sanitized here, once per content
+    version, whatever `sanitizer_version` the data claims: the stamp lives in
+    the same author- and OLX-controlled data it would vouch for.
+    `learner_nodes` is the stored map with the start node swapped for its
+    safe form, for the learner UI that only renders the current or start
+    node; `safe_learner_nodes` has every node in its safe form, for client
+    traversal, which renders nodes straight from the map.
+
+    Instances are shared across requests and blocks; treat every attribute,
+    including the node dicts, as read-only.
+    """
+
+    __slots__ = (
+        "content_hash",
+        "start_node_id",
+        "start_index",
+        "node_ids",
+        "index",
+        "nodes",
+        "safe_nodes",
+        "successors",
+        "is_leaf",
+        "next_image_urls",
+        "learner_nodes",
+        "safe_learner_nodes",
+        "path_metrics",
+    )
+
+    def __init__(self, scenario_data: Any, content_hash: str):
+        """
+        Compile `scenario_data`, whose content version is `content_hash`.
+        """
+        scenario_data = scenario_data if isinstance(scenario_data, dict) else {}
+        raw_nodes = copy.deepcopy(scenario_data.get("nodes", {}))
+        start_node_id = scenario_data.get("start_node_id")
+
+        nodes: dict[str, dict[str, Any]] = {}
+        if isinstance(raw_nodes, dict):
+            nodes = {
+                sys.intern(node_id) if isinstance(node_id, str) else node_id: node
+                for node_id, node in raw_nodes.items()
+                if isinstance(node, dict)
+            }
+
+        node_ids = tuple(nodes)
+        index = {node_id: position for position, node_id in enumerate(node_ids)}
+
+        successors = []
+        is_leaf = []
+        safe_nodes = []
+        for node_id in node_ids:
+            node = nodes[node_id]
+            choices = node.get("choices")
+            successors.append(tuple(
+                index.get(choice.get("target_node_id"), NO_TARGET) if isinstance(choice, dict) else NO_TARGET
+                for choice in (choices if isinstance(choices, list) else [])
+            ))
+            is_leaf.append(bool(node) and not choices)
+            safe_nodes.append(sanitize_node(node))
+
+        image_urls = [node_image_urls(nodes[node_id]) for node_id in node_ids]
+        next_image_urls = tuple(
+            tuple(dict.fromkeys(url for target in targets if target != NO_TARGET for url in image_urls[target]))
+            for targets in successors
+        )
+
+        # The learner UI falls back to rendering the start node before there is
+        # any learner state, so the emitted node map carries its clean form.
+        learner_nodes = raw_nodes
+        if isinstance(raw_nodes, dict) and start_node_id in index:
+            start_safe_node = safe_nodes[index[start_node_id]]
+            if start_safe_node is not raw_nodes[start_node_id]:
+                learner_nodes = {**raw_nodes, start_node_id: start_safe_node}
+        safe_learner_nodes = raw_nodes
+        if isinstance(raw_nodes, dict) and any(
+            safe_node is not nodes[node_id] for node_id, safe_node in zip(node_ids, safe_nodes)
+        ):
+            safe_learner_nodes = {**raw_nodes, **dict(zip(node_ids, safe_nodes))}
+
+        self.content_hash = content_hash
+        self.start_node_id = start_node_id
+        self.start_index = index.get(start_node_id, NO_TARGET)
+        self.node_ids = node_ids
+        self.index = index
+        self.nodes = nodes
+        self.safe_nodes = tuple(safe_nodes)
+        self.successors = tuple(successors)
+        self.is_leaf = tuple(is_leaf)
+        self.next_image_urls = next_image_urls
+        self.learner_nodes = learner_nodes
+        self.safe_learner_nodes = safe_learner_nodes
+        stored_metrics = scenario_data.get("path_metrics")
+        metrics_match = isinstance(stored_metrics, dict) and (
+            scenario_data.get("content_hash") == scenario_content_hash(scenario_data.get("nodes", {}), start_node_id)
+        )
+        self.path_metrics = copy.deepcopy(stored_metrics) if metrics_match else compute_path_metrics(nodes)
+
+    def get_node(self, node_id: Optional[str]) -> Optional[dict[str, Any]]:
+        """
+        Return the stored node with the given ID, or None.
+        """
+        return self.nodes.get(node_id) if isinstance(node_id, str) else None
+
+    def get_safe_node(self, node_id: Optional[str]) -> Optional[dict[str, Any]]:
+        """
+        Return the node with the given ID as it may reach the DOM, or None.
+        """
+        position = self.index.get(node_id, NO_TARGET) if isinstance(node_id, str) else NO_TARGET
+        return self.safe_nodes[position] if position != NO_TARGET else None
+
+    def get_path_metrics(self, node_id: Optional[str]) -> Optional[dict[str, Any]]:
+        """
+        Return the path metrics of the node with the given ID, or None.
+        """
+        return self.path_metrics.get(node_id) if isinstance(node_id, str) else None
+
+    def get_next_image_urls(self, node_id: Optional[str]) -> list[str]:
+        """
+        Return the image URLs of the nodes one choice away from the node with the given ID.
+        """
+        position = self.index.get(node_id, NO_TARGET) if isinstance(node_id, str) else NO_TARGET
+        return list(self.next_image_urls[position]) if position != NO_TARGET else []
+
+    def is_end_node(self, node_id: Optional[str]) -> bool:
+        """
+        Return True if the node exists and has no choices.
+        """
+        position = self.index.get(node_id, NO_TARGET) if isinstance(node_id, str) else NO_TARGET
+        return position != NO_TARGET and self.is_leaf[position]
+
+    def frontier(self, node_ids: list[Any], depth: int) -> dict[str, dict[str, Any]]:
+        """
+        Return the learner nodes for `node_ids` and for every node up to `depth` choices beyond them.
+
+        Unknown IDs are skipped. Nodes are keyed by ID in breadth-first order.
+        """
+        level = list(dict.fromkeys(
+            self.index[node_id] for node_id in node_ids if isinstance(node_id, str) and node_id in self.index
+        ))
+        reached = list(level)
+        seen = set(level)
+        for _ in range(depth):
+            next_level = []
+            for position in level:
+                for target in self.successors[position]:
+                    if target != NO_TARGET and target not in seen:
+                        seen.add(target)
+                        next_level.append(target)
+            if not next_level:
+                break
+            reached.extend(next_level)
+            level = next_level
+        return {self.node_ids[position]: self.safe_nodes[position] for position in reached}
+
+
+class CompiledScenarioCache:
+    """
+    Thread-safe LRU of compiled scenarios keyed by usage key and content version.
+    """
+
+    def __init__(self, maxsize: int = COMPILED_SCENARIO_CACHE_SIZE):
+        """
+        Create an empty cache holding at most `maxsize` compiled scenarios.
+        """
+        self.maxsize = maxsize
+        self._entries: OrderedDict[tuple[str, str], CompiledScenario] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compile(self, usage_key: str, scenario_data: Any) -> CompiledScenario:
+        """
+        Return the compiled form of `scenario_data`, compiling it on a miss.
+        """
+        content_hash = scenario_content_version(scenario_data)
+        key = (usage_key, content_hash)
+        with self._lock:
+            compiled = self._entries.get(key)
+            if compiled is not None:
+                self._entries.move_to_end(key)
+                return compiled
+
+        # Compile outside the lock; a concurrent miss only duplicates work.
+        compiled = CompiledScenario(scenario_data, content_hash)
+        with self._lock:
+            self._entries[key] = compiled
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return compiled
+
+    def clear(self) -> None:
+        """
+        Drop every cached entry.
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        """
+        Return the number of cached entries.
+        """
+        return len(self._entries)
+
+
+compiled_scenarios = CompiledScenarioCache()
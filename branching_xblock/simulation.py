@@ -0,0 +1,311 @@
+"""
+Headless Monte Carlo simulation of learners working through a scenario.
+
+Virtual learners follow the rules of the learner handlers: `select_choice`
+moves along a choice whose target exists and awards its score when scoring
+is enabled, `undo_choice` steps back one choice and takes its points away,
+and `reset_activity` returns to the start node with no score. A learner is
+done on reaching an end node (a node with no choices).
+
+Every choice policy is a weight per selectable choice, so all learners in a
+batch advance together: one step is a handful of NumPy gathers plus one
+`searchsorted` that picks each learner's choice. Results come from a seeded
+generator and are reproducible for the same arguments.
+
+NumPy ships with the Open edX platform but is not a dependency of this
+package; without it `simulate_learners` returns None.
+"""
+from __future__ import annotations
+
+from typing import Any, Callable, Optional
+
+from .graph import choice_score
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+POLICIES = ("uniform", "greedy-max", "greedy-min", "weighted")
+
+# Learners per batch times history depth; bounds the undo history arrays to a few tens of megabytes.
+BATCH_HISTORY_CELLS = 4 * 1024 * 1024
+MAX_BATCH_SIZE = 256 * 1024
+
+
+class ChoiceTable:
+    """
+    The selectable choices of every node, flattened for vectorized lookups.
+
+    Node `i` owns positions ``offsets[i]:offsets[i + 1]`` of `choice_index`
+    (the choice's position in the node's ``choices`` list), `targets` and
+    `points`. `bounds` holds ``i + cumulative share`` for each of those
+    positions under the policy in use, so a learner at node `i` drawing
+    ``u`` in ``[0, 1)`` picks the first position whose bound exceeds ``i + u``.
+    """
+
+    def __init__(
+        self,
+        nodes: dict[str, dict[str, Any]],
+        policy: str,
+        enable_scoring: bool,
+        choice_weights: Optional[dict[str, list[float]]] = None,
+        score_of: Callable[[dict[str, Any]], Optional[int]] = choice_score,
+    ):
+        """
+        Build the table for `nodes` under `policy`.
+
+        A choice is selectable when its target exists and, with scoring
+        enabled, `score_of` accepts it; `select_choice` rejects the others.
+        Raises ValueError for an unknown policy or unusable weights.
+        """
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown policy {policy!r}; expected one of {', '.join(POLICIES)}.")
+        if choice_weights is not None and not isinstance(choice_weights, dict):
+            raise ValueError("Choice weights must map node IDs to lists of weights.")
+        choice_weights = choice_weights or {}
+
+        self.node_ids = list(nodes)
+        position = {node_id: index for index, node_id in enumerate(self.node_ids)}
+        offsets = [0]
+        choice_index: list[int] = []
+        targets: list[int] = []
+        points: list[int] = []
+        bounds: list[float] = []
+        is_leaf = []
+        for node_index, node_id in enumerate(self.node_ids):
+            choices = nodes[node_id].get("choices") or []
+            is_leaf.append(not choices)
+            selectable = []
+            for index, choice in enumerate(choices):
+                if not isinstance(choice, dict) or choice.get("target_node_id") not in position:
+                    continue
+                score = score_of(choice) if enable_scoring else 0
+                if score is not None:
+                    selectable.append((index, position[choice["target_node_id"]], score))
+            weights = self._weights(node_id, policy, selectable, choice_weights.get(node_id), len(choices))
+            total = 0.0
+            for (index, target, score), weight in zip(selectable, weights):
+                total += weight
+                choice_index.append(index)
+                targets.append(target)
+                points.append(score)
+                bounds.append(total)
+            for row in range(offsets[-1], len(bounds)):
+                bounds[row] = node_index + bounds[row] / total
+            offsets.append(len(bounds))
+
+        self.offsets = np.array(offsets, dtype=np.int64)
+        self.choice_index = np.array(choice_index, dtype=np.int32)
+        self.targets = np.array(targets, dtype=np.int32)
+        self.points = np.array(points, dtype=np.int64)
+        self.bounds = np.array(bounds, dtype=np.float64)
+        self.is_leaf = np.array(is_leaf, dtype=bool)
+        self.selectable_counts = np.diff(self.offsets)
+
+    @staticmethod
+    def _weights(
+        node_id: str,
+        policy: str,
+        selectable: list[tuple[int, int, int]],
+        node_weights: Optional[list[float]],
+        choice_count: int,
+    ) -> list[float]:
+        """
+        Return the relative weight of each selectable choice of a node.
+
+        Greedy policies take the highest (or lowest) scoring choice, the
+        first one listed on a tie. Weighted nodes without weights are uniform.
+        """
+        if not selectable:
+            return []
+        if policy in ("greedy-max", "greedy-min"):
+            pick = max if policy == "greedy-max" else min
+            best = pick(score for _, _, score in selectable)
+            first = next(row for row, (_, _, score) in enumerate(selectable) if score == best)
+            return [1.0 if row == first else 0.0 for row in range(len(selectable))]
+        if policy == "uniform" or node_weights is None:
+            return [1.0] * len(selectable)
+
+        if not isinstance(node_weights, list) or len(node_weights) != choice_count:
+            raise ValueError(f"Node {node_id} needs one weight per choice.")
+        weights = []
+        for index, _, _ in selectable:
+            weight = node_weights[index]
+            if isinstance(weight, bool) or not isinstance(weight, (int, float)) or not weight >= 0:
+                raise ValueError(f"Node {node_id} has an invalid choice weight.")
+            weights.append(float(weight))
+        if sum(weights) <= 0:
+            raise ValueError(f"Node {node_id} needs a positive weight on a selectable choice.")
+        return weights
+
+
+def _grade_counts(
+    scores: Any,
+    max_score: int,
+    grade_ranges: list[dict[str, Any]],
+) -> list[dict[str, Any]]:
+    """
+    Return how many of `scores` fall in each grade range.
+
+    Percentages are clamped and rounded exactly as the learner grade
+    report rounds them, and scores outside every range count in the first.
+    """
+    if not grade_ranges:
+        return []
+    if max_score > 0:
+        percentages = np.rint(np.clip(scores / max_score * 100.0, 0.0, 100.0)).astype(np.int64)
+    else:
+        percentages = np.zeros(len(scores), dtype=np.int64)
+    range_index = np.zeros(len(scores), dtype=np.int64)
+    unmatched = np.ones(len(scores), dtype=bool)
+    for index, grade_range in enumerate(grade_ranges):
+        matched = unmatched & (grade_range["start"] <= percentages) & (percentages <= grade_range["end"])
+        range_index[matched] = index
+        unmatched &= ~matched
+    counts = np.bincount(range_index, minlength=len(grade_ranges))
+    return [
+        {
+            "label": grade_range.get("label", ""),
+            "start": grade_range["start"],
+            "end": grade_range["end"],
+            "learners": int(count),
+        }
+        for grade_range, count in zip(grade_ranges, counts)
+    ]
+
+
+def simulate_learners(  # pylint: disable=too-many-locals,too-many-statements
+    nodes: dict[str, dict[str, Any]],
+    start_node_id: Optional[str],
+    learners: int,
+    policy: str = "uniform",
+    *,
+    seed: Optional[int] = 0,
+    choice_weights: Optional[dict[str, list[float]]] = None,
+    enable_scoring: bool = True,
+    enable_undo: bool = False,
+    enable_reset_activity: bool = False,
+    undo_rate: float = 0.0,
+    reset_rate: float = 0.0,
+    max_score: int = 100,
+    grade_ranges: Optional[list[dict[str, Any]]] = None,
+    max_steps: Optional[int] = None,
+    score_of: Callable[[dict[str, Any]], Optional[int]] = choice_score,
+) -> Optional[dict[str, Any]]:
+    """
+    Send `learners` virtual learners through the scenario and aggregate the outcomes.
+
+    At each step a learner undoes its last choice with probability
+    `undo_rate` (when undo is enabled and it has one), resets with
+    probability `reset_rate` (when reset is enabled), and otherwise selects
+    a choice under `policy`. `choice_weights` maps node IDs to one relative
+    weight per choice for the ``weighted`` policy. Learners still going
+    after `max_steps` actions (default: twice the node count), or stuck on
+    a node with no selectable choice, count as incomplete.
+
+    The result holds the number of ``completed`` and ``incomplete``
+    learners, ``end_node_counts`` by end node ID, ``score_counts`` by final
+    score and ``mean_score`` over completed learners, ``grade_counts`` per
+    entry of `grade_ranges`, and the number of each learner ``actions``.
+    Returns None when NumPy is unavailable; raises ValueError for invalid
+    arguments.
+    """
+    if np is None:
+        return None
+    if isinstance(learners, bool) or not isinstance(learners, int) or learners < 0:
+        raise ValueError("The number of learners must be a non-negative integer.")
+    for name, rate in (("undo_rate", undo_rate), ("reset_rate", reset_rate)):
+        if isinstance(rate, bool) or not isinstance(rate, (int, float)) or not 0 <= rate <= 1:
+            raise ValueError(f"{name} must be between 0 and 1.")
+    if undo_rate + reset_rate > 1:
+        raise ValueError("undo_rate and reset_rate must add up to at most 1.")
+
+    table = ChoiceTable(nodes, policy, enable_scoring, choice_weights, score_of)
+    undo_rate = float(undo_rate) if enable_undo else 0.0
+    reset_rate = float(reset_rate) if enable_reset_activity else 0.0
+    max_steps = 2 * len(nodes) if max_steps is None else max_steps
+    start = table.node_ids.index(start_node_id) if start_node_id in nodes else None
+
+    end_counts = np.zeros(len(table.node_ids), dtype=np.int64)
+    final_scores = []
+    actions = {"select_choice": 0, "undo_choice": 0, "reset_activity": 0}
+    rng = np.random.default_rng(seed)
+
+    # An undo needs the node and points of every choice still on the learner's history.
+    history_depth = min(max_steps, len(nodes)) if undo_rate else 0
+    batch_size = max(1, min(MAX_BATCH_SIZE, BATCH_HISTORY_CELLS // max(1, history_depth)))
+    remaining = learners if start is not None else 0
+    while remaining:
+        size = min(batch_size, remaining)
+        remaining -= size
+        current = np.full(size, start, dtype=np.int32)
+        score = np.zeros(size, dtype=np.int64)
+        depth = np.zeros(size, dtype=np.int32)
+        history_nodes = np.zeros((size, history_depth), dtype=np.int32)
+        history_points = np.zeros((size, history_depth), dtype=np.int64)
+        completed = table.is_leaf[current].copy()
+        finished = completed.copy()
+        active = np.flatnonzero(~finished)
+
+        for _ in range(max_steps):
+            if active.size == 0:
+                break
+            draw = rng.random(len(active))
+            undo = (draw < undo_rate) & (depth[active] > 0)
+            reset = ~undo & (draw >= undo_rate) & (draw < undo_rate + reset_rate)
+            select = ~undo & ~reset
+
+            undoing = active[undo]
+            if len(undoing):
+                depth[undoing] -= 1
+                current[undoing] = history_nodes[undoing, depth[undoing]]
+                score[undoing] -= history_points[undoing, depth[undoing]]
+            resetting = active[reset]
+            current[resetting] = start
+            score[resetting] = 0
+            depth[resetting] = 0
+
+            selecting = active[select]
+            at = current[selecting]
+            stuck = table.selectable_counts[at] == 0
+            if undo_rate:
+                # Cyclic scenarios can outgrow the history; those learners stop as incomplete.
+                stuck |= depth[selecting] >= history_depth
+            finished[selecting[stuck]] = True
+            selecting, at = selecting[~stuck], at[~stuck]
+            rows = np.searchsorted(table.bounds, at + rng.random(len(selecting)), side="right")
+            # ``at + u`` can round up to ``at + 1`` for u just below 1.
+            rows = np.minimum(rows, table.offsets[at + 1] - 1)
+            points = table.points[rows]
+            if undo_rate:
+                history_nodes[selecting, depth[selecting]] = at
+                history_points[selecting, depth[selecting]] = points
+                depth[selecting] += 1
+            current[selecting] = table.targets[rows]
+            score[selecting] += points
+            completed[selecting] = table.is_leaf[current[selecting]]
+            finished[selecting] |= completed[selecting]
+
+            actions["select_choice"] += len(selecting)
+            actions["undo_choice"] += len(undoing)
+            actions["reset_activity"] += len(resetting)
+            active = active[~finished[active]]
+
+        end_counts += np.bincount(current[completed], minlength=len(table.node_ids))
+        final_scores.append(score[completed])
+
+    scores = np.concatenate(final_scores) if final_scores else np.zeros(0, dtype=np.int64)
+    totals, counts = np.unique(scores, return_counts=True)
+    return {
+        "learners": learners,
+        "completed": len(scores),
+        "incomplete": learners - len(scores),
+        "end_node_counts": {
+            table.node_ids[index]: int(end_counts[index]) for index in np.flatnonzero(end_counts)
+        },
+        "score_counts": {int(total): int(count) for total, count in zip(totals, counts)},
+        "mean_score": float(scores.mean()) if len(scores) else None,
+        "grade_counts": _grade_counts(scores, max_score, grade_ranges or []),
+        "actions": actions,
+    }
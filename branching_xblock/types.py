@@ -54,6 +54,16 @@ class GradeRange(BaseModel):
     end: int = Field(default=100, ge=0, le=100)
 
 
+class PathMetrics(BaseModel):
+    """Pre-computed metrics for the paths from a node to an end node."""
+
+    end_reachable: bool = False
+    best_remaining_score: Optional[int] = None
+    min_remaining_score: Optional[int] = None
+    shortest_remaining_depth: Optional[int] = None
+    longest_remaining_depth: Optional[int] = None
+
+
 class ScenarioSettings(BaseModel):
     """Scenario-level settings (mirrors XBlock content fields)."""
 
@@ -73,3 +83,4 @@ class ScenarioData(BaseModel):
 
     nodes: dict[str, Node] = Field(default_factory=dict)
     start_node_id: Optional[str] = None
+    path_metrics: dict[str, PathMetrics] = Field(default_factory=dict)
@@ -1,4 +1,4 @@
-import { Node, GradeRange } from "./types";
+import { Node, GradeRange, PathMetrics } from "./types";
 import { XBlockPayloadBase } from "./mountApp";
 
 // ---- Student view ----
@@ -7,6 +7,9 @@ export interface StudentHandlerUrls {
   select_choice: string;
   undo_choice: string;
   reset_activity: string;
+  publish_progress: string;
+  submit_path: string;
+  get_nodes: string;
 }
 
 export interface GradeReport {
@@ -18,9 +21,19 @@ export interface GradeReport {
   detailed_scores: Array<{ choice_text: string; awarded_points: number }>;
 }
 
+// One scored choice the learner made, as recorded in `choice_history`.
+export interface ChoiceRecord {
+  source_node_id: string;
+  choice_text: string;
+  awarded_points: number;
+}
+
 // Fields the student frontend actually consumes; the backend payload may carry more.
 export interface StudentInitialState {
+  // The whole node map, or in frontier mode the nodes held so far.
   nodes: Record<string, Node>;
+  // Set in frontier mode: how many choices ahead of the learner nodes are sent.
+  frontier_depth?: number | null;
   start_node_id: string | null;
   enable_undo: boolean;
   enable_scoring: boolean;
@@ -29,16 +42,51 @@ export interface StudentInitialState {
   background_image_alt_text: string;
   background_image_is_decorative: boolean;
   max_score: number;
+  grade_ranges: GradeRange[];
   current_node: Node | null;
+  current_node_metrics: PathMetrics | null;
+  // Images of the nodes one choice away, for preloading.
+  next_image_urls: string[];
   history: string[];
+  score_history: number[];
+  choice_history: ChoiceRecord[];
+  has_completed: boolean;
   score: number;
   grade_report: GradeReport;
+  state_version: number;
+  content_version: string;
+}
+
+// Version of the learner state the client holds, echoed back to request delta responses.
+export type StudentStateVersion = Pick<StudentInitialState, "state_version" | "content_version">;
+
+// Learner fields an action handler returns in delta mode; merged into the held state.
+// The grade report is only sent when the new current node is an end node.
+export interface StudentStateDelta {
+  delta: true;
+  current_node: Node | null;
+  current_node_metrics: PathMetrics | null;
+  next_image_urls: string[];
+  history: string[];
+  score_history: number[];
+  choice_history: ChoiceRecord[];
+  has_completed: boolean;
+  score: number;
+  state_version: number;
+  grade_report?: GradeReport;
 }
 
+export type StudentStateUpdate = StudentInitialState | StudentStateDelta;
+
 export interface StudentPayload extends XBlockPayloadBase {
   view: "student";
   handler_urls: StudentHandlerUrls;
   initial_state: StudentInitialState;
+  // Set when the site defers grade and completion events after undo and reset.
+  defer_publishing?: boolean;
+  // Set when the site lets the learner UI move through the scenario locally
+  // and record the path with `submit_path`.
+  client_traversal?: boolean;
 }
 
 // ---- Studio view ----
@@ -47,10 +95,12 @@ export interface StudioHandlerUrls {
   studio_submit: string;
   export_nodes: string;
   import_nodes: string;
+  score_distribution: string;
 }
 
 export interface StudioInitialState {
   nodes: Record<string, Node>;
+  path_metrics: Record<string, PathMetrics>;
   enable_undo: boolean;
   enable_scoring: boolean;
   enable_reset_activity: boolean;
@@ -65,6 +115,7 @@ export interface StudioInitialState {
 export interface StudioMeta {
   authoring_help_html: string;
   import_template: { nodes: Node[] };
+  max_nodes: number;
 }
 
 export interface StudioPayload extends XBlockPayloadBase {
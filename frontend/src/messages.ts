@@ -21,6 +21,10 @@ export const studentMessages = defineMessages({
     id: "branching.student.errorResetActivity",
     defaultMessage: "Failed to reset activity",
   },
+  errorSavingProgress: {
+    id: "branching.student.errorSavingProgress",
+    defaultMessage: "Failed to save progress",
+  },
   scoreDisplay: {
     id: "branching.student.scoreDisplay",
     defaultMessage: "Score: {score}/{maxScore}",
@@ -174,7 +178,7 @@ export const studioMessages = defineMessages({
   },
   maxNodes: {
     id: "branching.studio.maxNodes",
-    defaultMessage: "Max 30 nodes",
+    defaultMessage: "Max {count} nodes",
   },
   nodeLabel: {
     id: "branching.studio.nodeLabel",
@@ -360,6 +364,22 @@ export const studioMessages = defineMessages({
     id: "branching.studio.gradeRangeHelp",
     defaultMessage: "Adjust the scale to set percentage ranges for each grade.",
   },
+  scoreDistribution: {
+    id: "branching.studio.scoreDistribution",
+    defaultMessage: "Score distribution (saved scenario)",
+  },
+  scoreDistributionSummary: {
+    id: "branching.studio.scoreDistributionSummary",
+    defaultMessage: "{paths} possible paths. Scores range from {min} to {max}; a learner choosing at random scores {expected} on average.",
+  },
+  scoreDistributionRangeShare: {
+    id: "branching.studio.scoreDistributionRangeShare",
+    defaultMessage: "{label}: {share}% of paths",
+  },
+  scoreDistributionEmpty: {
+    id: "branching.studio.scoreDistributionEmpty",
+    defaultMessage: "Save a scenario with at least one complete path to see its score distribution.",
+  },
   backgroundImage: {
     id: "branching.studio.backgroundImage",
     defaultMessage: "Background image",
@@ -0,0 +1,76 @@
+import { loadMfeConfig, MFE_CONFIG_TTL_MS } from "./mfeConfig";
+
+const CONFIG_URL = "/api/mfe_config/v1?mfe=learning";
+
+function respondWith(config: unknown, ok = true) {
+  return jest.fn(() => Promise.resolve({ ok, status: ok ? 200 : 404, json: () => Promise.resolve(config) } as Response));
+}
+
+// A new page: nothing shared in memory, sessionStorage kept.
+function newPage() {
+  delete (window as unknown as Record<string, unknown>).__branchingXBlockMfeConfig;
+}
+
+describe("loadMfeConfig", () => {
+  const originalFetch = global.fetch;
+
+  beforeEach(() => {
+    newPage();
+    window.sessionStorage.clear();
+  });
+
+  afterEach(() => {
+    global.fetch = originalFetch;
+    jest.restoreAllMocks();
+  });
+
+  it("makes one request for every block on the page", async () => {
+    global.fetch = respondWith({ PARAGON_THEME_URLS: {} });
+
+    const configs = await Promise.all(Array.from({ length: 10 }, () => loadMfeConfig(CONFIG_URL)));
+    const later = await loadMfeConfig(CONFIG_URL);
+
+    expect(global.fetch).toHaveBeenCalledTimes(1);
+    expect(configs.every((config) => config === configs[0])).toBe(true);
+    expect(later).toBe(configs[0]);
+  });
+
+  it("reuses the stored config on the next page until it expires", async () => {
+    global.fetch = respondWith({ PARAGON_THEME_URLS: { core: {} } });
+    const now = jest.spyOn(Date, "now").mockReturnValue(1000);
+    await loadMfeConfig(CONFIG_URL);
+
+    newPage();
+    expect(await loadMfeConfig(CONFIG_URL)).toEqual({ PARAGON_THEME_URLS: { core: {} } });
+    expect(global.fetch).toHaveBeenCalledTimes(1);
+
+    newPage();
+    now.mockReturnValue(1000 + MFE_CONFIG_TTL_MS);
+    await loadMfeConfig(CONFIG_URL);
+    expect(global.fetch).toHaveBeenCalledTimes(2);
+  });
+
+  it("resolves with null on failure and tries again for the next block", async () => {
+    global.fetch = respondWith({}, false);
+
+    expect(await loadMfeConfig(CONFIG_URL)).toBeNull();
+    expect(window.sessionStorage.length).toBe(0);
+
+    global.fetch = respondWith({ PARAGON_THEME_URLS: {} });
+    expect(await loadMfeConfig(CONFIG_URL)).toEqual({ PARAGON_THEME_URLS: {} });
+  });
+
+  it("still shares within the page when sessionStorage is unavailable", async () => {
+    global.fetch = respondWith({});
+    jest.spyOn(Storage.prototype, "getItem").mockImplementation(() => {
+      throw new Error("blocked");
+    });
+    jest.spyOn(Storage.prototype, "setItem").mockImplementation(() => {
+      throw new Error("blocked");
+    });
+
+    await Promise.all([loadMfeConfig(CONFIG_URL), loadMfeConfig(CONFIG_URL)]);
+
+    expect(global.fetch).toHaveBeenCalledTimes(1);
+  });
+});
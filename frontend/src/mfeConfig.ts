@@ -0,0 +1,75 @@
+// Page-wide loader for the platform's MFE config, which names the Paragon
+// theme stylesheets. A unit with several branching blocks, from one or both
+// bundles, makes one request: loads are shared through `window` while in
+// flight and once done, and the config is kept in sessionStorage for
+// `MFE_CONFIG_TTL_MS` so the next unit does not ask again.
+
+export type MfeConfig = Record<string, unknown>;
+
+// The views' preload hint skips configs stored here; keep both in step with
+// MFE_CONFIG_TTL_MS and MFE_CONFIG_STORAGE_PREFIX in branching_xblock.py.
+export const MFE_CONFIG_TTL_MS = 10 * 60 * 1000;
+const STORAGE_PREFIX = "branching-xblock:mfe-config:";
+const REGISTRY_KEY = "__branchingXBlockMfeConfig";
+
+interface StoredConfig {
+  fetchedAt: number;
+  config: MfeConfig;
+}
+
+function registry(): Map<string, Promise<MfeConfig | null>> {
+  const holder = window as unknown as Record<string, Map<string, Promise<MfeConfig | null>> | undefined>;
+  if (!holder[REGISTRY_KEY]) {
+    holder[REGISTRY_KEY] = new Map();
+  }
+  return holder[REGISTRY_KEY] as Map<string, Promise<MfeConfig | null>>;
+}
+
+// sessionStorage can be missing, full or blocked; the loader then only shares within the page.
+function readStored(url: string): MfeConfig | null {
+  try {
+    const stored = JSON.parse(window.sessionStorage.getItem(STORAGE_PREFIX + url) || "null") as StoredConfig | null;
+    if (stored && Date.now() - stored.fetchedAt < MFE_CONFIG_TTL_MS) {
+      return stored.config;
+    }
+  } catch {
+    // Treated as not stored.
+  }
+  return null;
+}
+
+function writeStored(url: string, config: MfeConfig): void {
+  try {
+    const stored: StoredConfig = { fetchedAt: Date.now(), config };
+    window.sessionStorage.setItem(STORAGE_PREFIX + url, JSON.stringify(stored));
+  } catch {
+    // Only the cross-page cache is lost.
+  }
+}
+
+async function fetchConfig(url: string): Promise<MfeConfig> {
+  const response = await fetch(url);
+  if (!response.ok) {
+    throw new Error(`MFE config request failed with status ${response.status}`);
+  }
+  const config = (await response.json()) as MfeConfig;
+  writeStored(url, config);
+  return config;
+}
+
+// Resolves with the MFE config at `url`, or null when it cannot be loaded.
+// A failed load is forgotten, so a block mounted later tries again.
+export function loadMfeConfig(url: string): Promise<MfeConfig | null> {
+  const loads = registry();
+  const shared = loads.get(url);
+  if (shared) {
+    return shared;
+  }
+  const stored = readStored(url);
+  const load = (stored ? Promise.resolve(stored) : fetchConfig(url)).catch(() => {
+    loads.delete(url);
+    return null;
+  });
+  loads.set(url, load);
+  return load;
+}
@@ -0,0 +1,76 @@
+import React from "react";
+import { act } from "@testing-library/react";
+import { makeXBlockInitializer, TIMING_PREFIX } from "./mountApp";
+
+const App: React.FC<{ label: string }> = ({ label }) => <p>{label}</p>;
+
+function mountPoint(): HTMLElement {
+  const element = document.createElement("div");
+  element.innerHTML = '<div data-react-root="true"></div>';
+  document.body.appendChild(element);
+  return element;
+}
+
+function stylesheetUrls(): string[] {
+  return Array.from(document.head.querySelectorAll("link[rel=stylesheet]")).map((link) => link.getAttribute("href") || "");
+}
+
+describe("makeXBlockInitializer", () => {
+  const originalFetch = global.fetch;
+  let resolveConfig: (config: unknown) => void;
+
+  beforeEach(() => {
+    document.head.innerHTML = "";
+    document.body.innerHTML = "";
+    window.sessionStorage.clear();
+    delete (window as unknown as Record<string, unknown>).__branchingXBlockMfeConfig;
+    global.fetch = jest.fn(() => new Promise((resolve) => {
+      resolveConfig = (config) => resolve({ ok: true, json: () => Promise.resolve(config) } as Response);
+    })) as jest.Mock;
+    performance.mark = jest.fn() as unknown as typeof performance.mark;
+    performance.measure = jest.fn() as unknown as typeof performance.measure;
+  });
+
+  afterEach(() => {
+    global.fetch = originalFetch;
+  });
+
+  it("renders before the MFE config arrives and inserts the theme before the block's styles", async () => {
+    const initializer = makeXBlockInitializer(App, () => ({ label: "Rendered" }));
+    const element = mountPoint();
+
+    await act(async () => {
+      initializer({ handlerUrl: () => "" }, element, {
+        mfe_config_api: "/api/mfe_config/v1",
+        style_urls: ["/static/block.css"],
+      });
+    });
+
+    expect(element.textContent).toBe("Rendered");
+    expect(stylesheetUrls()).toEqual(["/static/block.css"]);
+
+    await act(async () => {
+      resolveConfig({ PARAGON_THEME_URLS: { core: { urls: { default: "/theme/core.css" } } } });
+    });
+
+    expect(stylesheetUrls()[0]).toBe("/theme/core.css");
+    expect(stylesheetUrls()[stylesheetUrls().length - 1]).toBe("/static/block.css");
+  });
+
+  it("marks time to first render and to themed styles", async () => {
+    const initializer = makeXBlockInitializer(App, () => ({ label: "Timed" }));
+
+    await act(async () => {
+      initializer({ handlerUrl: () => "" }, mountPoint(), { mfe_config_api: "/api/mfe_config/v1" });
+    });
+    await act(async () => {
+      resolveConfig({});
+    });
+
+    const measures = (performance.measure as jest.Mock).mock.calls.map(([name]) => name);
+    expect(measures).toEqual([`${TIMING_PREFIX}:first-render`, `${TIMING_PREFIX}:styles`]);
+    const [, start, end] = (performance.measure as jest.Mock).mock.calls[0];
+    expect(start).toMatch(new RegExp(`^${TIMING_PREFIX}:\\d+:init$`));
+    expect(end).toMatch(new RegExp(`^${TIMING_PREFIX}:\\d+:first-render$`));
+  });
+});
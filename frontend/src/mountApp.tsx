@@ -1,6 +1,7 @@
-import React from "react";
+import React, { useEffect } from "react";
 import { createRoot } from "react-dom/client";
 import { SharedIntlProvider } from "./i18n";
+import { loadMfeConfig } from "./mfeConfig";
 
 export type XBlockElementLike = Element | { 0?: Element; length?: number; jquery?: string };
 
@@ -30,10 +31,21 @@ interface ThemeUrls {
 }
 
 export interface XBlockPayloadBase {
+  bundle_base_url?: string;
   mfe_config_api?: string;
   style_urls?: string[];
 }
 
+// Where webpack loads lazy chunks from. The views send the URL of the bundle
+// directory, since the runtime may serve each file from its own URL.
+declare let __webpack_public_path__: string;
+
+function setBundleBaseUrl(url?: string): void {
+  if (url) {
+    __webpack_public_path__ = url;
+  }
+}
+
 const PARAGON_CORE_CSS = "https://cdn.jsdelivr.net/npm/@openedx/paragon@23/dist/core.min.css";
 const PARAGON_LIGHT_CSS = "https://cdn.jsdelivr.net/npm/@openedx/paragon@23/dist/light.min.css";
 
@@ -54,24 +66,26 @@ async function getParagonStyles(mfeConfigApi?: string): Promise<string[]> {
     return [PARAGON_CORE_CSS, PARAGON_LIGHT_CSS];
   }
 
-  try {
-    const response = await fetch(mfeConfigApi);
-    const mfeConfig = await response.json();
-    const themeUrls = mfeConfig.PARAGON_THEME_URLS as ThemeUrls | undefined;
-    const variant = themeUrls?.default?.light;
-    return [
-      themeUrls?.core?.urls?.default || PARAGON_CORE_CSS,
-      themeUrls?.core?.urls?.brandOverride,
-      PARAGON_LIGHT_CSS,
-      variant ? themeUrls?.variants?.[variant]?.urls?.brandOverride : undefined,
-    ].filter(Boolean) as string[];
-  } catch (error) {
+  const mfeConfig = await loadMfeConfig(mfeConfigApi);
+  if (!mfeConfig) {
     // Keep Studio usable if the host platform does not expose the MFE config API.
     return [PARAGON_CORE_CSS, PARAGON_LIGHT_CSS];
   }
+  const themeUrls = mfeConfig.PARAGON_THEME_URLS as ThemeUrls | undefined;
+  const variant = themeUrls?.default?.light;
+  return [
+    themeUrls?.core?.urls?.default || PARAGON_CORE_CSS,
+    themeUrls?.core?.urls?.brandOverride,
+    PARAGON_LIGHT_CSS,
+    variant ? themeUrls?.variants?.[variant]?.urls?.brandOverride : undefined,
+  ].filter(Boolean) as string[];
 }
 
-function appendStylesheet(url: string): void {
+// Links to the block's own stylesheets carry this attribute; Paragon's are
+// inserted before them so the block's rules keep winning the cascade.
+const BLOCK_STYLE_ATTRIBUTE = "data-branching-xblock-style";
+
+function appendStylesheet(url: string, blockStyle = false): void {
   if (document.head.querySelector(`link[href="${url}"]`)) {
     return;
   }
@@ -79,35 +93,73 @@ function appendStylesheet(url: string): void {
   const link = document.createElement("link");
   link.rel = "stylesheet";
   link.href = url;
-  document.head.appendChild(link);
+  if (blockStyle) {
+    link.setAttribute(BLOCK_STYLE_ATTRIBUTE, "");
+  }
+  document.head.insertBefore(link, blockStyle ? null : document.head.querySelector(`link[${BLOCK_STYLE_ATTRIBUTE}]`));
 }
 
-async function loadStyles(data: unknown): Promise<void> {
-  const payload = (data || {}) as XBlockPayloadBase;
-  const styleUrls = payload.style_urls || [];
-
+async function loadParagonStyles(payload: XBlockPayloadBase): Promise<void> {
   const paragonStyleUrls = await getParagonStyles(payload.mfe_config_api);
+  paragonStyleUrls.forEach((url) => appendStylesheet(url));
+}
 
-  [...paragonStyleUrls, ...styleUrls].forEach(appendStylesheet);
+// User Timing marks and measures for each mounted block, named
+// `branching-xblock:<n>:<event>`, so time to first render and to themed
+// styles show up in the browser's performance tools and in RUM.
+export const TIMING_PREFIX = "branching-xblock";
+let mountCount = 0;
+
+function markTiming(name: string, start?: string): void {
+  if (typeof performance === "undefined" || typeof performance.mark !== "function") {
+    return;
+  }
+  performance.mark(name);
+  if (start && typeof performance.measure === "function") {
+    try {
+      performance.measure(`${TIMING_PREFIX}:${name.split(":").pop()}`, start, name);
+    } catch {
+      // The start mark was cleared by the host page.
+    }
+  }
 }
 
+// Calls `onRender` once, after the first commit of `children`.
+const FirstRender: React.FC<{ onRender: () => void; children: React.ReactNode }> = ({ onRender, children }) => {
+  useEffect(() => {
+    onRender();
+  }, []);
+  return React.createElement(React.Fragment, null, children);
+};
+
 export function makeXBlockInitializer<P>(
   AppComponent: React.ComponentType<P>,
   propsFactory: (runtime: XBlockRuntime, element: XBlockElementLike, data: unknown) => P,
 ) {
   return function initializer(runtime: XBlockRuntime, element: XBlockElementLike, data: unknown): void {
+    mountCount += 1;
+    const timing = `${TIMING_PREFIX}:${mountCount}`;
+    markTiming(`${timing}:init`);
+
+    const payload = (data || {}) as XBlockPayloadBase;
+    setBundleBaseUrl(payload.bundle_base_url);
+
     const el = toDomElement(element);
     const mountNode = el.querySelector('[data-react-root="true"]') || el;
     const props = propsFactory(runtime, element, data);
     const app = React.createElement(AppComponent as React.ComponentType<any>, props as any);
-    void loadStyles(data).finally(() => {
-      createRoot(mountNode).render(
-        React.createElement(
-          SharedIntlProvider,
-          null,
-          app,
-        ),
-      );
-    });
+
+    // Render straight away with the block's own styles; the Paragon theme
+    // needs a round trip to the MFE config API and is swapped in when it lands.
+    (payload.style_urls || []).forEach((url) => appendStylesheet(url, true));
+    void loadParagonStyles(payload).then(() => markTiming(`${timing}:styles`, `${timing}:init`));
+
+    createRoot(mountNode).render(
+      React.createElement(
+        SharedIntlProvider,
+        null,
+        React.createElement(FirstRender, { onRender: () => markTiming(`${timing}:first-render`, `${timing}:init`) }, app),
+      ),
+    );
   };
 }
@@ -24,7 +24,12 @@ function getCookie(name: string): string {
   return "";
 }
 
-export async function postJson<T>(url: string, payload: unknown = {}): Promise<T> {
+export interface PostOptions {
+  // Let the request outlive the page, e.g. when sent from a pagehide listener.
+  keepalive?: boolean;
+}
+
+export async function postJson<T>(url: string, payload: unknown = {}, options: PostOptions = {}): Promise<T> {
   const response = await fetch(url, {
     method: "POST",
     headers: {
@@ -33,6 +38,7 @@ export async function postJson<T>(url: string, payload: unknown = {}): Promise<T
     },
     body: JSON.stringify(payload),
     credentials: "same-origin",
+    keepalive: Boolean(options.keepalive),
   });
 
   let body: unknown;
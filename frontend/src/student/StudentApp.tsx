@@ -1,22 +1,42 @@
-import React, { useState, useCallback } from "react";
+import React, { Suspense, useState, useCallback, useEffect, useMemo, useRef } from "react";
 import { useIntl } from "react-intl";
 import { studentMessages } from "../messages";
-import { StudentInitialState, StudentHandlerUrls } from "../apiTypes";
+import {
+  StudentInitialState,
+  StudentHandlerUrls,
+  StudentStateUpdate,
+  StudentStateVersion,
+} from "../apiTypes";
 import * as api from "./api";
+import { applyPath, recoverPath, samePath, TraversalState } from "./traversal";
+import { mergeStateUpdate, missingNodeIds } from "./frontier";
+import { MediaPreloader, nextImageUrls, prefersReducedData } from "./preload";
 import MediaDisplay from "./components/MediaDisplay";
 import ContentDisplay from "./components/ContentDisplay";
 import HintCollapsible from "./components/HintCollapsible";
 import ChoiceForm from "./components/ChoiceForm";
 import ActionButtons from "./components/ActionButtons";
-import GradeReport from "./components/GradeReport";
 import TranscriptLink from "./components/TranscriptLink";
 
+// Only scored scenarios show a report, and only at the end: load it with the first leaf.
+const GradeReport = React.lazy(() => import(/* webpackChunkName: "grade-report" */ "./components/GradeReport"));
+
 interface StudentAppProps {
   handlerUrls: StudentHandlerUrls;
   initial_state: StudentInitialState;
+  deferPublishing?: boolean;
+  clientTraversal?: boolean;
 }
 
-const StudentApp: React.FC<StudentAppProps> = ({ handlerUrls, initial_state }) => {
+// How long client traversal collects moves before recording them.
+const PATH_SYNC_INTERVAL_MS = 10000;
+
+const StudentApp: React.FC<StudentAppProps> = ({
+  handlerUrls,
+  initial_state,
+  deferPublishing = false,
+  clientTraversal = false,
+}) => {
   const intl = useIntl();
   const [state, setState] = useState<StudentInitialState>(initial_state);
   const [loading, setLoading] = useState(false);
@@ -24,49 +44,248 @@ const StudentApp: React.FC<StudentAppProps> = ({ handlerUrls, initial_state }) =
   const [isReportVisible, setIsReportVisible] = useState(false);
   const [statusMessage, setStatusMessage] = useState("");
 
-  const replaceState = useCallback((newState: StudentInitialState) => {
-    setState(newState);
+  const version = useMemo<StudentStateVersion>(
+    () => ({ state_version: state.state_version, content_version: state.content_version }),
+    [state.state_version, state.content_version],
+  );
+
+  // Action handlers answer with either the full state or, in delta mode, only
+  // the learner fields that changed; merging handles both. Client traversal
+  // merges the fields it computed the same way.
+  const replaceState = useCallback((update: StudentStateUpdate | TraversalState) => {
+    setState((prev) => mergeStateUpdate(prev, update));
     setLoading(false);
     setIsReportVisible(false);
     setError(null);
     setStatusMessage(intl.formatMessage(studentMessages.contentUpdated));
   }, [intl]);
 
+  // Client traversal: moves are applied to the held state at once and the
+  // path is recorded with `submit_path` on a timer, at end nodes and when the
+  // learner leaves. `pathRef` holds null in the default mode, and when the
+  // recorded state does not determine a path; every move then goes to the server.
+  const stateRef = useRef(state);
+  stateRef.current = state;
+  const pathRef = useRef<number[] | null>(clientTraversal ? recoverPath(initial_state) : null);
+  const syncedPathRef = useRef<number[] | null>(pathRef.current);
+  const syncingRef = useRef(false);
+  const syncTimerRef = useRef<number | null>(null);
+
+  const syncPath = useCallback((keepalive = false) => {
+    const sentPath = pathRef.current;
+    if (sentPath === null || samePath(sentPath, syncedPathRef.current)) {
+      return;
+    }
+    if (syncingRef.current) {
+      if (keepalive) {
+        // The learner leaves before the sync in flight is answered: send the
+        // whole path now rather than drop the newest moves. It carries no
+        // state version, so the server ends up with this path whichever
+        // request arrives first; the one in flight is then stale.
+        api.submitPath(handlerUrls.submit_path, sentPath, undefined, { keepalive }).catch(() => undefined);
+      }
+      return;
+    }
+    if (syncTimerRef.current !== null) {
+      window.clearTimeout(syncTimerRef.current);
+      syncTimerRef.current = null;
+    }
+    syncingRef.current = true;
+    const held = stateRef.current;
+    api.submitPath(
+      handlerUrls.submit_path,
+      sentPath,
+      { state_version: held.state_version, content_version: held.content_version },
+      { keepalive },
+    )
+      .then((result) => {
+        syncingRef.current = false;
+        if (result.replayed) {
+          // The server kept its own state, e.g. after progress in another tab.
+          const merged = { ...stateRef.current, ...result };
+          pathRef.current = recoverPath(merged);
+          syncedPathRef.current = pathRef.current;
+          replaceState(result);
+        } else if (samePath(pathRef.current, sentPath)) {
+          // The server's answer carries the verified score and grade report.
+          syncedPathRef.current = sentPath;
+          setState((prev) => mergeStateUpdate(prev, result));
+        } else {
+          // The learner moved on meanwhile: keep the local state and record
+          // the newer path from the version the server is now at.
+          syncedPathRef.current = sentPath;
+          const serverVersion = {
+            state_version: result.state_version,
+            content_version: "content_version" in result ? result.content_version : stateRef.current.content_version,
+          };
+          stateRef.current = { ...stateRef.current, ...serverVersion };
+          setState((prev) => ({ ...prev, ...serverVersion }));
+          syncPath();
+        }
+      })
+      .catch((err) => {
+        syncingRef.current = false;
+        // The server rejected the path and kept the one recorded last: go
+        // back to it, so later syncs do not resend the rejected moves. When
+        // the held nodes cannot replay it, every move goes to the server.
+        const recorded = syncedPathRef.current;
+        const recordedState = recorded === null ? null : applyPath(stateRef.current, recorded);
+        pathRef.current = recordedState ? recorded : null;
+        if (recordedState) {
+          replaceState(recordedState);
+        }
+        setError(err.message || intl.formatMessage(studentMessages.errorSavingProgress));
+      });
+  }, [handlerUrls.submit_path, replaceState, intl]);
+
+  const traverse = useCallback((nextPath: number[]) => {
+    const next = applyPath(stateRef.current, nextPath);
+    if (!next) {
+      setError(intl.formatMessage(studentMessages.errorSelectingChoice));
+      return;
+    }
+    pathRef.current = nextPath;
+    replaceState(next);
+    if (next.has_completed) {
+      syncPath();
+    } else if (syncTimerRef.current === null) {
+      syncTimerRef.current = window.setTimeout(() => {
+        syncTimerRef.current = null;
+        syncPath();
+      }, PATH_SYNC_INTERVAL_MS);
+    }
+  }, [replaceState, syncPath, intl]);
+
+  useEffect(() => {
+    if (!clientTraversal) {
+      return undefined;
+    }
+    const flush = () => syncPath(true);
+    window.addEventListener("pagehide", flush);
+    return () => {
+      window.removeEventListener("pagehide", flush);
+      if (syncTimerRef.current !== null) {
+        window.clearTimeout(syncTimerRef.current);
+        syncTimerRef.current = null;
+      }
+    };
+  }, [clientTraversal, syncPath]);
+
   const handleSelectChoice = useCallback(
     (choiceIndex: number) => {
+      if (pathRef.current !== null) {
+        traverse([...pathRef.current, choiceIndex]);
+        return;
+      }
       setLoading(true);
       setError(null);
-      api.selectChoice(handlerUrls.select_choice, choiceIndex)
+      api.selectChoice(handlerUrls.select_choice, choiceIndex, version)
         .then(replaceState)
         .catch((err) => {
           setError(err.message || intl.formatMessage(studentMessages.errorSelectingChoice));
           setLoading(false);
         });
     },
-    [handlerUrls.select_choice, replaceState, intl],
+    [handlerUrls.select_choice, replaceState, intl, version, traverse],
   );
 
   const handleUndo = useCallback(() => {
+    if (pathRef.current !== null) {
+      traverse(pathRef.current.slice(0, -1));
+      return;
+    }
     setLoading(true);
     setError(null);
-    api.undoChoice(handlerUrls.undo_choice)
+    api.undoChoice(handlerUrls.undo_choice, version)
       .then(replaceState)
       .catch((err) => {
         setError(err.message || intl.formatMessage(studentMessages.errorUndoChoice));
         setLoading(false);
       });
-  }, [handlerUrls.undo_choice, replaceState, intl]);
+  }, [handlerUrls.undo_choice, replaceState, intl, version, traverse]);
 
   const handleReset = useCallback(() => {
+    if (pathRef.current !== null) {
+      traverse([]);
+      return;
+    }
     setLoading(true);
     setError(null);
-    api.resetActivity(handlerUrls.reset_activity)
+    api.resetActivity(handlerUrls.reset_activity, version)
       .then(replaceState)
       .catch((err) => {
         setError(err.message || intl.formatMessage(studentMessages.errorResetActivity));
         setLoading(false);
       });
-  }, [handlerUrls.reset_activity, replaceState, intl]);
+  }, [handlerUrls.reset_activity, replaceState, intl, version, traverse]);
+
+  // In deferred mode the server holds back grade and completion events after
+  // undo and reset; flush them when the learner leaves the unit.
+  useEffect(() => {
+    if (!deferPublishing) {
+      return undefined;
+    }
+    const flush = () => {
+      api.publishProgress(handlerUrls.publish_progress).catch(() => undefined);
+    };
+    window.addEventListener("pagehide", flush);
+    return () => window.removeEventListener("pagehide", flush);
+  }, [deferPublishing, handlerUrls.publish_progress]);
+
+  // Frontier mode: fetch the nodes the server did not send as the learner
+  // moves, so the held map always reaches `frontier_depth` choices ahead.
+  const requestedNodeIdsRef = useRef(new Set<string>());
+  useEffect(() => {
+    const fromNodeId = state.current_node?.id || state.start_node_id;
+    if (!state.frontier_depth || !fromNodeId) {
+      return;
+    }
+    const missing = missingNodeIds(state.nodes, fromNodeId, state.frontier_depth);
+    const nodeIds = missing.nodeIds.filter((nodeId) => !requestedNodeIdsRef.current.has(nodeId));
+    if (nodeIds.length === 0) {
+      return;
+    }
+    nodeIds.forEach((nodeId) => requestedNodeIdsRef.current.add(nodeId));
+    api.getNodes(handlerUrls.get_nodes, nodeIds, missing.depth)
+      .then((result) => {
+        setState((prev) => (
+          prev.content_version === result.content_version
+            ? { ...prev, nodes: { ...prev.nodes, ...result.nodes } }
+            : prev
+        ));
+      })
+      .catch(() => {
+        // Only a prefetch: the next move asks again.
+        nodeIds.forEach((nodeId) => requestedNodeIdsRef.current.delete(nodeId));
+      });
+  }, [
+    state.frontier_depth,
+    state.current_node,
+    state.start_node_id,
+    state.nodes,
+    state.content_version,
+    handlerUrls.get_nodes,
+  ]);
+
+  // Preload the images one choice ahead. Client traversal moves without the
+  // server, so it works them out from the held nodes.
+  const nextImages = useMemo(() => {
+    if (pathRef.current === null) {
+      return state.next_image_urls || [];
+    }
+    const fromNode = state.current_node || (state.start_node_id ? state.nodes[state.start_node_id] : null);
+    return nextImageUrls(state.nodes, fromNode);
+  }, [state.current_node, state.start_node_id, state.nodes, state.next_image_urls]);
+  const preloaderRef = useRef<MediaPreloader | null>(null);
+  useEffect(() => {
+    if (nextImages.length === 0 || prefersReducedData()) {
+      return;
+    }
+    if (!preloaderRef.current) {
+      preloaderRef.current = new MediaPreloader();
+    }
+    preloaderRef.current.preload(nextImages);
+  }, [nextImages]);
 
   const handleShowReport = useCallback(() => {
     setIsReportVisible(true);
@@ -157,12 +376,16 @@ const StudentApp: React.FC<StudentAppProps> = ({ handlerUrls, initial_state }) =
           </div>
         )}
 
-        <GradeReport
-          reportData={state.grade_report}
-          showResetInReport={showReset}
-          onReset={handleReset}
-          hidden={!showReport}
-        />
+        {showReportButton && (
+          <Suspense fallback={null}>
+            <GradeReport
+              reportData={state.grade_report}
+              showResetInReport={showReset}
+              onReset={handleReset}
+              hidden={!showReport}
+            />
+          </Suspense>
+        )}
       </div>
     </div>
   );
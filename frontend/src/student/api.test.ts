@@ -1,4 +1,4 @@
-import { selectChoice, undoChoice, resetActivity } from "../student/api";
+import { selectChoice, undoChoice, resetActivity, submitPath, getNodes, publishProgress } from "../student/api";
 import * as request from "../request";
 
 jest.mock("../request");
@@ -18,14 +18,20 @@ const mockState = {
   grade_ranges: [],
   display_name: "Test",
   current_node: null,
+  current_node_metrics: null,
+  next_image_urls: [],
   history: [],
   score_history: [],
   choice_history: [],
   has_completed: false,
   score: 0,
   grade_report: { score: 0, max_score: 100, percentage: 0, grade_label: "Fail", is_pass_style: false, detailed_scores: [] },
+  state_version: 0,
+  content_version: "abc123",
 };
 
+const mockVersion = { state_version: 3, content_version: "abc123" };
+
 describe("student API", () => {
   beforeEach(() => {
     jest.clearAllMocks();
@@ -34,7 +40,7 @@ describe("student API", () => {
   it("selectChoice calls postJson with choice_index", async () => {
     mockPostJson.mockResolvedValue({ success: true, ...mockState });
     const result = await selectChoice("/handler", 2);
-    expect(mockPostJson).toHaveBeenCalledWith("/handler", { choice_index: 2 });
+    expect(mockPostJson).toHaveBeenCalledWith("/handler", { choice_index: 2, request_token: expect.any(String) });
     expect(result).toHaveProperty("success", true);
   });
 
@@ -43,10 +49,10 @@ describe("student API", () => {
     await expect(selectChoice("/handler", 0)).rejects.toThrow("Failed to select choice");
   });
 
-  it("undoChoice calls postJson with empty object", async () => {
+  it("undoChoice calls postJson with only a request token", async () => {
     mockPostJson.mockResolvedValue({ success: true, ...mockState });
     const result = await undoChoice("/handler");
-    expect(mockPostJson).toHaveBeenCalledWith("/handler", {});
+    expect(mockPostJson).toHaveBeenCalledWith("/handler", { request_token: expect.any(String) });
     expect(result).toHaveProperty("success", true);
   });
 
@@ -55,10 +61,115 @@ describe("student API", () => {
     await expect(undoChoice("/handler")).rejects.toThrow("Failed to undo choice");
   });
 
-  it("resetActivity calls postJson with empty object", async () => {
+  it("resetActivity calls postJson with only a request token", async () => {
     mockPostJson.mockResolvedValue({ success: true, ...mockState });
     const result = await resetActivity("/handler");
-    expect(mockPostJson).toHaveBeenCalledWith("/handler", {});
+    expect(mockPostJson).toHaveBeenCalledWith("/handler", { request_token: expect.any(String) });
     expect(result).toHaveProperty("success", true);
   });
+
+  it("requests a delta response when given the held state version", async () => {
+    const delta = { success: true, delta: true, current_node: null, history: [], has_completed: false, score: 0, state_version: 4 };
+    mockPostJson.mockResolvedValue(delta as any);
+    const result = await selectChoice("/handler", 1, mockVersion);
+    expect(mockPostJson).toHaveBeenCalledWith("/handler", {
+      choice_index: 1,
+      request_token: expect.any(String),
+      response_mode: "delta",
+      state_version: 3,
+      expected_state_version: 3,
+      content_version: "abc123",
+    });
+    expect(result).toHaveProperty("delta", true);
+  });
+
+  it("undoChoice and resetActivity forward the held state version", async () => {
+    mockPostJson.mockResolvedValue({ success: true, ...mockState });
+    await undoChoice("/undo", mockVersion);
+    await resetActivity("/reset", mockVersion);
+    const expectedBody = {
+      request_token: expect.any(String),
+      response_mode: "delta",
+      state_version: 3,
+      expected_state_version: 3,
+      content_version: "abc123",
+    };
+    expect(mockPostJson).toHaveBeenCalledWith("/undo", expectedBody);
+    expect(mockPostJson).toHaveBeenCalledWith("/reset", expectedBody);
+  });
+
+  it("sends a new request token with every action", async () => {
+    mockPostJson.mockResolvedValue({ success: true, ...mockState });
+    await selectChoice("/handler", 0);
+    await selectChoice("/handler", 0);
+    const [first, second] = mockPostJson.mock.calls.map(([, body]) => (body as { request_token: string }).request_token);
+    expect(first).toBeTruthy();
+    expect(first).not.toEqual(second);
+  });
+
+  it("retries an action that got no answer with the same request token", async () => {
+    mockPostJson
+      .mockRejectedValueOnce(new TypeError("Failed to fetch"))
+      .mockResolvedValueOnce({ success: true, replayed: true, ...mockState });
+    const result = await selectChoice("/handler", 1, mockVersion);
+    expect(mockPostJson).toHaveBeenCalledTimes(2);
+    const [first, second] = mockPostJson.mock.calls.map(([, body]) => body);
+    expect(second).toEqual(first);
+    expect(result).toHaveProperty("replayed", true);
+  });
+
+  it("retries an action once after a gateway error", async () => {
+    const unavailable = Object.assign(new Error("Request failed with status 503"), { status: 503 });
+    mockPostJson.mockRejectedValue(unavailable);
+    await expect(undoChoice("/handler")).rejects.toBe(unavailable);
+    expect(mockPostJson).toHaveBeenCalledTimes(2);
+  });
+
+  it("does not retry an action the server answered", async () => {
+    const forbidden = Object.assign(new Error("Request failed with status 403"), { status: 403 });
+    mockPostJson.mockRejectedValueOnce(forbidden);
+    await expect(resetActivity("/handler")).rejects.toBe(forbidden);
+    expect(mockPostJson).toHaveBeenCalledTimes(1);
+  });
+
+  it("submitPath sends the choice indices with the held state version", async () => {
+    mockPostJson.mockResolvedValue({ success: true, ...mockState });
+    await submitPath("/path", [0, 2], mockVersion, { keepalive: true });
+    expect(mockPostJson).toHaveBeenCalledWith("/path", {
+      choice_indices: [0, 2],
+      request_token: expect.any(String),
+      response_mode: "delta",
+      state_version: 3,
+      expected_state_version: 3,
+      content_version: "abc123",
+    }, { keepalive: true });
+  });
+
+  it("submitPath throws with the server's error", async () => {
+    mockPostJson.mockResolvedValue({ success: false, error: "Invalid choice index at step 2" } as any);
+    await expect(submitPath("/path", [0, 9])).rejects.toThrow("Invalid choice index at step 2");
+  });
+
+  it("getNodes asks for node IDs and a depth", async () => {
+    mockPostJson.mockResolvedValue({ success: true, nodes: mockState.nodes, content_version: "abc123" } as any);
+    const result = await getNodes("/nodes", ["node-1"], 2);
+    expect(mockPostJson).toHaveBeenCalledWith("/nodes", { node_ids: ["node-1"], depth: 2 });
+    expect(result.nodes).toEqual(mockState.nodes);
+  });
+
+  it("getNodes throws on failure", async () => {
+    mockPostJson.mockResolvedValue({ success: false } as any);
+    await expect(getNodes("/nodes", ["node-1"])).rejects.toThrow("Failed to load nodes");
+  });
+
+  it("publishProgress posts with keepalive so it survives leaving the page", async () => {
+    mockPostJson.mockResolvedValue({ success: true } as any);
+    await publishProgress("/publish");
+    expect(mockPostJson).toHaveBeenCalledWith("/publish", {}, { keepalive: true });
+  });
+
+  it("publishProgress throws on failure", async () => {
+    mockPostJson.mockResolvedValue({ success: false } as any);
+    await expect(publishProgress("/publish")).rejects.toThrow("Failed to publish progress");
+  });
 });
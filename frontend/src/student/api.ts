@@ -1,28 +1,136 @@
-import { postJson } from "../request";
-import { StudentInitialState } from "../apiTypes";
+import { postJson, PostOptions } from "../request";
+import { StudentStateUpdate, StudentStateVersion } from "../apiTypes";
+import { Node } from "../types";
 
-type ActionResponse = { success: boolean; error?: string } & StudentInitialState;
+// `replayed` is set when the server recognised a retried or stale action and
+// answered with the current state without applying it again.
+export type ActionResponse = { success: boolean; error?: string; replayed?: boolean } & StudentStateUpdate;
 
-export async function selectChoice(url: string, choiceIndex: number): Promise<StudentInitialState> {
-  const result = await postJson<ActionResponse>(url, { choice_index: choiceIndex });
+// A fresh token per action; `postAction` sends it again if it retries.
+export function newRequestToken(): string {
+  if (typeof crypto !== "undefined" && typeof crypto.randomUUID === "function") {
+    return crypto.randomUUID();
+  }
+  return `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`;
+}
+
+// Without a version the server answers with the full learner state. With one,
+// the action is only applied if the server is still at that version, so a
+// double click does not move the learner twice.
+function actionRequest(version?: StudentStateVersion): Record<string, unknown> {
+  const request: Record<string, unknown> = { request_token: newRequestToken() };
+  if (!version) {
+    return request;
+  }
+  return {
+    ...request,
+    response_mode: "delta",
+    state_version: version.state_version,
+    expected_state_version: version.state_version,
+    content_version: version.content_version,
+  };
+}
+
+// Statuses of a gateway or server that was briefly unavailable.
+const RETRIED_STATUSES = [502, 503, 504];
+
+// fetch rejects with a TypeError when no answer arrived at all.
+function isTransient(err: unknown): boolean {
+  if (err instanceof TypeError) {
+    return true;
+  }
+  const status = (err as { status?: unknown } | null)?.status;
+  return typeof status === "number" && RETRIED_STATUSES.indexOf(status) >= 0;
+}
+
+// Posts one learner action. A request that got no answer, or only a
+// transient error, is sent once more with the same body and so the same
+// request token: the server answers a retried action with the state it
+// produced the first time instead of applying it again.
+async function postAction(
+  url: string,
+  body: Record<string, unknown>,
+  options?: PostOptions,
+): Promise<ActionResponse> {
+  const send = () => (options ? postJson<ActionResponse>(url, body, options) : postJson<ActionResponse>(url, body));
+  try {
+    return await send();
+  } catch (err) {
+    if (!isTransient(err)) {
+      throw err;
+    }
+    return send();
+  }
+}
+
+export async function selectChoice(
+  url: string,
+  choiceIndex: number,
+  version?: StudentStateVersion,
+): Promise<StudentStateUpdate> {
+  const result = await postAction(url, { choice_index: choiceIndex, ...actionRequest(version) });
   if (!result.success) {
     throw new Error(result.error || "Failed to select choice");
   }
   return result;
 }
 
-export async function undoChoice(url: string): Promise<StudentInitialState> {
-  const result = await postJson<ActionResponse>(url, {});
+export async function undoChoice(url: string, version?: StudentStateVersion): Promise<StudentStateUpdate> {
+  const result = await postAction(url, actionRequest(version));
   if (!result.success) {
     throw new Error(result.error || "Failed to undo choice");
   }
   return result;
 }
 
-export async function resetActivity(url: string): Promise<StudentInitialState> {
-  const result = await postJson<ActionResponse>(url, {});
+export async function resetActivity(url: string, version?: StudentStateVersion): Promise<StudentStateUpdate> {
+  const result = await postAction(url, actionRequest(version));
   if (!result.success) {
     throw new Error(result.error || "Failed to reset activity");
   }
   return result;
 }
+
+// Records the whole path taken in client traversal mode: the index of the
+// choice made at each node from the start node. `replayed` in the answer
+// means the server kept its own state, e.g. after progress in another tab.
+export async function submitPath(
+  url: string,
+  choiceIndices: number[],
+  version?: StudentStateVersion,
+  options: PostOptions = {},
+): Promise<ActionResponse> {
+  const result = await postAction(url, { choice_indices: choiceIndices, ...actionRequest(version) }, options);
+  if (!result.success) {
+    throw new Error(result.error || "Failed to save progress");
+  }
+  return result;
+}
+
+// Fetches nodes ahead of the learner in frontier mode: `nodeIds` and the
+// nodes up to `depth` choices beyond them.
+export async function getNodes(
+  url: string,
+  nodeIds: string[],
+  depth = 0,
+): Promise<{ nodes: Record<string, Node>; content_version: string }> {
+  const result = await postJson<{
+    success: boolean;
+    error?: string;
+    nodes: Record<string, Node>;
+    content_version: string;
+  }>(url, { node_ids: nodeIds, depth });
+  if (!result.success) {
+    throw new Error(result.error || "Failed to load nodes");
+  }
+  return result;
+}
+
+// Publishes the grade and completion the server held back in deferred mode.
+// Sent as the learner leaves the unit, so the request must survive the page.
+export async function publishProgress(url: string): Promise<void> {
+  const result = await postJson<{ success: boolean; error?: string }>(url, {}, { keepalive: true });
+  if (!result.success) {
+    throw new Error(result.error || "Failed to publish progress");
+  }
+}
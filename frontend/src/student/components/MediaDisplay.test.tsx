@@ -1,5 +1,5 @@
 import React from "react";
-import { render, screen } from "../../test/helpers";
+import { render, screen, waitFor } from "../../test/helpers";
 import MediaDisplay from "./MediaDisplay";
 import { Node } from "../../types";
 
@@ -40,11 +40,12 @@ describe("MediaDisplay", () => {
     expect(container.querySelector(".bx-image-composite")).toBeNull();
   });
 
-  it("renders a video even when a shared background is set (not masked)", () => {
+  it("renders a video even when a shared background is set (not masked)", async () => {
     const node = makeNode({ media: { type: "video", url: "http://example.com/v.mp4", alt: "" } });
     const { container } = render(<MediaDisplay node={node} {...baseProps} />);
 
-    expect(container.querySelector("video")).not.toBeNull();
+    // The players are a lazy chunk.
+    await waitFor(() => expect(container.querySelector("video")).not.toBeNull());
     expect(container.querySelector(".bx-image-composite")).toBeNull();
   });
 
@@ -1,10 +1,9 @@
-import React from "react";
-import { useIntl } from "react-intl";
-import { studentMessages } from "../../messages";
+import React, { Suspense } from "react";
 import { Node } from "../../types";
-import { normalizeEmbedUrl, isMediaFile } from "../mediaUtils";
 import { notifyHostRemeasure } from "../../notifyHostRemeasure";
 
+const MediaPlayer = React.lazy(() => import(/* webpackChunkName: "media-player" */ "./MediaPlayer"));
+
 interface MediaDisplayProps {
   node: Node;
   background_image_url: string;
@@ -22,9 +21,6 @@ const MediaDisplay: React.FC<MediaDisplayProps> = ({
   overlayEnabled,
   contentHtml,
 }) => {
-  const intl = useIntl();
-  const embeddedMediaTitle = intl.formatMessage(studentMessages.embeddedMedia);
-
   const media = node.media || { type: "", url: "" };
   const mediaType = media.type;
   const mediaUrl = media.url || "";
@@ -87,36 +83,17 @@ const MediaDisplay: React.FC<MediaDisplayProps> = ({
     />
   );
 
-  const renderAudio = () => (
-    <audio src={mediaUrl} controls />
+  const renderPlayer = (type: "audio" | "video") => (
+    <Suspense fallback={null}>
+      <MediaPlayer type={type} url={mediaUrl} />
+    </Suspense>
   );
 
-  const renderVideo = () => {
-    if (!mediaUrl) {
-      return null;
-    }
-    if (isMediaFile(mediaUrl)) {
-      return <video src={mediaUrl} controls onLoadedMetadata={notifyHostRemeasure} />;
-    }
-    const embedUrl = normalizeEmbedUrl(mediaUrl) || mediaUrl;
-    return (
-      <div className="bx-media-embed">
-        <iframe
-          src={embedUrl}
-          title={embeddedMediaTitle}
-          allow="autoplay; fullscreen"
-          allowFullScreen
-          sandbox="allow-scripts allow-same-origin allow-popups allow-forms"
-        />
-      </div>
-    );
-  };
-
   let mediaContent: React.ReactNode = null;
   if (mediaType === "video" && mediaUrl) {
-    mediaContent = renderVideo();
+    mediaContent = renderPlayer("video");
   } else if (mediaType === "audio" && mediaUrl) {
-    mediaContent = renderAudio();
+    mediaContent = renderPlayer("audio");
   } else if (mediaType === "single_image" && mediaUrl) {
     mediaContent = renderSingleImage();
   } else if (mediaType === "image") {
@@ -0,0 +1,37 @@
+import React from "react";
+import { useIntl } from "react-intl";
+import { studentMessages } from "../../messages";
+import { normalizeEmbedUrl, isMediaFile } from "../mediaUtils";
+import { notifyHostRemeasure } from "../../notifyHostRemeasure";
+
+interface MediaPlayerProps {
+  type: "audio" | "video";
+  url: string;
+}
+
+// Audio and video nodes are the exception in most scenarios, so their players
+// live in their own chunk that MediaDisplay loads on first use.
+const MediaPlayer: React.FC<MediaPlayerProps> = ({ type, url }) => {
+  const intl = useIntl();
+
+  if (type === "audio") {
+    return <audio src={url} controls />;
+  }
+  if (isMediaFile(url)) {
+    return <video src={url} controls onLoadedMetadata={notifyHostRemeasure} />;
+  }
+  const embedUrl = normalizeEmbedUrl(url) || url;
+  return (
+    <div className="bx-media-embed">
+      <iframe
+        src={embedUrl}
+        title={intl.formatMessage(studentMessages.embeddedMedia)}
+        allow="autoplay; fullscreen"
+        allowFullScreen
+        sandbox="allow-scripts allow-same-origin allow-popups allow-forms"
+      />
+    </div>
+  );
+};
+
+export default MediaPlayer;
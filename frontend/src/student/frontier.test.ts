@@ -0,0 +1,54 @@
+import { StudentInitialState } from "../apiTypes";
+import { mergeStateUpdate, missingNodeIds } from "../student/frontier";
+
+const nodes = {
+  A: { id: "A", choices: [{ target_node_id: "B" }, { target_node_id: "C" }] },
+  B: { id: "B", choices: [{ target_node_id: "D" }, { target_node_id: "A" }] },
+  C: { id: "C", choices: [{ target_node_id: "D" }] },
+  D: { id: "D", choices: [{ target_node_id: "E" }] },
+  E: { id: "E", choices: [] },
+};
+
+function held(...nodeIds: Array<keyof typeof nodes>) {
+  return Object.fromEntries(nodeIds.map((nodeId) => [nodeId, nodes[nodeId]]));
+}
+
+describe("missingNodeIds", () => {
+  it("finds the nodes within the frontier that are not held", () => {
+    expect(missingNodeIds(held("A", "B"), "A", 1)).toEqual({ nodeIds: ["C"], depth: 0 });
+    expect(missingNodeIds(held("A", "B"), "A", 3)).toEqual({ nodeIds: ["C", "D"], depth: 2 });
+  });
+
+  it("is empty when the frontier is held", () => {
+    expect(missingNodeIds(held("A", "B", "C"), "A", 1)).toEqual({ nodeIds: [], depth: 0 });
+    expect(missingNodeIds(held("E"), "E", 2)).toEqual({ nodeIds: [], depth: 0 });
+  });
+});
+
+describe("mergeStateUpdate", () => {
+  const prev = {
+    nodes: held("A", "B"),
+    frontier_depth: 1,
+    current_node: nodes.A,
+    content_version: "v1",
+  } as unknown as StudentInitialState;
+
+  it("keeps the held nodes and adds the new current node", () => {
+    const merged = mergeStateUpdate(prev, { current_node: nodes.C });
+
+    expect(Object.keys(merged.nodes).sort()).toEqual(["A", "B", "C"]);
+    expect(merged.current_node).toBe(nodes.C);
+  });
+
+  it("replaces the nodes when the content changed", () => {
+    const merged = mergeStateUpdate(prev, { nodes: held("D"), content_version: "v2" });
+
+    expect(Object.keys(merged.nodes)).toEqual(["D"]);
+  });
+
+  it("replaces the nodes outside frontier mode", () => {
+    const merged = mergeStateUpdate({ ...prev, frontier_depth: null }, { nodes: held("C") });
+
+    expect(Object.keys(merged.nodes)).toEqual(["C"]);
+  });
+});
@@ -0,0 +1,59 @@
+import { Node } from "../types";
+import { StudentInitialState } from "../apiTypes";
+
+// Frontier mode: the server only sends the start node and the nodes up to
+// `frontier_depth` choices ahead of the learner. The learner UI keeps every
+// node it receives and fetches the rest of the frontier with `get_nodes` as
+// the learner moves.
+
+// Merges a learner state update. In frontier mode the held nodes are kept,
+// and the new current node joins them, unless the content changed.
+export function mergeStateUpdate(
+  prev: StudentInitialState,
+  update: Partial<StudentInitialState>,
+): StudentInitialState {
+  const merged = { ...prev, ...update };
+  if (!prev.frontier_depth || merged.content_version !== prev.content_version) {
+    return merged;
+  }
+  const currentNode = merged.current_node;
+  merged.nodes = {
+    ...prev.nodes,
+    ...(update.nodes || {}),
+    ...(currentNode?.id ? { [currentNode.id]: currentNode } : {}),
+  };
+  return merged;
+}
+
+// The IDs of nodes within `depth` choices of `fromNodeId` that are not held
+// yet, and how many choices beyond them to fetch to fill the frontier.
+export function missingNodeIds(
+  nodes: Record<string, Node>,
+  fromNodeId: string,
+  depth: number,
+): { nodeIds: string[]; depth: number } {
+  const nodeIds: string[] = [];
+  let beyond = 0;
+  const seen = new Set([fromNodeId]);
+  let level = [fromNodeId];
+  for (let distance = 1; distance <= depth && level.length > 0; distance += 1) {
+    const nextLevel: string[] = [];
+    for (const nodeId of level) {
+      for (const choice of nodes[nodeId]?.choices || []) {
+        const targetNodeId = choice.target_node_id;
+        if (!targetNodeId || seen.has(targetNodeId)) {
+          continue;
+        }
+        seen.add(targetNodeId);
+        if (nodes[targetNodeId]) {
+          nextLevel.push(targetNodeId);
+        } else {
+          nodeIds.push(targetNodeId);
+          beyond = Math.max(beyond, depth - distance);
+        }
+      }
+    }
+    level = nextLevel;
+  }
+  return { nodeIds, depth: beyond };
+}
@@ -5,6 +5,8 @@ import StudentApp from "./StudentApp";
 interface StudentAppProps {
   handlerUrls: StudentHandlerUrls;
   initial_state: StudentInitialState;
+  deferPublishing: boolean;
+  clientTraversal: boolean;
 }
 
 function propsFactory(runtime: XBlockRuntime, _element: XBlockElementLike, data: unknown): StudentAppProps {
@@ -16,10 +18,18 @@ function propsFactory(runtime: XBlockRuntime, _element: XBlockElementLike, data:
       || runtime.handlerUrl(_element, "undo_choice"),
     reset_activity: payload.handler_urls?.reset_activity
       || runtime.handlerUrl(_element, "reset_activity"),
+    publish_progress: payload.handler_urls?.publish_progress
+      || runtime.handlerUrl(_element, "publish_progress"),
+    submit_path: payload.handler_urls?.submit_path
+      || runtime.handlerUrl(_element, "submit_path"),
+    get_nodes: payload.handler_urls?.get_nodes
+      || runtime.handlerUrl(_element, "get_nodes"),
   };
   return {
     handlerUrls,
     initial_state: payload.initial_state,
+    deferPublishing: Boolean(payload.defer_publishing),
+    clientTraversal: Boolean(payload.client_traversal),
   };
 }
 
@@ -0,0 +1,88 @@
+import { MediaPreloader, nextImageUrls, nodeImageUrls, prefersReducedData } from "../student/preload";
+
+const nodes = {
+  A: { id: "A", choices: [{ target_node_id: "B" }, { target_node_id: "C" }, { target_node_id: "missing" }] },
+  B: { id: "B", media: { type: "single_image", url: " /b.png " } },
+  C: { id: "C", media: { type: "image" }, left_image_url: "/b.png", right_image_url: "/c.png" },
+  D: { id: "D", media: { type: "video", url: "/d.mp4" } },
+};
+
+// A loader whose loads finish when the test says so.
+function deferredLoader() {
+  const pending: Array<{ url: string; finish: (bytes: number) => void }> = [];
+  const load = (url: string) => new Promise<number>((resolve) => {
+    pending.push({ url, finish: resolve });
+  });
+  return { pending, load };
+}
+
+const flush = () => new Promise((resolve) => setTimeout(resolve, 0));
+
+describe("nodeImageUrls and nextImageUrls", () => {
+  it("list the images of a node like the server", () => {
+    expect(nodeImageUrls(nodes.B)).toEqual(["/b.png"]);
+    expect(nodeImageUrls(nodes.C)).toEqual(["/b.png", "/c.png"]);
+    expect(nodeImageUrls(nodes.D)).toEqual([]);
+    expect(nodeImageUrls(undefined)).toEqual([]);
+  });
+
+  it("list the images one choice away", () => {
+    expect(nextImageUrls(nodes, nodes.A)).toEqual(["/b.png", "/c.png"]);
+    expect(nextImageUrls(nodes, null)).toEqual([]);
+  });
+});
+
+describe("MediaPreloader", () => {
+  it("loads at most `concurrency` images at once", async () => {
+    const { pending, load } = deferredLoader();
+    const preloader = new MediaPreloader(load, 2, 1000);
+
+    preloader.preload(["/1.png", "/2.png", "/3.png"]);
+    expect(pending.map(({ url }) => url)).toEqual(["/1.png", "/2.png"]);
+
+    pending[0].finish(10);
+    await flush();
+    expect(pending.map(({ url }) => url)).toEqual(["/1.png", "/2.png", "/3.png"]);
+  });
+
+  it("stops once the byte budget is spent", async () => {
+    const { pending, load } = deferredLoader();
+    const preloader = new MediaPreloader(load, 1, 100);
+
+    preloader.preload(["/1.png", "/2.png"]);
+    pending[0].finish(150);
+    await flush();
+
+    expect(pending).toHaveLength(1);
+    expect(preloader.bytesSpent).toBe(150);
+  });
+
+  it("drops waiting images when the learner moves on and never loads an image twice", async () => {
+    const { pending, load } = deferredLoader();
+    const preloader = new MediaPreloader(load, 1, 1000);
+
+    preloader.preload(["/1.png", "/2.png"]);
+    preloader.preload(["/1.png", "/3.png"]);
+    pending[0].finish(10);
+    await flush();
+
+    expect(pending.map(({ url }) => url)).toEqual(["/1.png", "/3.png"]);
+  });
+});
+
+describe("prefersReducedData", () => {
+  const originalMatchMedia = window.matchMedia;
+
+  afterEach(() => {
+    window.matchMedia = originalMatchMedia;
+  });
+
+  it("follows the prefers-reduced-data media query", () => {
+    window.matchMedia = jest.fn().mockReturnValue({ matches: true }) as unknown as typeof window.matchMedia;
+    expect(prefersReducedData()).toBe(true);
+    expect(window.matchMedia).toHaveBeenCalledWith("(prefers-reduced-data: reduce)");
+
+    window.matchMedia = jest.fn().mockReturnValue({ matches: false }) as unknown as typeof window.matchMedia;
+    expect(prefersReducedData()).toBe(false);
+  });
+});
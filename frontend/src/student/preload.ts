@@ -0,0 +1,104 @@
+import { Node } from "../types";
+
+// Images of the nodes one choice away are fetched while the learner reads
+// the current node, so moving on does not show a blank frame. The server
+// lists them as `next_image_urls`; client traversal, which moves without
+// the server, computes them with `nextImageUrls`.
+
+// Images preloaded at once, so preloading does not compete with the current node.
+export const PRELOAD_CONCURRENCY = 2;
+// Bytes the learner UI may spend on images the learner might never see.
+export const PRELOAD_BYTE_BUDGET = 5 * 1024 * 1024;
+// Counted against the budget when the browser does not report a transfer size.
+const ESTIMATED_IMAGE_BYTES = 256 * 1024;
+
+// Mirrors branching_xblock.scenario.node_image_urls.
+export function nodeImageUrls(node: Node | undefined): string[] {
+  const media = node?.media;
+  let candidates: Array<string | undefined> = [];
+  if (media?.type === "single_image") {
+    candidates = [media.url];
+  } else if (media?.type === "image") {
+    candidates = [node?.left_image_url, node?.right_image_url];
+  }
+  const urls = candidates.map((url) => (url || "").trim()).filter(Boolean);
+  return Array.from(new Set(urls));
+}
+
+export function nextImageUrls(nodes: Record<string, Node>, node: Node | null): string[] {
+  const urls = (node?.choices || []).flatMap((choice) => nodeImageUrls(nodes[choice.target_node_id || ""]));
+  return Array.from(new Set(urls));
+}
+
+// Learners who asked the browser to save data get no speculative downloads.
+export function prefersReducedData(): boolean {
+  if (typeof window === "undefined") {
+    return true;
+  }
+  const connection = (navigator as Navigator & { connection?: { saveData?: boolean } }).connection;
+  if (connection?.saveData) {
+    return true;
+  }
+  return typeof window.matchMedia === "function" && window.matchMedia("(prefers-reduced-data: reduce)").matches;
+}
+
+function transferredBytes(url: string): number {
+  if (typeof performance === "undefined" || typeof performance.getEntriesByName !== "function") {
+    return ESTIMATED_IMAGE_BYTES;
+  }
+  const entries = performance.getEntriesByName(new URL(url, document.baseURI).href) as PerformanceResourceTiming[];
+  const size = entries.length > 0 ? entries[entries.length - 1].encodedBodySize : 0;
+  // Cross-origin images without Timing-Allow-Origin report 0.
+  return size > 0 ? size : ESTIMATED_IMAGE_BYTES;
+}
+
+// Loads an image into the browser cache and resolves with the bytes it cost.
+export function loadImage(url: string): Promise<number> {
+  return new Promise((resolve) => {
+    const image = new Image();
+    image.decoding = "async";
+    image.onload = () => resolve(transferredBytes(url));
+    image.onerror = () => resolve(ESTIMATED_IMAGE_BYTES);
+    image.src = url;
+  });
+}
+
+export class MediaPreloader {
+  private queue: string[] = [];
+
+  private requested = new Set<string>();
+
+  private active = 0;
+
+  private spentBytes = 0;
+
+  constructor(
+    private readonly load: (url: string) => Promise<number> = loadImage,
+    private readonly concurrency = PRELOAD_CONCURRENCY,
+    private readonly byteBudget = PRELOAD_BYTE_BUDGET,
+  ) {}
+
+  // Replaces what is waiting with `urls`: once the learner moved on, the
+  // images ahead of the previous node are no longer worth fetching.
+  preload(urls: string[]): void {
+    this.queue = urls.filter((url) => !this.requested.has(url));
+    this.pump();
+  }
+
+  get bytesSpent(): number {
+    return this.spentBytes;
+  }
+
+  private pump(): void {
+    while (this.active < this.concurrency && this.queue.length > 0 && this.spentBytes < this.byteBudget) {
+      const url = this.queue.shift() as string;
+      this.requested.add(url);
+      this.active += 1;
+      this.load(url).catch(() => ESTIMATED_IMAGE_BYTES).then((bytes) => {
+        this.spentBytes += bytes;
+        this.active -= 1;
+        this.pump();
+      });
+    }
+  }
+}
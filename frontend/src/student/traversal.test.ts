@@ -0,0 +1,160 @@
+import { StudentInitialState } from "../apiTypes";
+import { applyPath, buildGradeReport, cleanChoiceScore, recoverPath, samePath } from "../student/traversal";
+
+// A → B → D with a side branch B → C; every choice scores.
+function makeState(overrides: Partial<StudentInitialState> = {}): StudentInitialState {
+  return {
+    nodes: {
+      A: { id: "A", content: "Start", choices: [{ text: "to B", target_node_id: "B", score: 1 }] },
+      B: {
+        id: "B",
+        content: "Middle",
+        choices: [
+          { text: "to C", target_node_id: "C", score: 2 },
+          { text: " to D ", target_node_id: "D", score: 3 },
+        ],
+      },
+      C: { id: "C", content: "Side", choices: [{ text: "back to B", target_node_id: "B", score: 0 }] },
+      D: { id: "D", content: "End", choices: [] },
+    },
+    start_node_id: "A",
+    enable_undo: true,
+    enable_scoring: true,
+    enable_reset_activity: true,
+    background_image_url: "",
+    background_image_alt_text: "",
+    background_image_is_decorative: false,
+    max_score: 8,
+    grade_ranges: [
+      { label: "Fail", start: 0, end: 49 },
+      { label: "Pass", start: 50, end: 100 },
+    ],
+    current_node: null,
+    current_node_metrics: null,
+    next_image_urls: [],
+    history: [],
+    score_history: [],
+    choice_history: [],
+    has_completed: false,
+    score: 0,
+    grade_report: { score: 0, max_score: 8, percentage: 0, grade_label: "Fail", is_pass_style: false, detailed_scores: [] },
+    state_version: 0,
+    content_version: "abc123",
+    ...overrides,
+  };
+}
+
+describe("applyPath", () => {
+  it("replays a path from the start node like submit_path", () => {
+    const result = applyPath(makeState(), [0, 1]);
+
+    expect(result?.current_node?.id).toBe("D");
+    expect(result?.history).toEqual(["A", "B"]);
+    expect(result?.score_history).toEqual([1, 3]);
+    expect(result?.choice_history).toEqual([
+      { source_node_id: "A", choice_text: "to B", awarded_points: 1 },
+      { source_node_id: "B", choice_text: "to D", awarded_points: 3 },
+    ]);
+    expect(result?.has_completed).toBe(true);
+    expect(result?.score).toBe(4);
+    expect(result?.grade_report).toMatchObject({ percentage: 50, grade_label: "Pass", is_pass_style: true });
+  });
+
+  it("starts at the start node for an empty path", () => {
+    const result = applyPath(makeState(), []);
+
+    expect(result?.current_node?.id).toBe("A");
+    expect(result?.has_completed).toBe(false);
+    expect(result?.score).toBe(0);
+  });
+
+  it("only keeps history and scores when undo and scoring are on", () => {
+    const result = applyPath(makeState({ enable_undo: false, enable_scoring: false }), [0, 0]);
+
+    expect(result?.current_node?.id).toBe("C");
+    expect(result?.history).toEqual([]);
+    expect(result?.score_history).toEqual([]);
+    expect(result?.choice_history).toEqual([]);
+  });
+
+  it("rejects paths the server would reject", () => {
+    expect(applyPath(makeState(), [0, 5])).toBeNull();
+    expect(applyPath(makeState({ start_node_id: null }), [])).toBeNull();
+
+    const state = makeState();
+    state.nodes.A.choices = [{ text: "to B", target_node_id: "B", score: 2.5 }];
+    expect(applyPath(state, [0])).toBeNull();
+  });
+});
+
+describe("buildGradeReport", () => {
+  it("rounds halves to even like the server", () => {
+    const settings = { max_score: 8, grade_ranges: [{ label: "Fail", start: 0, end: 100 }] };
+
+    expect(buildGradeReport({ ...settings, max_score: 200 }, [5], []).percentage).toBe(2);
+    expect(buildGradeReport(settings, [1], []).percentage).toBe(12);
+    expect(buildGradeReport(settings, [3], []).percentage).toBe(38);
+  });
+
+  it("clamps the percentage and falls back to the first range", () => {
+    const settings = { max_score: 2, grade_ranges: [{ label: "Low", start: 0, end: 10 }, { label: "Mid", start: 20, end: 90 }] };
+
+    expect(buildGradeReport(settings, [5], [])).toMatchObject({ percentage: 100, grade_label: "Low", is_pass_style: false });
+    expect(buildGradeReport({ ...settings, max_score: 0 }, [5], [])).toMatchObject({ percentage: 0, max_score: 0 });
+  });
+
+  it("lists the scored choices that have text", () => {
+    const report = buildGradeReport(makeState(), [1, 0], [
+      { source_node_id: "A", choice_text: " to B ", awarded_points: 1 },
+      { source_node_id: "B", choice_text: "", awarded_points: 0 },
+    ]);
+
+    expect(report.detailed_scores).toEqual([{ choice_text: "to B", awarded_points: 1 }]);
+  });
+});
+
+describe("recoverPath", () => {
+  it("is empty before any progress", () => {
+    expect(recoverPath(makeState())).toEqual([]);
+  });
+
+  it("recovers the path from the node history", () => {
+    const recorded = applyPath(makeState(), [0, 0, 0, 1]);
+
+    expect(recoverPath(makeState({ ...recorded }))).toEqual([0, 0, 0, 1]);
+  });
+
+  it("recovers the path from the scored choices without undo", () => {
+    const state = makeState({ enable_undo: false });
+    const recorded = applyPath(state, [0, 0]);
+
+    expect(recoverPath({ ...state, ...recorded })).toEqual([0, 0]);
+  });
+
+  it("gives up when the recorded state does not determine the path", () => {
+    const state = makeState({ enable_undo: false, enable_scoring: false });
+
+    expect(recoverPath({ ...state, current_node: state.nodes.C })).toBeNull();
+    expect(recoverPath(makeState({ current_node: makeState().nodes.D, history: ["A", "C"] }))).toBeNull();
+  });
+});
+
+describe("samePath", () => {
+  it("compares choice indices", () => {
+    expect(samePath([0, 1], [0, 1])).toBe(true);
+    expect(samePath([0, 1], [0])).toBe(false);
+    expect(samePath([], null)).toBe(false);
+  });
+});
+
+describe("cleanChoiceScore", () => {
+  it("mirrors the server's score rules", () => {
+    expect(cleanChoiceScore(undefined)).toBe(0);
+    expect(cleanChoiceScore(" ")).toBe(0);
+    expect(cleanChoiceScore("7")).toBe(7);
+    expect(cleanChoiceScore(4.0)).toBe(4);
+    expect(cleanChoiceScore(101)).toBeNull();
+    expect(cleanChoiceScore("-1")).toBeNull();
+    expect(cleanChoiceScore(true)).toBeNull();
+  });
+});
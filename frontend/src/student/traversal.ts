@@ -0,0 +1,195 @@
+import { ChoiceRecord, GradeReport, StudentInitialState } from "../apiTypes";
+
+// Client traversal: the learner UI moves through the scenario itself and
+// records the path with `submit_path`. A path is the index of the choice
+// taken at each node, starting from the start node. Everything here mirrors
+// what the server computes for the same path; the server's answer to
+// `submit_path` replaces it, so scoring stays server-verified.
+
+// The learner fields a path determines.
+export type TraversalState = Pick<
+  StudentInitialState,
+  | "current_node"
+  | "current_node_metrics"
+  | "history"
+  | "score_history"
+  | "choice_history"
+  | "has_completed"
+  | "score"
+  | "grade_report"
+>;
+
+type GradeSettings = Pick<StudentInitialState, "max_score" | "grade_ranges">;
+
+// Mirrors BranchingXBlock._clean_choice_score: blank is 0, anything but a
+// whole number from 0 to 100 is invalid.
+export function cleanChoiceScore(raw: unknown): number | null {
+  if (raw === null || raw === undefined || (typeof raw === "string" && raw.trim() === "")) {
+    return 0;
+  }
+  let score: number;
+  if (typeof raw === "number") {
+    score = raw;
+  } else if (typeof raw === "string" && /^-?\d+$/.test(raw.trim())) {
+    score = parseInt(raw.trim(), 10);
+  } else {
+    return null;
+  }
+  return Number.isInteger(score) && score >= 0 && score <= 100 ? score : null;
+}
+
+// Python's round() rounds halves to the even neighbour.
+function roundHalfEven(value: number): number {
+  const floor = Math.floor(value);
+  const fraction = value - floor;
+  if (fraction > 0.5) {
+    return floor + 1;
+  }
+  if (fraction < 0.5) {
+    return floor;
+  }
+  return floor % 2 === 0 ? floor : floor + 1;
+}
+
+// Mirrors BranchingXBlock._build_grade_report.
+export function buildGradeReport(
+  settings: GradeSettings,
+  scoreHistory: number[],
+  choiceHistory: ChoiceRecord[],
+): GradeReport {
+  const ranges = settings.grade_ranges || [];
+  const maxScore = Math.trunc(Number(settings.max_score) || 0);
+  const score = scoreHistory.reduce((total, points) => total + points, 0);
+  const percentage = maxScore > 0 ? Math.max(0, Math.min(100, (score / maxScore) * 100)) : 0;
+  const roundedPercentage = roundHalfEven(percentage);
+
+  let matchedIndex = 0;
+  for (let index = 0; index < ranges.length; index += 1) {
+    const { start = 0, end = 0 } = ranges[index];
+    if (start <= roundedPercentage && roundedPercentage <= end) {
+      matchedIndex = index;
+      break;
+    }
+  }
+
+  const detailedScores = choiceHistory
+    .filter((entry) => String(entry.choice_text ?? "").trim())
+    .map((entry) => ({
+      choice_text: String(entry.choice_text).trim(),
+      awarded_points: Number.isInteger(entry.awarded_points) ? entry.awarded_points : 0,
+    }));
+
+  return {
+    score,
+    max_score: maxScore,
+    percentage: roundedPercentage,
+    grade_label: ranges[matchedIndex]?.label || "",
+    is_pass_style: matchedIndex !== 0,
+    detailed_scores: detailedScores,
+  };
+}
+
+// Replays `path` from the start node under the same rules as `submit_path`.
+// Returns null for a path the server would reject.
+export function applyPath(state: StudentInitialState, path: number[]): TraversalState | null {
+  const startNodeId = state.start_node_id;
+  if (!startNodeId || !state.nodes[startNodeId]) {
+    return null;
+  }
+
+  let nodeId = startNodeId;
+  const history: string[] = [];
+  const scoreHistory: number[] = [];
+  const choiceHistory: ChoiceRecord[] = [];
+  for (const choiceIndex of path) {
+    const choice = (state.nodes[nodeId].choices || [])[choiceIndex];
+    const targetNodeId = choice?.target_node_id || "";
+    if (!choice || !state.nodes[targetNodeId]) {
+      return null;
+    }
+    if (state.enable_scoring) {
+      const points = cleanChoiceScore(choice.score);
+      if (points === null) {
+        return null;
+      }
+      scoreHistory.push(points);
+      choiceHistory.push({ source_node_id: nodeId, choice_text: (choice.text || "").trim(), awarded_points: points });
+    }
+    if (state.enable_undo) {
+      history.push(nodeId);
+    }
+    nodeId = targetNodeId;
+  }
+
+  const currentNode = state.nodes[nodeId];
+  return {
+    current_node: currentNode,
+    // Path metrics are not part of the node map; the next server answer fills them in.
+    current_node_metrics: null,
+    history,
+    score_history: scoreHistory,
+    choice_history: choiceHistory,
+    has_completed: (currentNode.choices || []).length === 0,
+    score: scoreHistory.reduce((total, points) => total + points, 0),
+    grade_report: buildGradeReport(state, scoreHistory, choiceHistory),
+  };
+}
+
+// Finds the choices that lead from the start node to the learner's recorded
+// position, from the node history (undo on) or the scored choices (scoring
+// on). Returns null when the recorded state does not determine the path.
+export function recoverPath(state: StudentInitialState): number[] | null {
+  const startNodeId = state.start_node_id;
+  const currentNodeId = state.current_node?.id || startNodeId;
+  if (!startNodeId || !state.nodes[startNodeId]) {
+    return null;
+  }
+
+  const scored = state.enable_scoring ? state.choice_history || [] : [];
+  const matchesRecord = (step: number, nodeId: string, choiceIndex: number): boolean => {
+    const record = scored[step];
+    const choice = (state.nodes[nodeId]?.choices || [])[choiceIndex];
+    return !record || (
+      record.source_node_id === nodeId
+      && record.choice_text === (choice?.text || "").trim()
+      && record.awarded_points === cleanChoiceScore(choice?.score)
+    );
+  };
+
+  const path: number[] = [];
+  if (state.enable_undo && (state.history || []).length > 0) {
+    const visited = [...state.history, currentNodeId];
+    for (let step = 0; step < visited.length - 1; step += 1) {
+      const choices = state.nodes[visited[step]]?.choices || [];
+      const choiceIndex = choices.findIndex((choice, index) => (
+        choice.target_node_id === visited[step + 1] && matchesRecord(step, visited[step], index)
+      ));
+      if (choiceIndex < 0) {
+        return null;
+      }
+      path.push(choiceIndex);
+    }
+  } else if (scored.length > 0) {
+    let nodeId = startNodeId;
+    for (let step = 0; step < scored.length; step += 1) {
+      const choices = state.nodes[nodeId]?.choices || [];
+      const choiceIndex = choices.findIndex((_choice, index) => matchesRecord(step, nodeId, index));
+      if (choiceIndex < 0) {
+        return null;
+      }
+      path.push(choiceIndex);
+      nodeId = choices[choiceIndex].target_node_id || "";
+    }
+  }
+
+  const replayed = applyPath(state, path);
+  if (!replayed || replayed.current_node?.id !== currentNodeId) {
+    return null;
+  }
+  return path;
+}
+
+export function samePath(left: number[] | null, right: number[] | null): boolean {
+  return left !== null && right !== null
+    && left.length === right.length && left.every((choiceIndex, step) => choiceIndex === right[step]);
+}
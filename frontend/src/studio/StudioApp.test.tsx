@@ -17,6 +17,7 @@ const baseProps = {
     studio_submit: "/save",
     export_nodes: "/export",
     import_nodes: "/import",
+    score_distribution: "/score_distribution",
   },
   initial_state: {
     nodes: {
@@ -47,6 +48,22 @@ const baseProps = {
         transcript_url: "",
       },
     },
+    path_metrics: {
+      "node-1": {
+        end_reachable: true,
+        best_remaining_score: 0,
+        min_remaining_score: 0,
+        shortest_remaining_depth: 1,
+        longest_remaining_depth: 1,
+      },
+      "node-2": {
+        end_reachable: true,
+        best_remaining_score: 0,
+        min_remaining_score: 0,
+        shortest_remaining_depth: 0,
+        longest_remaining_depth: 0,
+      },
+    },
     enable_undo: false,
     enable_scoring: false,
     enable_reset_activity: false,
@@ -63,6 +80,7 @@ const baseProps = {
   meta: {
     authoring_help_html: "<p>Help content</p>",
     import_template: { nodes: [] },
+    max_nodes: 30,
   },
   runtime,
 };
@@ -70,6 +88,7 @@ const baseProps = {
 describe("StudioApp", () => {
   beforeEach(() => {
     jest.clearAllMocks();
+    mockApi.fetchScoreDistribution.mockResolvedValue({ success: false, error: "unavailable" });
   });
 
   it("surfaces a save error when the request fails", async () => {
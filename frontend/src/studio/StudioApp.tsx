@@ -3,7 +3,7 @@ import { useIntl } from "react-intl";
 import { studioMessages } from "../messages";
 import { StudioHandlerUrls, StudioInitialState, StudioMeta } from "../apiTypes";
 import { XBlockRuntime } from "../mountApp";
-import { SavePayload } from "./api";
+import { SavePayload, ScoreDistributionSuccess } from "./api";
 import * as api from "./api";
 import {
   studioReducer,
@@ -58,6 +58,14 @@ const StudioApp: React.FC<StudioAppProps> = ({ handlerUrls, initial_state, meta,
   }, []);
 
   const [isSaving, setIsSaving] = React.useState(false);
+  const [scoreDistribution, setScoreDistribution] = React.useState<ScoreDistributionSuccess | null>(null);
+
+  // The distribution describes the saved scenario; saving closes the editor, so load it once.
+  useEffect(() => {
+    api.fetchScoreDistribution(handlerUrls.score_distribution)
+      .then((res) => setScoreDistribution(res.success ? res : null))
+      .catch(() => setScoreDistribution(null));
+  }, [handlerUrls.score_distribution]);
 
   // Helpers
   const pendingDeleteCount = state.draftNodes.filter((n) => n.pending_delete).length;
@@ -274,6 +282,8 @@ const StudioApp: React.FC<StudioAppProps> = ({ handlerUrls, initial_state, meta,
             onChangeGradeRanges={(ranges) =>
               dispatch({ type: "UPDATE_SETTINGS_FIELD", field: "grade_ranges", value: ranges })
             }
+            scoreDistribution={scoreDistribution}
+            maxScore={initial_state.max_score}
           />
         </div>
 
@@ -291,6 +301,7 @@ const StudioApp: React.FC<StudioAppProps> = ({ handlerUrls, initial_state, meta,
               nodeIdx={nodeIdx}
               validation={state.validation}
               savedNodesExist={state.savedNodesExist}
+              maxNodes={meta.max_nodes}
               onSelectNode={(nodeId) => {
                 dispatch({ type: "SELECT_NODE", nodeId });
               }}
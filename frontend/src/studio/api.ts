@@ -36,6 +36,25 @@ export interface ImportResult {
   error?: string;
 }
 
+// Path counts are strings: they can exceed what a JavaScript number holds exactly.
+export interface ScoreDistributionSuccess {
+  success: true;
+  total_paths: string;
+  min_score: number | null;
+  max_score: number | null;
+  expected_score: number | null;
+  totals: number[];
+  path_counts: string[];
+  path_shares: number[];
+}
+
+export interface ScoreDistributionError {
+  success: false;
+  error: string;
+}
+
+export type ScoreDistributionResult = ScoreDistributionSuccess | ScoreDistributionError;
+
 export async function saveScenario(url: string, payload: SavePayload): Promise<SaveResult> {
   return postJson<SaveResult>(url, payload);
 }
@@ -47,3 +66,7 @@ export async function exportNodes(url: string): Promise<ExportResult> {
 export async function importNodes(url: string, fileContent: unknown): Promise<ImportResult> {
   return postJson<ImportResult>(url, fileContent);
 }
+
+export async function fetchScoreDistribution(url: string): Promise<ScoreDistributionResult> {
+  return postJson<ScoreDistributionResult>(url, {});
+}
@@ -12,6 +12,7 @@ interface NodeListSidebarProps {
   onSelect: (nodeId: string) => void;
   onToggleDelete: (nodeId: string) => void;
   onAddNode: () => void;
+  maxNodes: number;
 }
 
 const NodeListSidebar: React.FC<NodeListSidebarProps> = ({
@@ -21,10 +22,11 @@ const NodeListSidebar: React.FC<NodeListSidebarProps> = ({
   onSelect,
   onToggleDelete,
   onAddNode,
+  maxNodes,
 }) => {
   const intl = useIntl();
   const activeNodes = nodes.filter((n) => !n.pending_delete);
-  const atLimit = activeNodes.length >= 30;
+  const atLimit = activeNodes.length >= maxNodes;
 
   const incomingReferenceCounts = new Map<string, number>();
   nodes.forEach((node) => incomingReferenceCounts.set(node.id, 0));
@@ -55,7 +57,7 @@ const NodeListSidebar: React.FC<NodeListSidebarProps> = ({
         {intl.formatMessage(studioMessages.addNode)}
       </Button>
       <div className="bx-node-limit">
-        {intl.formatMessage(studioMessages.maxNodes)}
+        {intl.formatMessage(studioMessages.maxNodes, { count: maxNodes })}
       </div>
       <div className="bx-node-list" data-role="node-list">
         {nodeList}
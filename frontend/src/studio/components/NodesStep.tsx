@@ -11,6 +11,7 @@ interface NodesStepProps {
   nodeIdx: number;
   validation: ValidationState;
   savedNodesExist: boolean;
+  maxNodes: number;
   onSelectNode: (nodeId: string) => void;
   onToggleDelete: (nodeId: string) => void;
   onAddNode: () => void;
@@ -31,6 +32,7 @@ const NodesStep: React.FC<NodesStepProps> = ({
   nodeIdx,
   validation,
   savedNodesExist,
+  maxNodes,
   onSelectNode,
   onToggleDelete,
   onAddNode,
@@ -51,6 +53,7 @@ const NodesStep: React.FC<NodesStepProps> = ({
       onSelect={onSelectNode}
       onToggleDelete={onToggleDelete}
       onAddNode={onAddNode}
+      maxNodes={maxNodes}
     />
 
     <div className="bx-nodes-main">
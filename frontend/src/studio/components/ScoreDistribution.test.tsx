@@ -0,0 +1,43 @@
+import React from "react";
+import { render, screen } from "../../test/helpers";
+import ScoreDistribution, { gradeRangeShares } from "./ScoreDistribution";
+
+const gradeRanges = [
+  { label: "Fail", start: 0, end: 49 },
+  { label: "Pass", start: 50, end: 100 },
+];
+
+const distribution = {
+  success: true as const,
+  total_paths: "4",
+  min_score: 10,
+  max_score: 40,
+  expected_score: 25,
+  totals: [10, 20, 40],
+  path_counts: ["1", "1", "2"],
+  path_shares: [0.25, 0.25, 0.5],
+};
+
+describe("ScoreDistribution", () => {
+  it("buckets path shares by grade range percentage", () => {
+    expect(gradeRangeShares(distribution, gradeRanges, 40)).toEqual([0.5, 0.5]);
+  });
+
+  it("renders the summary and one share per grade range", () => {
+    render(<ScoreDistribution distribution={distribution} gradeRanges={gradeRanges} maxScore={40} />);
+    expect(screen.getByText(/4 possible paths/)).toBeInTheDocument();
+    expect(screen.getByText("Fail: 50% of paths")).toBeInTheDocument();
+    expect(screen.getByText("Pass: 50% of paths")).toBeInTheDocument();
+  });
+
+  it("explains when the saved scenario has no complete path", () => {
+    render(
+      <ScoreDistribution
+        distribution={{ ...distribution, total_paths: "0", totals: [], path_counts: [], path_shares: [] }}
+        gradeRanges={gradeRanges}
+        maxScore={0}
+      />,
+    );
+    expect(screen.getByText(/at least one complete path/)).toBeInTheDocument();
+  });
+});
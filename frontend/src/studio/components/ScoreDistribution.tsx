@@ -0,0 +1,74 @@
+import React from "react";
+import { useIntl } from "react-intl";
+import { studioMessages } from "../../messages";
+import { GradeRange } from "../../types";
+import { ScoreDistributionSuccess } from "../api";
+
+interface ScoreDistributionProps {
+  distribution: ScoreDistributionSuccess;
+  gradeRanges: GradeRange[];
+  maxScore: number;
+}
+
+// Share of paths whose total lands in each grade range, rounding the
+// percentage the same way the learner grade report does.
+export function gradeRangeShares(
+  distribution: ScoreDistributionSuccess,
+  gradeRanges: GradeRange[],
+  maxScore: number,
+): number[] {
+  const shares = gradeRanges.map(() => 0);
+  distribution.totals.forEach((total, index) => {
+    const raw = maxScore > 0 ? (total / maxScore) * 100 : 0;
+    const percentage = Math.round(Math.max(0, Math.min(100, raw)));
+    const rangeIndex = gradeRanges.findIndex(
+      (range) => (range.start ?? 0) <= percentage && percentage <= (range.end ?? 100),
+    );
+    shares[rangeIndex >= 0 ? rangeIndex : 0] += distribution.path_shares[index];
+  });
+  return shares;
+}
+
+const ScoreDistribution: React.FC<ScoreDistributionProps> = ({ distribution, gradeRanges, maxScore }) => {
+  const intl = useIntl();
+
+  if (distribution.total_paths === "0") {
+    return (
+      <p className="bx-help bx-score-distribution" data-role="score-distribution">
+        {intl.formatMessage(studioMessages.scoreDistributionEmpty)}
+      </p>
+    );
+  }
+
+  const shares = gradeRangeShares(distribution, gradeRanges, maxScore);
+  return (
+    <div className="bx-score-distribution" data-role="score-distribution">
+      <h4 className="bx-score-distribution__title">
+        {intl.formatMessage(studioMessages.scoreDistribution)}
+      </h4>
+      <p className="bx-help bx-score-distribution__summary">
+        {intl.formatMessage(studioMessages.scoreDistributionSummary, {
+          paths: distribution.total_paths,
+          min: distribution.min_score,
+          max: distribution.max_score,
+          expected: intl.formatNumber(distribution.expected_score ?? 0, { maximumFractionDigits: 1 }),
+        })}
+      </p>
+      <ul className="bx-score-distribution__ranges">
+        {gradeRanges.map((range, index) => {
+          const share = Math.round(shares[index] * 100);
+          return (
+            <li key={`${range.label}-${range.start}`} className="bx-score-distribution__range">
+              <span className="bx-score-distribution__label">
+                {intl.formatMessage(studioMessages.scoreDistributionRangeShare, { label: range.label, share })}
+              </span>
+              <span className="bx-score-distribution__bar" style={{ width: `${share}%` }} />
+            </li>
+          );
+        })}
+      </ul>
+    </div>
+  );
+};
+
+export default ScoreDistribution;
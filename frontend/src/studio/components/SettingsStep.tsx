@@ -5,6 +5,8 @@ import { studioMessages } from "../../messages";
 import { DraftSettings, ValidationState } from "../reducer";
 import { GradeRange } from "../../types";
 import GradeRangeSlider from "./GradeRangeSlider";
+import ScoreDistribution from "./ScoreDistribution";
+import { ScoreDistributionSuccess } from "../api";
 
 interface SettingsStepProps {
   settings: DraftSettings;
@@ -12,6 +14,8 @@ interface SettingsStepProps {
   authoringHelpHtml: string;
   onUpdateField: (field: string, value: unknown) => void;
   onChangeGradeRanges: (ranges: GradeRange[]) => void;
+  scoreDistribution?: ScoreDistributionSuccess | null;
+  maxScore?: number;
 }
 
 const SettingsStep: React.FC<SettingsStepProps> = ({
@@ -20,6 +24,8 @@ const SettingsStep: React.FC<SettingsStepProps> = ({
   authoringHelpHtml,
   onUpdateField,
   onChangeGradeRanges,
+  scoreDistribution = null,
+  maxScore = 0,
 }) => {
   const intl = useIntl();
 
@@ -91,6 +97,13 @@ const SettingsStep: React.FC<SettingsStepProps> = ({
         {validation.settingsFieldErrors.grade_ranges && (
           <div className="bx-field-error">{validation.settingsFieldErrors.grade_ranges}</div>
         )}
+        {scoreDistribution && (
+          <ScoreDistribution
+            distribution={scoreDistribution}
+            gradeRanges={settings.grade_ranges}
+            maxScore={maxScore}
+          />
+        )}
       </div>
 
       <h3 className="bx-section-title">
@@ -45,6 +45,16 @@ export interface Node {
   overlay_text?: boolean;
   transcript_url?: string;
 }
+/**
+ * Pre-computed metrics for the paths from a node to an end node.
+ */
+export interface PathMetrics {
+  end_reachable?: boolean;
+  best_remaining_score?: number | null;
+  min_remaining_score?: number | null;
+  shortest_remaining_depth?: number | null;
+  longest_remaining_depth?: number | null;
+}
 /**
  * Top-level scenario payload stored in the XBlock's scenario_data field.
  */
@@ -53,6 +63,9 @@ export interface ScenarioData {
     [k: string]: Node;
   };
   start_node_id?: string | null;
+  path_metrics?: {
+    [k: string]: PathMetrics;
+  };
 }
 /**
  * Scenario-level settings (mirrors XBlock content fields).
@@ -2,23 +2,82 @@ const path = require("path");
 const MiniCssExtractPlugin = require("mini-css-extract-plugin");
 const TerserPlugin = require("terser-webpack-plugin");
 
-module.exports = function webpackConfig(_, argv) {
-  const mode = argv.mode || "production";
+const OUTPUT_PATH = path.resolve(__dirname, "../branching_xblock/static/bundles");
+
+// Size budgets for production builds, in bytes before compression. A build
+// that exceeds them fails; raise them deliberately, not to get a build through.
+const MAX_ENTRYPOINT_SIZE = 420 * 1024;
+const MAX_ASSET_SIZE = 350 * 1024;
+
+// Libraries every entry needs and that change less often than our code.
+const VENDOR_MODULES = /[\\/]node_modules[\\/](react|react-dom|scheduler|react-intl|@formatjs|intl-messageformat|@openedx[\\/]paragon)[\\/]/;
+
+// Writes `<build>/manifest.json`: per entry, the JS and CSS files to load,
+// in order, relative to the bundle directory. student_view and studio_view
+// read it to find the content-hashed file names.
+class BundleManifestPlugin {
+  constructor(filename) {
+    this.filename = filename;
+  }
+
+  apply(compiler) {
+    const { Compilation, sources } = compiler.webpack;
+    compiler.hooks.thisCompilation.tap("BundleManifestPlugin", (compilation) => {
+      compilation.hooks.processAssets.tap(
+        { name: "BundleManifestPlugin", stage: Compilation.PROCESS_ASSETS_STAGE_REPORT },
+        () => {
+          const manifest = {};
+          compilation.entrypoints.forEach((entrypoint, name) => {
+            const files = entrypoint.getFiles();
+            manifest[name] = {
+              js: files.filter((file) => file.endsWith(".js")),
+              css: files.filter((file) => file.endsWith(".css")),
+            };
+          });
+          compilation.emitAsset(this.filename, new sources.RawSource(`${JSON.stringify(manifest, null, 2)}\n`));
+        },
+      );
+    });
+  }
+}
+
+// `build` is "modern" (ES2017, served by default) or "legacy" (ES5, served
+// when the BRANCHING_XBLOCK_LEGACY_BUNDLES Django setting is set).
+function buildConfig(build, mode) {
+  const otherBuild = build === "modern" ? "legacy" : "modern";
+  const production = mode === "production";
 
   return {
+    name: build,
     mode,
-    target: ["web", "es5"],
-    devtool: mode === "development" ? "source-map" : false,
+    target: ["web", build === "modern" ? "es2017" : "es5"],
+    devtool: production ? false : "source-map",
     entry: {
       student: path.resolve(__dirname, "src/student/index.tsx"),
       studio: path.resolve(__dirname, "src/studio/index.tsx"),
     },
     output: {
-      filename: "[name].js",
-      path: path.resolve(__dirname, "../branching_xblock/static/bundles"),
-      clean: true,
+      filename: `${build}/[name].[contenthash:8].js`,
+      chunkFilename: `${build}/[name].[contenthash:8].js`,
+      path: OUTPUT_PATH,
+      // The views pass `bundle_base_url` for lazy chunks; "auto" covers runtimes where they cannot.
+      publicPath: "auto",
+      // Both builds write to OUTPUT_PATH; each leaves the other's directory alone.
+      clean: { keep: new RegExp(`^${otherBuild}/`) },
     },
     optimization: {
+      moduleIds: "deterministic",
+      runtimeChunk: "single",
+      splitChunks: {
+        cacheGroups: {
+          vendor: {
+            test: VENDOR_MODULES,
+            name: "vendor",
+            chunks: "all",
+            priority: 10,
+          },
+        },
+      },
       minimizer: [
         new TerserPlugin({
           extractComments: false,
@@ -34,8 +93,10 @@ module.exports = function webpackConfig(_, argv) {
           use: {
             loader: "ts-loader",
             options: {
-              compilerOptions: { noEmit: false },
+              compilerOptions: { noEmit: false, target: build === "modern" ? "es2017" : "es5" },
               onlyCompileBundledFiles: true,
+              // Each build needs its own TypeScript instance for its target.
+              instance: build,
             },
           },
         },
@@ -48,8 +109,26 @@ module.exports = function webpackConfig(_, argv) {
       ],
     },
     resolve: { extensions: [".tsx", ".ts", ".jsx", ".js"] },
-    plugins: [new MiniCssExtractPlugin({ filename: "[name].css" })],
-    performance: false,
+    plugins: [
+      new MiniCssExtractPlugin({
+        filename: `${build}/[name].[contenthash:8].css`,
+        chunkFilename: `${build}/[name].[contenthash:8].css`,
+      }),
+      new BundleManifestPlugin(`${build}/manifest.json`),
+    ],
+    performance: production
+      ? {
+        hints: "error",
+        maxEntrypointSize: MAX_ENTRYPOINT_SIZE,
+        maxAssetSize: MAX_ASSET_SIZE,
+        assetFilter: (file) => /\.(js|css)$/.test(file),
+      }
+      : false,
     stats: "minimal",
   };
+}
+
+module.exports = function webpackConfig(_, argv) {
+  const mode = argv.mode || "production";
+  return [buildConfig("modern", mode), buildConfig("legacy", mode)];
 };
@@ -0,0 +1,26 @@
+"""
+Helpers for building BranchingXBlock instances over shared field data.
+"""
+from xblock.fields import ScopeIds
+
+from branching_xblock.branching_xblock import BranchingXBlock
+
+LEARNER_SCOPE_IDS = ScopeIds("learner", "branching_xblock", "test-definition", "test-usage")
+
+
+def store_scenario(runtime, scenario_data, block_class=BranchingXBlock, **fields):
+    """
+    Persist `scenario_data` and `fields` as an author would, through a saved block.
+    """
+    author_block = runtime.construct_xblock_from_class(block_class, scope_ids=LEARNER_SCOPE_IDS)
+    author_block.scenario_data = scenario_data
+    for name, value in fields.items():
+        setattr(author_block, name, value)
+    author_block.save()
+
+
+def load_block(runtime, block_class=BranchingXBlock):
+    """
+    Construct a fresh block over the stored fields, as each LMS request does.
+    """
+    return runtime.construct_xblock_from_class(block_class, scope_ids=LEARNER_SCOPE_IDS)
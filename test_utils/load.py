@@ -0,0 +1,286 @@
+"""
+In-process load harness for the learner handlers.
+
+Virtual learners play through a generated scenario concurrently from a
+thread pool. Every handler call is one LMS request: a fresh block is built
+over an in-memory key-value store shared by all learners, the handler runs
+and the block is saved. The report gives latency percentiles, throughput,
+response sizes and field writes per handler, which is what sizing LMS
+workers for a course launch needs.
+
+Run ``python -m test_utils.load --help`` for the options; ``make load-test``
+runs a default launch-sized load.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.test.client import RequestFactory
+from xblock.fields import ScopeIds
+from xblock.runtime import DictKeyValueStore, KvsFieldData
+from xblock.test.tools import TestRuntime
+
+from branching_xblock.branching_xblock import BranchingXBlock
+from branching_xblock.generator import SHAPES, generate_nodes
+
+HANDLERS = ("get_current_state", "select_choice", "undo_choice", "reset_activity")
+
+
+class CountingKeyValueStore(DictKeyValueStore):
+    """
+    A shared in-memory store that counts field writes per handler.
+
+    Each thread names the handler it is running in `handler`; writes outside
+    a handler (the author's save) are not counted.
+    """
+
+    def __init__(self):
+        """
+        Create an empty store.
+        """
+        super().__init__()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.writes = defaultdict(Counter)
+
+    @property
+    def handler(self):
+        """
+        The handler the current thread is running, or None.
+        """
+        return getattr(self._local, "handler", None)
+
+    @handler.setter
+    def handler(self, name):
+        self._local.handler = name
+
+    def _count(self, keys):
+        if self.handler is not None:
+            with self._lock:
+                self.writes[self.handler].update(key.field_name for key in keys)
+
+    def set(self, key, value):
+        """
+        Store one field and count the write.
+        """
+        self._count([key])
+        super().set(key, value)
+
+    def set_many(self, update_dict):
+        """
+        Store several fields and count each write.
+        """
+        self._count(update_dict)
+        super().set_many(update_dict)
+
+
+class LoadHarness:
+    """
+    A stored scenario plus per-handler measurements of the learners driving it.
+    """
+
+    def __init__(self, nodes, delta=False, **fields):
+        """
+        Save `nodes` through `studio_submit` with the given settings `fields`.
+
+        With `delta`, learners send the learner UI's action payload: a request
+        token, the expected state version and a delta response request.
+        """
+        self.store = CountingKeyValueStore()
+        self.runtime = TestRuntime(services={"field-data": KvsFieldData(self.store)})
+        self.runtime.publish = lambda *args, **kwargs: None
+        self.runtime.handler_url = lambda block, handler_name, *args, **kwargs: f"/handler/{handler_name}"
+        self.delta = delta
+        self.request_factory = RequestFactory()
+        self.timings = defaultdict(list)
+        self.response_bytes = defaultdict(list)
+        self.errors = Counter()
+        self._lock = threading.Lock()
+
+        author = self._block("author")
+        response = author.studio_submit(self._request({"nodes": nodes, **fields}))
+        if json.loads(response.body)["result"] != "success":
+            raise ValueError(f"The scenario did not save: {response.body.decode('utf-8')}")
+        author.save()
+
+    def _block(self, user_id):
+        scope_ids = ScopeIds(user_id, "branching_xblock", "load-definition", "load-usage")
+        return self.runtime.construct_xblock_from_class(BranchingXBlock, scope_ids=scope_ids)
+
+    def _request(self, payload):
+        return self.request_factory.post("/", data=json.dumps(payload), content_type="application/json")
+
+    def call(self, user_id, handler, payload):
+        """
+        Run one request for `user_id` and return the decoded response.
+        """
+        request = self._request(payload)
+        self.store.handler = handler
+        started = time.perf_counter()
+        block = self._block(user_id)
+        response = getattr(block, handler)(request)
+        block.save()
+        elapsed = time.perf_counter() - started
+        self.store.handler = None
+
+        result = json.loads(response.body)
+        with self._lock:
+            self.timings[handler].append(elapsed)
+            self.response_bytes[handler].append(len(response.body))
+            if not result.get("success", True):
+                self.errors[handler] += 1
+        return result
+
+    def play(self, learner, seed, passes=1, undo_rate=0.0):
+        """
+        Play `passes` runs through the scenario as one learner, resetting between runs.
+        """
+        rng = random.Random(seed)
+        user_id = f"learner-{learner}"
+        state = self.call(user_id, "get_current_state", {})
+        # Before the first choice there is no current node; the learner UI shows the start node.
+        start_node = state["nodes"].get(state["start_node_id"]) or {}
+        for run in range(passes):
+            if run:
+                state.update(self.call(user_id, "reset_activity", self._versions(state)))
+            while not state["has_completed"]:
+                choices = (state["current_node"] or start_node).get("choices")
+                if not choices:
+                    break
+                if state["history"] and rng.random() < undo_rate:
+                    handler, payload = "undo_choice", {}
+                else:
+                    handler, payload = "select_choice", {"choice_index": rng.randrange(len(choices))}
+                result = self.call(user_id, handler, {**payload, **self._versions(state)})
+                if not result.get("success"):
+                    break
+                state.update(result)
+
+    def _versions(self, state):
+        if not self.delta:
+            return {}
+        return {
+            "request_token": uuid.uuid4().hex,
+            "response_mode": "delta",
+            "state_version": state.get("state_version"),
+            "expected_state_version": state.get("state_version"),
+            "content_version": state.get("content_version"),
+        }
+
+    def report(self, wall_seconds):
+        """
+        Return per-handler latency percentiles, sizes and writes, plus overall throughput.
+        """
+        handlers = {}
+        for handler in HANDLERS:
+            timings = sorted(self.timings.get(handler, []))
+            if not timings:
+                continue
+            calls = len(timings)
+            handlers[handler] = {
+                "calls": calls,
+                "errors": self.errors[handler],
+                "p50_ms": _percentile(timings, 50) * 1000,
+                "p95_ms": _percentile(timings, 95) * 1000,
+                "p99_ms": _percentile(timings, 99) * 1000,
+                "mean_ms": sum(timings) / calls * 1000,
+                "mean_response_bytes": sum(self.response_bytes[handler]) / calls,
+                "field_writes_per_call": {
+                    field_name: count / calls for field_name, count in sorted(self.store.writes[handler].items())
+                },
+            }
+        requests = sum(entry["calls"] for entry in handlers.values())
+        return {
+            "requests": requests,
+            "wall_seconds": wall_seconds,
+            "requests_per_second": requests / wall_seconds if wall_seconds else 0.0,
+            "handlers": handlers,
+        }
+
+
+def _percentile(sorted_values, percent):
+    """
+    Return the nearest-rank percentile of an ascending list.
+    """
+    rank = max(1, -(-len(sorted_values) * percent // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def run_load(harness, learners, concurrency, seed=0, *, passes=1, undo_rate=0.0):
+    """
+    Play `learners` learners on `concurrency` threads and return the report.
+    """
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [
+            pool.submit(harness.play, learner, seed * 1_000_003 + learner, passes, undo_rate)
+            for learner in range(learners)
+        ]
+        for future in futures:
+            future.result()
+    return harness.report(time.perf_counter() - started)
+
+
+def format_report(report):
+    """
+    Return the report as a fixed-width table.
+    """
+    lines = [
+        f"{report['requests']} requests in {report['wall_seconds']:.2f} s "
+        f"({report['requests_per_second']:.0f} requests/s)",
+        f"{'handler':<18}{'calls':>8}{'errors':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'bytes':>10}  writes/call",
+    ]
+    for handler, entry in report["handlers"].items():
+        writes = ", ".join(f"{name} {count:.2f}" for name, count in entry["field_writes_per_call"].items())
+        lines.append(
+            f"{handler:<18}{entry['calls']:>8}{entry['errors']:>8}{entry['p50_ms']:>9.2f}{entry['p95_ms']:>9.2f}"
+            f"{entry['p99_ms']:>9.2f}{entry['mean_response_bytes']:>10.0f}  {writes}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    """
+    Run a load from the command line.
+    """
+    parser = argparse.ArgumentParser(prog="python -m test_utils.load", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--learners", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32, help="worker threads")
+    parser.add_argument("--passes", type=int, default=1, help="runs per learner; runs after the first reset")
+    parser.add_argument("--undo-rate", type=float, default=0.1, help="chance of undoing instead of choosing")
+    parser.add_argument("--nodes", type=int, default=30)
+    parser.add_argument("--shape", choices=SHAPES, default="layered")
+    parser.add_argument("--content-size", type=int, default=1024)
+    parser.add_argument("--delta", action="store_true", help="request delta responses, as the learner UI does")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "workbench.settings")
+    import django  # pylint: disable=import-outside-toplevel
+    django.setup()
+
+    harness = LoadHarness(
+        generate_nodes(args.nodes, shape=args.shape, content_size=args.content_size, seed=args.seed),
+        delta=args.delta,
+        enable_scoring=True,
+        enable_undo=args.undo_rate > 0,
+        enable_reset_activity=args.passes > 1,
+    )
+    report = run_load(harness, args.learners, args.concurrency, args.seed, passes=args.passes, undo_rate=args.undo_rate)
+    print(format_report(report))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as output:
+            json.dump(report, output, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+"""
+A local statsd stand-in that collects the lines it receives over UDP.
+
+Tests start one on a free port and point ``BRANCHING_XBLOCK_STATSD_ADDRESS``
+at it. ``python -m test_utils.statsd`` prints incoming metrics, for trying
+the statsd sink against a workbench without a metrics server.
+"""
+import argparse
+import socket
+import sys
+import threading
+import time
+
+
+class StatsdStub:
+    """
+    Receive statsd packets on a local UDP port from a background thread.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, on_line=None):
+        """
+        Bind to `host`:`port` (a free port by default); `on_line` is called with each received line.
+        """
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._socket.bind((host, port))
+        self._socket.settimeout(0.1)
+        self.on_line = on_line
+        self.lines = []
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+
+    @property
+    def address(self):
+        """
+        The ``host:port`` string the stub listens on.
+        """
+        host, port = self._socket.getsockname()
+        return f"{host}:{port}"
+
+    def _serve(self):
+        """
+        Collect lines until stopped.
+        """
+        while not self._stopped.is_set():
+            try:
+                packet, _ = self._socket.recvfrom(65535)
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+            for line in packet.decode("utf-8").splitlines():
+                with self._lock:
+                    self.lines.append(line)
+                if self.on_line is not None:
+                    self.on_line(line)
+
+    def wait_for(self, count, timeout=2.0):
+        """
+        Wait until at least `count` lines arrived and return a copy of all lines.
+        """
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            with self._lock:
+                if len(self.lines) >= count:
+                    break
+            time.sleep(0.005)
+        with self._lock:
+            return list(self.lines)
+
+    def start(self):
+        """
+        Start receiving.
+        """
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """
+        Stop receiving and release the port.
+        """
+        self._stopped.set()
+        self._thread.join()
+        self._socket.close()
+
+    def __enter__(self):
+        """
+        Start receiving and return the stub.
+        """
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        """
+        Stop receiving.
+        """
+        self.stop()
+
+
+def main(argv=None):
+    """
+    Print received metrics until interrupted.
+    """
+    parser = argparse.ArgumentParser(prog="python -m test_utils.statsd", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8125)
+    args = parser.parse_args(argv)
+
+    with StatsdStub(args.host, args.port, on_line=print) as stub:
+        print(f"Listening on {stub.address}", file=sys.stderr)
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
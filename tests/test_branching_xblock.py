@@ -1,13 +1,29 @@
 import json
+from pathlib import Path
 from unittest import mock
+from xml.sax.saxutils import quoteattr
 
 import pytest
+from lxml import etree
 
 from django.test.client import RequestFactory
 from xblock.test.tools import TestRuntime
 from xblock.field_data import DictFieldData
-
-from branching_xblock.branching_xblock import BranchingXBlock, _default_node, _strip_html
+from xblock.reference.user_service import XBlockUser
+
+from branching_xblock.branching_xblock import (
+    MFE_CONFIG_STORAGE_PREFIX,
+    MFE_CONFIG_TTL_MS,
+    BranchingXBlock,
+    _client_traversal_enabled,
+    _default_node,
+    _frontier_depth,
+    _publishing_deferred,
+    _strip_html,
+    publish_counters,
+)
+from branching_xblock.compat import SANITIZER_POLICY_VERSION
+from branching_xblock.scenario import scenario_content_hash
 
 
 @pytest.fixture
@@ -26,6 +42,23 @@ def runtime():
     return rt
 
 
+@pytest.fixture
+def staff(runtime):
+    """Make the current user course staff."""
+    user = XBlockUser(is_current_user=True)
+    user.opt_attrs = {"edx-platform.user_is_staff": True}
+    runtime._services["user"] = mock.Mock(get_current_user=mock.Mock(return_value=user))
+    return user
+
+
+@pytest.fixture
+def built_bundles():
+    """Serve the frontend from a build manifest, as a built checkout does."""
+    manifest = {entry: {"js": [f"modern/{entry}.1a2b3c4d.js"], "css": []} for entry in ("student", "studio")}
+    with mock.patch("branching_xblock.branching_xblock._bundle_manifest", return_value=manifest):
+        yield manifest
+
+
 @pytest.fixture
 def scope_ids():
     return {
@@ -583,6 +616,7 @@ def test_studio_submit_rejects_cycle(rf, block):
     assert "links back through branching choices" in node_errors["temp-1"]["detail"]
     assert node_errors["temp-2"]["title"] == "Circular path detected"
     assert "links back through branching choices" in node_errors["temp-2"]["detail"]
+    assert "(Node 1 → Node 2 → Node 1)" in node_errors["temp-1"]["detail"]
 
 
 def test_studio_submit_rejects_self_loop(rf, block):
@@ -608,6 +642,30 @@ def test_studio_submit_rejects_self_loop(rf, block):
     assert "links back through branching choices" in node_errors["temp-1"]["detail"]
 
 
+def test_find_cycle_node_ids_handles_long_chains(block):
+    node_count = 5000
+    nodes = {
+        f"n{i}": {"choices": [{"target_node_id": f"n{i + 1}"}] if i + 1 < node_count else []}
+        for i in range(node_count)
+    }
+    assert block._find_cycle_node_ids(nodes) == set()
+
+    # Close a loop from the last node back into the middle of the chain.
+    nodes[f"n{node_count - 1}"]["choices"] = [{"target_node_id": "n4000"}]
+    assert block._find_cycle_node_ids(nodes) == {f"n{i}" for i in range(4000, node_count)}
+
+
+def test_build_staged_nodes_keeps_generated_ids_unique(block):
+    raw_nodes = [{"id": "node-aaaaaa"}, {"id": "temp-1"}, {"id": "temp-2"}]
+    hexes = iter(["aaaaaa0", "bbbbbb0", "bbbbbb1", "cccccc0"])
+
+    with mock.patch("branching_xblock.branching_xblock.uuid.uuid4", side_effect=lambda: mock.Mock(hex=next(hexes))):
+        id_map, staged = block._build_staged_nodes(raw_nodes)
+
+    assert [node["id"] for node in staged] == ["node-aaaaaa", "node-bbbbbb", "node-cccccc"]
+    assert id_map == {"node-aaaaaa": "node-aaaaaa", "temp-1": "node-bbbbbb", "temp-2": "node-cccccc"}
+
+
 def test_studio_submit_rejects_missing_choice_destination(rf, block):
     payload = {
         "nodes": [
@@ -1155,6 +1213,29 @@ def test_studio_view_includes_grade_ranges_in_init_data(block):
     assert calls["init_data"]["initial_state"]["grade_ranges"] == block.grade_ranges
 
 
+@pytest.mark.parametrize("configured, expected", [(None, 30), (2000, 2000)])
+def test_studio_view_includes_max_nodes_in_init_data(block, settings, configured, expected):
+    calls = {}
+
+    def fake_initialize_js(_self, name, init_data):
+        calls["init_data"] = init_data
+
+    settings.BRANCHING_XBLOCK_MAX_NODES = configured
+
+    with mock.patch(
+        "branching_xblock.branching_xblock.Fragment.initialize_js",
+        autospec=True,
+        side_effect=fake_initialize_js,
+    ), mock.patch.object(
+        block.runtime,
+        "local_resource_url",
+        return_value="http://example.com/handlebars.js",
+    ):
+        block.studio_view({})
+
+    assert calls["init_data"]["meta"]["max_nodes"] == expected
+
+
 # ------------------------------------------------------------------
 # Import / Export tests
 # ------------------------------------------------------------------
@@ -1252,6 +1333,33 @@ def test_import_nodes_rejects_too_many_nodes(rf, block):
     assert "maximum of 30" in result["error"]
 
 
+def test_import_nodes_honours_max_nodes_setting(rf, block, settings):
+    settings.BRANCHING_XBLOCK_MAX_NODES = 1000
+    payload = {
+        "nodes": [
+            {
+                "id": f"n{i}",
+                "content": f"Node {i}",
+                "media": {"type": "", "url": ""},
+                "choices": [{"text": "Next", "target_node_id": f"n{i + 1}"}] if i < 999 else [],
+            }
+            for i in range(1000)
+        ]
+    }
+    req = rf.post("/", data=json.dumps(payload), content_type="application/json")
+    result = json.loads(block.import_nodes(req).body.decode("utf-8"))
+
+    assert result["success"] is True
+    assert len(block.scenario_data["nodes"]) == 1000
+
+    payload["nodes"].append({"id": "extra", "content": "Extra", "media": {"type": "", "url": ""}, "choices": []})
+    req = rf.post("/", data=json.dumps(payload), content_type="application/json")
+    result = json.loads(block.import_nodes(req).body.decode("utf-8"))
+
+    assert result["success"] is False
+    assert "maximum of 1000" in result["error"]
+
+
 def test_import_nodes_rejects_missing_target(rf, block):
     payload = {
         "nodes": [
@@ -1294,6 +1402,7 @@ def test_import_nodes_rejects_cycle(rf, block):
 
     assert result["success"] is False
     assert "circular" in result["error"].lower()
+    assert "(a → b → a)" in result["error"]
 
 
 def test_import_nodes_rejects_duplicate_ids(rf, block):
@@ -1493,6 +1602,142 @@ def test_get_state_only_cleans_the_hints_that_get_rendered(block):
     assert state["nodes"]["B"]["hint"] == "<img src=x onerror=alert(1)>Later"
 
 
+def test_get_state_sanitizes_a_scenario_whatever_its_stamp_says(block):
+    """An OLX edit that carries the sanitizer stamp still gets the learner path cleaned."""
+    block.scenario_data = {
+        "nodes": {
+            "A": {
+                "id": "A",
+                "content": "<script>alert(1)</script><p>Start</p>",
+                "hint": "<img src=x onerror=alert(1)>Hint",
+                "choices": [],
+            },
+        },
+        "start_node_id": "A",
+        "sanitizer_version": SANITIZER_POLICY_VERSION,
+    }
+    block.current_node_id = "A"
+
+    state = block._get_state()
+
+    assert "<script>" not in state["current_node"]["content"]
+    assert "<img" not in state["current_node"]["hint"]
+    assert "<img" not in state["nodes"]["A"]["hint"]
+
+
+def test_client_traversal_gets_every_node_sanitized(block):
+    block.scenario_data = {
+        "nodes": {
+            "A": {"id": "A", "hint": "", "choices": [{"text": "go", "target_node_id": "B", "score": 0}]},
+            "B": {"id": "B", "content": "<script>x</script>Body", "hint": "<img src=x onerror=x>", "choices": []},
+        },
+        "start_node_id": "A",
+    }
+
+    with mock.patch("branching_xblock.branching_xblock._client_traversal_enabled", return_value=True):
+        state = block._get_state()
+
+    assert "<script>" not in state["nodes"]["B"]["content"]
+    assert "<img" not in state["nodes"]["B"]["hint"]
+
+
+def test_studio_submit_and_import_stamp_sanitizer_version(rf, block):
+    payload = {
+        "nodes": [{"id": "start", "content": "<p>Start</p>", "choices": []}],
+    }
+    block.import_nodes(rf.post("/", data=json.dumps(payload), content_type="application/json"))
+    assert block.scenario_data["sanitizer_version"] == SANITIZER_POLICY_VERSION
+
+    block.scenario_data = {"nodes": {}, "start_node_id": None}
+    payload = {"nodes": [{"id": "temp-1", "content": "Start", "media": {"type": "", "url": ""}, "choices": []}]}
+    block.studio_submit(rf.post("/", data=json.dumps(payload), content_type="application/json"))
+    assert block.scenario_data["sanitizer_version"] == SANITIZER_POLICY_VERSION
+
+
+def test_migration_recomputes_path_metrics_when_it_rewrites_nodes(block):
+    start = _default_node(id="A", choices=[{"text": "go", "target_node_id": "B", "score": 1}, "malformed"])
+    block.scenario_data = {
+        "nodes": {"A": start, "B": _default_node(id="B")},
+        "start_node_id": "A",
+        "path_metrics": {"A": {"end_reachable": False}},
+    }
+    block._migrated_nodes_ref = None
+
+    block._migrate_and_save_legacy_nodes()
+
+    assert block.scenario_data["path_metrics"]["A"]["end_reachable"] is True
+    assert block._compiled_scenario().get_path_metrics("A")["end_reachable"] is True
+
+
+def test_saves_imports_and_migrations_stamp_the_content_hash(rf, block):
+    payload = {"nodes": [{"id": "start", "content": "<p>Start</p>", "choices": []}]}
+    block.import_nodes(rf.post("/", data=json.dumps(payload), content_type="application/json"))
+    data = block.scenario_data
+    assert data["content_hash"] == scenario_content_hash(data["nodes"], data["start_node_id"])
+
+    block.scenario_data = {"nodes": {}, "start_node_id": None}
+    payload = {"nodes": [{"id": "temp-1", "content": "Start", "media": {"type": "", "url": ""}, "choices": []}]}
+    block.studio_submit(rf.post("/", data=json.dumps(payload), content_type="application/json"))
+    data = block.scenario_data
+    assert data["content_hash"] == scenario_content_hash(data["nodes"], data["start_node_id"])
+
+    block.scenario_data = {"nodes": {"A": _default_node(id="A")}, "start_node_id": "A"}
+    block._migrated_nodes_ref = None
+    block._migrate_and_save_legacy_nodes()
+    data = block.scenario_data
+    assert data["content_hash"] == scenario_content_hash(data["nodes"], "A")
+
+
+def _stale_stamp_scenario(content):
+    """A scenario whose stamp is the hash of the "<p>old</p>" version, whatever its `content`."""
+    old = {"A": _default_node(id="A", content="<p>old</p>")}
+    return {
+        "nodes": {"A": _default_node(id="A", content=content)},
+        "start_node_id": "A",
+        "sanitizer_version": SANITIZER_POLICY_VERSION,
+        "content_hash": scenario_content_hash(old, "A"),
+    }
+
+
+def test_migration_replaces_a_stamp_that_does_not_match_the_nodes(block):
+    block.scenario_data = _stale_stamp_scenario("<p>old</p>")
+    assert block._compiled_scenario().get_node("A")["content"] == "<p>old</p>"
+
+    block.scenario_data = _stale_stamp_scenario("<p>new</p>")
+    block._migrate_and_save_legacy_nodes()
+
+    data = block.scenario_data
+    assert data["content_hash"] == scenario_content_hash(data["nodes"], "A")
+    assert block._compiled_scenario().get_node("A")["content"] == "<p>new</p>"
+
+
+def test_olx_import_replaces_a_stamp_that_does_not_match_the_nodes(runtime, block):
+    block.scenario_data = _stale_stamp_scenario("<p>old</p>")
+    assert block._compiled_scenario().get_node("A")["content"] == "<p>old</p>"
+
+    olx = f'<branching_xblock scenario_data={quoteattr(json.dumps(_stale_stamp_scenario("<p>new</p>")))}/>'
+    imported = BranchingXBlock.parse_xml(etree.fromstring(olx), runtime, block.scope_ids)
+
+    data = imported.scenario_data
+    assert data["content_hash"] == scenario_content_hash(data["nodes"], "A")
+    assert imported._compiled_scenario().get_node("A")["content"] == "<p>new</p>"
+
+
+def test_migrate_and_save_legacy_nodes_stamps_and_skips_stamped_scenarios(block):
+    block.scenario_data = {
+        "nodes": {"A": _default_node(id="A", hint="<script>x</script>Hint")},
+        "start_node_id": "A",
+    }
+    block._migrate_and_save_legacy_nodes()
+    assert block.scenario_data["sanitizer_version"] == SANITIZER_POLICY_VERSION
+    assert "<script>" not in block.scenario_data["nodes"]["A"]["hint"]
+
+    block._migrated_nodes_ref = None
+    with mock.patch("branching_xblock.branching_xblock._clean_hint") as clean_hint:
+        block._migrate_and_save_legacy_nodes()
+    clean_hint.assert_not_called()
+
+
 def test_migrate_legacy_node_sanitizes_stored_hint(block):
     """Opening the Studio editor cleans hints already persisted."""
     migrated, changed = block._migrate_legacy_node({
@@ -1666,3 +1911,896 @@ def test_strip_html_hardening():
     assert _strip_html("<p>foo</p><p>bar</p>") == "foo bar"
     assert _strip_html("see https://example.com <!-- hidden -->") == "see https://example.com"
     assert _strip_html(None) == ""
+
+
+def test_learner_handlers_share_one_compiled_scenario(rf, runtime, scope_ids):
+    """Blocks with identical content reuse the compiled scenario from the process cache."""
+    first = runtime.construct_xblock_from_class(BranchingXBlock, scope_ids=scope_ids)
+    second = runtime.construct_xblock_from_class(BranchingXBlock, scope_ids=scope_ids)
+    for learner_block in (first, second):
+        _simple_scenario(learner_block)
+
+    req = rf.post("/", data=json.dumps({"choice_index": 0}), content_type="application/json")
+    first.select_choice(req)
+    second.select_choice(req)
+
+    assert first.current_node_id == second.current_node_id == "B"
+    assert first._compiled_scenario() is second._compiled_scenario()
+
+
+def test_learner_handlers_do_not_dirty_scenario_data(rf, runtime, scope_ids):
+    """Reading content on the learner path must not snapshot or re-save the node graph."""
+    author_block = runtime.construct_xblock_from_class(BranchingXBlock, scope_ids=scope_ids)
+    _simple_scenario(author_block)
+    author_block.save()
+
+    learner_block = runtime.construct_xblock_from_class(BranchingXBlock, scope_ids=scope_ids)
+    req = rf.post("/", data=json.dumps({"choice_index": 0}), content_type="application/json")
+    result = json.loads(learner_block.select_choice(req).body.decode("utf-8"))
+
+    assert result["success"] is True
+    assert learner_block.fields["scenario_data"] not in learner_block._dirty_fields
+    assert "scenario_data" not in learner_block._get_fields_to_save()
+    assert "current_node_id" in learner_block._get_fields_to_save()
+
+
+def _post(rf, payload):
+    return rf.post("/", data=json.dumps(payload), content_type="application/json")
+
+
+def test_select_choice_returns_delta_when_client_versions_match(rf, block):
+    _simple_scenario(block)
+    state = block._get_state()
+
+    resp = block.select_choice(_post(rf, {
+        "choice_index": 0,
+        "response_mode": "delta",
+        "state_version": state["state_version"],
+        "content_version": state["content_version"],
+    }))
+    result = json.loads(resp.body.decode("utf-8"))
+
+    assert result["success"] is True
+    assert result["delta"] is True
+    assert "nodes" not in result
+    assert "grade_ranges" not in result
+    assert result["current_node"]["id"] == "B"
+    assert result["score"] == 12
+    assert result["has_completed"] is True
+    assert result["grade_report"]["score"] == 12
+    assert result["state_version"] == state["state_version"] + 1
+
+
+def test_select_choice_delta_omits_grade_report_before_end_node(rf, block):
+    block.scenario_data = {
+        "nodes": {
+            "A": {"id": "A", "choices": [{"text": "→ B", "target_node_id": "B", "score": 5}]},
+            "B": {"id": "B", "choices": [{"text": "→ C", "target_node_id": "C", "score": 5}]},
+            "C": {"id": "C", "choices": []},
+        },
+        "start_node_id": "A",
+    }
+    state = block._get_state()
+
+    resp = block.select_choice(_post(rf, {
+        "choice_index": 0,
+        "response_mode": "delta",
+        "state_version": state["state_version"],
+        "content_version": state["content_version"],
+    }))
+    result = json.loads(resp.body.decode("utf-8"))
+
+    assert result["delta"] is True
+    assert result["current_node"]["id"] == "B"
+    assert "grade_report" not in result
+
+
+@pytest.mark.parametrize("stale_field", ["state_version", "content_version"])
+def test_action_handlers_fall_back_to_full_state_on_stale_client(rf, block, stale_field):
+    _simple_scenario(block)
+    block.enable_undo = True
+    state = block._get_state()
+    payload = {
+        "response_mode": "delta",
+        "state_version": state["state_version"],
+        "content_version": state["content_version"],
+    }
+    payload[stale_field] = "stale"
+
+    result = json.loads(block.select_choice(_post(rf, {**payload, "choice_index": 0})).body.decode("utf-8"))
+    assert "delta" not in result
+    assert "nodes" in result
+
+    result = json.loads(block.undo_choice(_post(rf, payload)).body.decode("utf-8"))
+    assert "delta" not in result
+    assert result["current_node"]["id"] == "A"
+    assert result["state_version"] == state["state_version"] + 2
+
+
+def test_undo_and_reset_return_delta_for_current_client(rf, block):
+    _simple_scenario(block)
+    block.enable_undo = True
+    block.enable_reset_activity = True
+    state = block._get_state()
+    versions = {"response_mode": "delta", "content_version": state["content_version"]}
+
+    result = json.loads(block.select_choice(
+        _post(rf, {**versions, "choice_index": 0, "state_version": state["state_version"]})
+    ).body.decode("utf-8"))
+    result = json.loads(block.undo_choice(
+        _post(rf, {**versions, "state_version": result["state_version"]})
+    ).body.decode("utf-8"))
+    assert result["delta"] is True
+    assert result["current_node"]["id"] == "A"
+    assert result["history"] == []
+    assert result["score"] == 0
+
+    result = json.loads(block.reset_activity(
+        _post(rf, {**versions, "state_version": result["state_version"]})
+    ).body.decode("utf-8"))
+    assert result["delta"] is True
+    assert result["current_node"]["id"] == "A"
+
+
+def _in_course(block):
+    """Put `block` in a course context and return the list of published event types."""
+    published = []
+    block.runtime.publish = lambda _self, event_type, data: published.append(event_type)
+    course_usage = mock.Mock()
+    course_usage.context_key.is_course = True
+    block.scope_ids = mock.Mock(usage_id=course_usage)
+    return published
+
+
+def test_select_choice_retry_with_same_token_is_not_applied_again(rf, block):
+    _simple_scenario(block)
+    published = _in_course(block)
+    state = block._get_state()
+    payload = {
+        "choice_index": 0,
+        "request_token": "click-1",
+        "response_mode": "delta",
+        "state_version": state["state_version"],
+        "content_version": state["content_version"],
+    }
+
+    first = json.loads(block.select_choice(_post(rf, payload)).body.decode("utf-8"))
+    retry = json.loads(block.select_choice(_post(rf, payload)).body.decode("utf-8"))
+
+    assert "replayed" not in first
+    assert retry.pop("replayed") is True
+    assert retry == first
+    assert block.score_history == [12]
+    assert len(block.choice_history) == 1
+    assert published == ["grade", "completion"]
+
+
+def test_select_choice_double_click_is_not_applied_twice(rf, block):
+    block.scenario_data = {
+        "nodes": {
+            "A": {"id": "A", "choices": [{"text": "→ B", "target_node_id": "B", "score": 5}]},
+            "B": {"id": "B", "choices": [{"text": "→ C", "target_node_id": "C", "score": 5}]},
+            "C": {"id": "C", "choices": []},
+        },
+        "start_node_id": "A",
+    }
+    block.enable_scoring = True
+    block.enable_undo = True
+    state = block._get_state()
+    # Both clicks were made on node A, before the first response arrived.
+    click = {"choice_index": 0, "expected_state_version": state["state_version"]}
+
+    block.select_choice(_post(rf, {**click, "request_token": "click-1"}))
+    second = json.loads(block.select_choice(_post(rf, {**click, "request_token": "click-2"})).body.decode("utf-8"))
+
+    assert second["success"] is True
+    assert second["replayed"] is True
+    assert second["current_node"]["id"] == "B"
+    assert block.current_node_id == "B"
+    assert block.history == ["A"]
+    assert block.score_history == [5]
+    assert block.state_version == state["state_version"] + 1
+
+
+def test_undo_double_click_is_not_applied_twice(rf, block):
+    _simple_scenario(block)
+    block.enable_undo = True
+    block.select_choice(_post(rf, {"choice_index": 0}))
+    published = _in_course(block)
+    click = {"expected_state_version": block.state_version}
+
+    first = json.loads(block.undo_choice(_post(rf, click)).body.decode("utf-8"))
+    second = json.loads(block.undo_choice(_post(rf, click)).body.decode("utf-8"))
+
+    assert first["success"] is True and "replayed" not in first
+    assert second["success"] is True and second["replayed"] is True
+    assert second["current_node"]["id"] == "A"
+    assert published == ["grade"]
+
+
+def test_token_replay_after_a_later_action_returns_the_current_full_state(rf, block):
+    _simple_scenario(block)
+    block.enable_reset_activity = True
+    state = block._get_state()
+    versions = {"response_mode": "delta", "content_version": state["content_version"]}
+    click = {**versions, "choice_index": 0, "state_version": state["state_version"], "request_token": "click-1"}
+
+    block.select_choice(_post(rf, click))
+    block.reset_activity(_post(rf, {}))
+    late_retry = json.loads(block.select_choice(_post(rf, click)).body.decode("utf-8"))
+
+    assert late_retry["replayed"] is True
+    assert "delta" not in late_retry
+    assert late_retry["current_node"]["id"] == "A"
+    assert block.current_node_id == "A"
+    assert block.score_history == []
+
+
+@pytest.mark.parametrize("token", [None, "", 7, "x" * 129])
+def test_missing_or_malformed_request_tokens_are_ignored(rf, block, token):
+    _simple_scenario(block)
+    block.enable_reset_activity = True
+    payload = {"request_token": token}
+
+    block.reset_activity(_post(rf, payload))
+    result = json.loads(block.reset_activity(_post(rf, payload)).body.decode("utf-8"))
+
+    assert "replayed" not in result
+    assert block.state_version == 2
+    assert block.last_request_token is None
+
+
+@pytest.fixture
+def counters():
+    publish_counters.clear()
+    yield publish_counters
+    publish_counters.clear()
+
+
+def _deferred(enabled=True):
+    return mock.patch("branching_xblock.branching_xblock._publishing_deferred", return_value=enabled)
+
+
+def test_unchanged_grade_and_completion_are_not_published_again(rf, block, counters):
+    _simple_scenario(block)
+    published = _in_course(block)
+    block.select_choice(_post(rf, {"choice_index": 0}))
+
+    block.publish_grade()
+    block.publish_progress(_post(rf, {}))
+
+    assert published == ["grade", "completion"]
+    assert block.published_events == {
+        "grade": {"value": 12, "max_value": block.max_score},
+        "completion": {"completion": 1.0},
+    }
+    assert counters.stats() == {
+        "completion": {"published": 1, "suppressed": 1},
+        "grade": {"published": 1, "suppressed": 2},
+    }
+
+
+def test_undo_that_keeps_the_score_is_not_published(rf, block, counters):
+    block.scenario_data = {
+        "nodes": {
+            "A": {"id": "A", "choices": [{"text": "→ B", "target_node_id": "B", "score": 0}]},
+            "B": {"id": "B", "choices": [{"text": "→ C", "target_node_id": "C", "score": 0}]},
+            "C": {"id": "C", "choices": []},
+        },
+        "start_node_id": "A",
+    }
+    block.enable_scoring = True
+    block.enable_undo = True
+    published = _in_course(block)
+
+    block.select_choice(_post(rf, {"choice_index": 0}))
+    block.undo_choice(_post(rf, {}))
+    block.select_choice(_post(rf, {"choice_index": 0}))
+    block.undo_choice(_post(rf, {}))
+
+    assert published == ["grade"]
+    assert counters.stats()["grade"] == {"published": 1, "suppressed": 1}
+
+
+def test_reset_after_completion_publishes_the_changed_values(rf, block):
+    _simple_scenario(block)
+    block.enable_reset_activity = True
+    published = _in_course(block)
+
+    block.select_choice(_post(rf, {"choice_index": 0}))
+    block.reset_activity(_post(rf, {}))
+    block.select_choice(_post(rf, {"choice_index": 0}))
+
+    assert published == ["grade", "completion"] * 3
+
+
+def test_deferred_mode_holds_undo_and_reset_until_publish_progress(rf, block, counters):
+    _simple_scenario(block)
+    block.enable_undo = True
+    block.enable_reset_activity = True
+    published = []
+    block.runtime.publish = lambda _self, event_type, data: published.append((event_type, data))
+
+    with _deferred():
+        block.select_choice(_post(rf, {"choice_index": 0}))
+        block.undo_choice(_post(rf, {}))
+        block.reset_activity(_post(rf, {}))
+        assert len(published) == 2
+        assert counters.stats()["grade"] == {"deferred": 2, "published": 1}
+
+        block.publish_progress(_post(rf, {}))
+
+    assert published[2:] == [
+        ("grade", {"value": 0, "max_value": block.max_score}),
+        ("completion", {"completion": 0.0}),
+    ]
+
+
+def test_deferred_mode_still_publishes_on_completion(rf, block):
+    _simple_scenario(block)
+    published = _in_course(block)
+
+    with _deferred():
+        block.select_choice(_post(rf, {"choice_index": 0}))
+
+    assert published == ["grade", "completion"]
+
+
+def test_publish_progress_sends_nothing_before_anything_was_published(rf, block):
+    _simple_scenario(block)
+    published = _in_course(block)
+
+    result = json.loads(block.publish_progress(_post(rf, {})).body.decode("utf-8"))
+
+    assert result == {"success": True}
+    assert published == []
+
+
+@pytest.mark.parametrize("deferred", [True, False])
+def test_student_view_passes_publishing_mode(block, deferred):
+    calls = {}
+
+    def fake_initialize_js(_self, name, init_data):
+        calls["init_data"] = init_data
+
+    with _deferred(deferred), mock.patch(
+        "branching_xblock.branching_xblock.Fragment.initialize_js",
+        autospec=True,
+        side_effect=fake_initialize_js,
+    ), mock.patch.object(block.runtime, "local_resource_url", return_value="http://example.com/student.js"):
+        block.student_view({})
+
+    assert calls["init_data"]["defer_publishing"] is deferred
+    assert calls["init_data"]["handler_urls"]["publish_progress"] == "/handler/publish_progress"
+
+
+@pytest.mark.parametrize("view", ["student_view", "studio_view"])
+def test_views_hint_the_browser_to_preload_the_mfe_config(block, settings, view):
+    settings.LMS_ROOT_URL = "https://lms.example.com"
+
+    with mock.patch.object(block.runtime, "local_resource_url", return_value="http://example.com/bundle.js"):
+        frag = getattr(block, view)({})
+
+    (hint,) = [resource for resource in frag.resources if resource.kind == "text"]
+    assert hint.mimetype == "application/javascript"
+    assert hint.placement == "head"
+    # Added from the page, only while sessionStorage holds no fresh copy.
+    assert 'link.rel = "preload";' in hint.data
+    assert hint.data.endswith(
+        '}("https://lms.example.com/api/mfe_config/v1?mfe=learning", '
+        '"branching-xblock:mfe-config:https://lms.example.com/api/mfe_config/v1?mfe=learning", 600000));\n'
+    )
+    assert frag.json_init_args["mfe_config_api"] == "https://lms.example.com/api/mfe_config/v1?mfe=learning"
+
+
+def test_preload_hint_cannot_close_its_script_element(block, settings):
+    settings.LMS_ROOT_URL = "https://lms.example.com/</script><script>alert(1)//"
+
+    with mock.patch.object(block.runtime, "local_resource_url", return_value="http://example.com/bundle.js"):
+        frag = block.student_view({})
+
+    (hint,) = [resource for resource in frag.resources if resource.kind == "text"]
+    assert "</script>" not in hint.data
+
+
+def test_preload_hint_reads_the_frontend_storage_key_and_ttl():
+    source = (Path(__file__).parent.parent / "frontend" / "src" / "mfeConfig.ts").read_text()
+
+    assert f'const STORAGE_PREFIX = "{MFE_CONFIG_STORAGE_PREFIX}";' in source
+    assert MFE_CONFIG_TTL_MS == 10 * 60 * 1000
+    assert "export const MFE_CONFIG_TTL_MS = 10 * 60 * 1000;" in source
+
+
+def test_views_skip_the_preload_hint_without_an_lms_root_url(block, settings):
+    settings.LMS_ROOT_URL = ""
+
+    with mock.patch.object(block.runtime, "local_resource_url", return_value="http://example.com/bundle.js"):
+        frag = block.student_view({})
+
+    assert [resource for resource in frag.resources if resource.kind == "text"] == []
+
+
+def _resource_urls(block):
+    return mock.patch.object(block.runtime, "local_resource_url", side_effect=lambda _block, uri: f"/resource/{uri}")
+
+
+def _script_urls(frag):
+    return [
+        resource.data for resource in frag.resources
+        if resource.kind == "url" and resource.mimetype == "application/javascript"
+    ]
+
+
+def test_views_load_the_unhashed_bundle_without_a_build_manifest(block):
+    with _resource_urls(block), mock.patch("branching_xblock.branching_xblock._bundle_manifest", return_value={}):
+        frag = block.student_view({})
+
+    assert _script_urls(frag) == ["/resource/static/bundles/student.js"]
+    assert frag.json_init_args["bundle_base_url"] == "/resource/static/bundles/"
+
+
+@pytest.mark.parametrize("legacy, build", [(False, "modern"), (True, "legacy")])
+def test_views_load_hashed_bundles_from_the_build_manifest(block, settings, legacy, build):
+    settings.BRANCHING_XBLOCK_LEGACY_BUNDLES = legacy
+    manifest = {
+        "studio": {
+            "js": [f"{build}/runtime.1a2b.js", f"{build}/vendor.3c4d.js", f"{build}/studio.5e6f.js"],
+            "css": [f"{build}/studio.7a8b.css"],
+        },
+    }
+
+    with _resource_urls(block), mock.patch(
+        "branching_xblock.branching_xblock._bundle_manifest",
+        side_effect=lambda name: manifest if name == build else {},
+    ):
+        frag = block.studio_view({})
+
+    assert _script_urls(frag) == [f"/resource/static/bundles/{name}" for name in manifest["studio"]["js"]]
+    assert frag.json_init_args["bundle_base_url"] == "/resource/static/bundles/"
+    assert frag.json_init_args["style_urls"] == [
+        f"/resource/static/bundles/{build}/studio.7a8b.css",
+        "/resource/static/css/studio_editor.css",
+    ]
+
+
+def test_bundle_base_url_is_left_to_the_bundle_when_resource_urls_are_rewritten(block):
+    rewritten = mock.patch.object(block.runtime, "local_resource_url", side_effect=lambda _block, uri: f"/{uri}.abc123")
+    with rewritten:
+        frag = block.student_view({})
+
+    assert frag.json_init_args["bundle_base_url"] == ""
+
+
+def _three_step_scenario(block):
+    """A → B → D with a side branch B → C; every choice scores."""
+    block.scenario_data = {
+        "nodes": {
+            "A": {"id": "A", "choices": [{"text": "to B", "target_node_id": "B", "score": 1}]},
+            "B": {"id": "B", "choices": [
+                {"text": "to C", "target_node_id": "C", "score": 2},
+                {"text": "to D", "target_node_id": "D", "score": 3},
+            ]},
+            "C": {"id": "C", "choices": [{"text": "to D", "target_node_id": "D", "score": 4}]},
+            "D": {"id": "D", "choices": []},
+        },
+        "start_node_id": "A",
+    }
+    block.enable_scoring = True
+
+
+def _submit_path(rf, block, choice_indices, **payload):
+    resp = block.submit_path(_post(rf, {"choice_indices": choice_indices, **payload}))
+    return json.loads(resp.body.decode("utf-8"))
+
+
+def test_submit_path_records_a_complete_path_and_publishes_once(rf, block):
+    _three_step_scenario(block)
+    block.enable_undo = True
+    published = _in_course(block)
+
+    result = _submit_path(rf, block, [0, 0, 0])
+
+    assert result["success"] is True
+    assert result["current_node"]["id"] == "D"
+    assert result["score"] == 7
+    assert result["state_version"] == 1
+    assert block.current_node_id == "D"
+    assert block.history == ["A", "B", "C"]
+    assert block.score_history == [1, 2, 4]
+    assert [entry["source_node_id"] for entry in block.choice_history] == ["A", "B", "C"]
+    assert block.has_completed is True
+    assert published == ["grade", "completion"]
+
+
+def test_submit_path_matches_select_choice(rf, runtime, scope_ids):
+    stepped = runtime.construct_xblock_from_class(BranchingXBlock, scope_ids=scope_ids)
+    batched = runtime.construct_xblock_from_class(BranchingXBlock, scope_ids=scope_ids)
+    for learner_block in (stepped, batched):
+        _three_step_scenario(learner_block)
+        learner_block.enable_undo = True
+
+    for choice_index in (0, 1):
+        stepped.select_choice(_post(rf, {"choice_index": choice_index}))
+    _submit_path(rf, batched, [0, 1])
+
+    for field_name in ("current_node_id", "history", "score_history", "choice_history", "has_completed"):
+        assert getattr(batched, field_name) == getattr(stepped, field_name), field_name
+
+
+def test_submit_path_can_stop_before_an_end_node(rf, block):
+    _three_step_scenario(block)
+    published = _in_course(block)
+
+    result = _submit_path(rf, block, [0, 0])
+
+    assert result["current_node"]["id"] == "C"
+    assert result["has_completed"] is False
+    assert block.score_history == [1, 2]
+    assert published == []
+
+
+@pytest.mark.parametrize("choice_indices, error", [
+    ([0, 2], "Invalid choice index at step 2"),
+    ([0, -1], "Invalid choice index at step 2"),
+    ([0, "1"], "Invalid choice index at step 2"),
+    ([True], "Invalid choice index at step 1"),
+    ([0, 1, 0], "Invalid choice index at step 3"),
+    ([0] * 5, "Path is longer than the scenario"),
+    ("0,1", "Invalid path"),
+])
+def test_submit_path_rejects_invalid_paths_without_writing(rf, block, choice_indices, error):
+    _three_step_scenario(block)
+
+    result = _submit_path(rf, block, choice_indices)
+
+    assert result == {"success": False, "error": error}
+    assert block.current_node_id is None
+    assert block.state_version == 0
+
+
+def test_submit_path_rejects_a_missing_start_node_like_select_choice(rf, block):
+    _three_step_scenario(block)
+    block.scenario_data = {**block.scenario_data, "start_node_id": "missing"}
+
+    result = _submit_path(rf, block, [0])
+    stepped = json.loads(block.select_choice(_post(rf, {"choice_index": 0})).body.decode("utf-8"))
+
+    assert result == stepped == {"success": False, "error": "Invalid choice"}
+    assert block.state_version == 0
+
+
+def test_submit_path_only_continues_progress_without_undo_or_reset(rf, block):
+    _three_step_scenario(block)
+    block.select_choice(_post(rf, {"choice_index": 0}))
+    block.select_choice(_post(rf, {"choice_index": 0}))
+
+    rewritten = _submit_path(rf, block, [0, 1])
+    continued = _submit_path(rf, block, [0, 0, 0])
+
+    assert rewritten == {"success": False, "error": "Path does not continue the recorded progress"}
+    assert continued["success"] is True
+    assert block.current_node_id == "D"
+
+
+@pytest.mark.parametrize("setting", ["enable_undo", "enable_reset_activity"])
+def test_submit_path_may_rewrite_progress_when_the_learner_could(rf, block, setting):
+    _three_step_scenario(block)
+    setattr(block, setting, True)
+    block.select_choice(_post(rf, {"choice_index": 0}))
+    block.select_choice(_post(rf, {"choice_index": 0}))
+
+    result = _submit_path(rf, block, [0, 1])
+
+    assert result["success"] is True
+    assert block.current_node_id == "D"
+    assert block.score_history == [1, 3]
+
+
+def test_submit_path_publishes_reset_of_a_completed_learner(rf, block):
+    _three_step_scenario(block)
+    block.enable_reset_activity = True
+    published = []
+    block.runtime.publish = lambda _self, event_type, data: published.append((event_type, data))
+    _submit_path(rf, block, [0, 1])
+
+    _submit_path(rf, block, [0])
+
+    assert published[2:] == [
+        ("grade", {"value": 1, "max_value": block.max_score}),
+        ("completion", {"completion": 0.0}),
+    ]
+
+
+def test_submit_path_supports_delta_responses_and_replays(rf, block):
+    _three_step_scenario(block)
+    state = block._get_state()
+    payload = {
+        "request_token": "sync-1",
+        "response_mode": "delta",
+        "state_version": state["state_version"],
+        "content_version": state["content_version"],
+    }
+
+    first = _submit_path(rf, block, [0, 1], **payload)
+    retry = _submit_path(rf, block, [0, 1], **payload)
+
+    assert first["delta"] is True
+    assert retry.pop("replayed") is True
+    assert retry == first
+    assert block.state_version == 1
+
+
+@pytest.mark.parametrize("enabled", [True, False])
+def test_student_view_passes_traversal_mode(block, enabled):
+    calls = {}
+
+    def fake_initialize_js(_self, name, init_data):
+        calls["init_data"] = init_data
+
+    with mock.patch(
+        "branching_xblock.branching_xblock._client_traversal_enabled", return_value=enabled,
+    ), mock.patch(
+        "branching_xblock.branching_xblock.Fragment.initialize_js",
+        autospec=True,
+        side_effect=fake_initialize_js,
+    ), mock.patch.object(block.runtime, "local_resource_url", return_value="http://example.com/student.js"):
+        block.student_view({})
+
+    assert calls["init_data"]["client_traversal"] is enabled
+    assert calls["init_data"]["handler_urls"]["submit_path"] == "/handler/submit_path"
+
+
+def _frontier(depth):
+    return mock.patch("branching_xblock.branching_xblock._frontier_depth", return_value=depth)
+
+
+def test_learner_state_carries_the_whole_node_map_by_default(block):
+    _three_step_scenario(block)
+
+    state = block._get_state()
+
+    assert list(state["nodes"]) == ["A", "B", "C", "D"]
+    assert state["frontier_depth"] is None
+
+
+def test_frontier_state_carries_the_start_node_and_nodes_ahead(rf, block):
+    _three_step_scenario(block)
+
+    with _frontier(1):
+        assert list(block._get_state()["nodes"]) == ["A", "B"]
+        block.select_choice(_post(rf, {"choice_index": 0}))
+        state = block._get_state()
+
+    assert list(state["nodes"]) == ["A", "B", "C", "D"]
+    assert state["frontier_depth"] == 1
+    assert state["nodes"]["B"] == state["current_node"]
+
+
+@pytest.mark.parametrize("configured, client_traversal, depth", [
+    (None, False, None),
+    (2, False, 2),
+    (99, False, 5),
+    (0, False, None),
+    ("2", False, None),
+    (True, False, None),
+    (2, True, None),
+])
+def test_frontier_depth_comes_from_site_configuration(built_bundles, configured, client_traversal, depth):
+    values = {"FRONTIER_DEPTH": configured, "CLIENT_TRAVERSAL": client_traversal}
+    with mock.patch(
+        "branching_xblock.branching_xblock.has_site_configuration", return_value=True,
+    ), mock.patch(
+        "branching_xblock.branching_xblock.get_site_configuration_value",
+        side_effect=lambda block_key, key: values.get(key),
+    ):
+        assert _frontier_depth() == depth
+
+
+def test_features_of_built_bundles_stay_off_for_the_unhashed_bundle(block):
+    values = {"FRONTIER_DEPTH": 2, "CLIENT_TRAVERSAL": True, "DEFER_GRADE_PUBLISHING": True}
+    with mock.patch(
+        "branching_xblock.branching_xblock.has_site_configuration", return_value=True,
+    ), mock.patch(
+        "branching_xblock.branching_xblock.get_site_configuration_value",
+        side_effect=lambda block_key, key: values.get(key),
+    ), mock.patch(
+        "branching_xblock.branching_xblock._bundle_manifest", return_value={},
+    ), mock.patch.object(block.runtime, "local_resource_url", return_value="http://example.com/student.js"):
+        assert _frontier_depth() is None
+        assert _publishing_deferred() is False
+        assert _client_traversal_enabled() is False
+        frag = block.student_view({})
+
+    assert frag.json_init_args["defer_publishing"] is False
+    assert frag.json_init_args["client_traversal"] is False
+    assert frag.json_init_args["initial_state"]["frontier_depth"] is None
+
+
+def test_get_nodes_returns_nodes_ahead_without_touching_learner_state(rf, block):
+    _three_step_scenario(block)
+
+    result = json.loads(block.get_nodes(_post(rf, {"node_ids": ["C", "missing"], "depth": 1})).body.decode("utf-8"))
+
+    assert result["success"] is True
+    assert list(result["nodes"]) == ["C", "D"]
+    assert result["content_version"] == block._compiled_scenario().content_hash
+    assert block.state_version == 0
+    assert block.current_node_id is None
+
+
+@pytest.mark.parametrize("payload, error", [
+    ({}, "Invalid node IDs"),
+    ({"node_ids": "A"}, "Invalid node IDs"),
+    ({"node_ids": [1]}, "Invalid node IDs"),
+    ({"node_ids": ["A"] * 5}, "Invalid node IDs"),
+    ({"node_ids": ["A"], "depth": 6}, "Depth must be between 0 and 5"),
+    ({"node_ids": ["A"], "depth": True}, "Depth must be between 0 and 5"),
+])
+def test_get_nodes_rejects_invalid_requests(rf, block, payload, error):
+    _three_step_scenario(block)
+
+    result = json.loads(block.get_nodes(_post(rf, payload)).body.decode("utf-8"))
+
+    assert result == {"success": False, "error": error}
+
+
+def test_learner_state_lists_images_one_choice_ahead(rf, block):
+    _three_step_scenario(block)
+    block.scenario_data["nodes"]["B"]["media"] = {"type": "single_image", "url": "/b.png"}
+    block.scenario_data["nodes"]["D"]["media"] = {"type": "single_image", "url": "/d.png"}
+
+    assert block._get_state()["next_image_urls"] == ["/b.png"]
+
+    delta = json.loads(block.select_choice(_post(rf, {
+        "choice_index": 0,
+        "response_mode": "delta",
+        "state_version": 0,
+        "content_version": block._compiled_scenario().content_hash,
+    })).body.decode("utf-8"))
+
+    assert delta["delta"] is True
+    assert delta["next_image_urls"] == ["/d.png"]
+
+
+def test_studio_submit_and_import_store_path_metrics(rf, block):
+    payload = {
+        "nodes": [
+            {"id": "start", "content": "Start", "choices": [{"text": "Go", "target_node_id": "end", "score": 7}]},
+            {"id": "end", "content": "End", "choices": []},
+        ],
+    }
+    block.import_nodes(_post(rf, payload))
+    metrics = block.scenario_data["path_metrics"]
+    start_id = block.scenario_data["start_node_id"]
+    assert metrics[start_id]["best_remaining_score"] == 7
+    assert metrics[start_id]["shortest_remaining_depth"] == 1
+
+    payload = {
+        "nodes": [
+            {"id": "temp-1", "content": "Start", "media": {"type": "", "url": ""},
+             "choices": [{"text": "Go", "target_node_id": "temp-2", "score": 3}]},
+            {"id": "temp-2", "content": "End", "media": {"type": "", "url": ""}, "choices": []},
+        ],
+    }
+    result = json.loads(block.studio_submit(_post(rf, payload)).body.decode("utf-8"))
+    start_id = block.scenario_data["start_node_id"]
+    assert result["path_metrics"] == block.scenario_data["path_metrics"]
+    assert result["path_metrics"][start_id]["min_remaining_score"] == 3
+
+
+def test_learner_state_reports_current_node_metrics(rf, block):
+    block.scenario_data = {
+        "nodes": {
+            "A": {"id": "A", "choices": [{"text": "→ B", "target_node_id": "B", "score": 5}]},
+            "B": {"id": "B", "choices": [{"text": "→ C", "target_node_id": "C", "score": 4}]},
+            "C": {"id": "C", "choices": []},
+        },
+        "start_node_id": "A",
+    }
+    block.start_node()
+    state = block._get_state()
+    assert state["current_node_metrics"]["best_remaining_score"] == 9
+    assert state["current_node_metrics"]["longest_remaining_depth"] == 2
+
+    result = json.loads(block.select_choice(_post(rf, {
+        "choice_index": 0,
+        "response_mode": "delta",
+        "state_version": state["state_version"],
+        "content_version": state["content_version"],
+    })).body.decode("utf-8"))
+    assert result["current_node_metrics"]["best_remaining_score"] == 4
+
+
+def test_score_distribution_handler_reports_paths_per_total(rf, block, staff):
+    block.scenario_data = {
+        "nodes": {
+            "A": {"id": "A", "choices": [
+                {"text": "→ B", "target_node_id": "B", "score": 10},
+                {"text": "→ C", "target_node_id": "C", "score": 0},
+            ]},
+            "B": {"id": "B", "choices": []},
+            "C": {"id": "C", "choices": [{"text": "→ B", "target_node_id": "B", "score": 4}]},
+        },
+        "start_node_id": "A",
+    }
+
+    result = json.loads(block.score_distribution(_post(rf, {})).body.decode("utf-8"))
+
+    assert result == {
+        "success": True,
+        "total_paths": "2",
+        "min_score": 4,
+        "max_score": 10,
+        "expected_score": 7.0,
+        "totals": [4, 10],
+        "path_counts": ["1", "1"],
+        "path_shares": [0.5, 0.5],
+    }
+
+
+def test_score_distribution_handler_without_numpy(rf, block, staff):
+    with mock.patch("branching_xblock.distribution.np", None):
+        result = json.loads(block.score_distribution(_post(rf, {})).body.decode("utf-8"))
+
+    assert result["success"] is False
+    assert "NumPy" in result["error"]
+
+
+def test_simulate_learners_handler_uses_block_settings(rf, block, staff):
+    block.scenario_data = {
+        "nodes": {
+            "A": {"id": "A", "choices": [
+                {"text": "→ B", "target_node_id": "B", "score": 10},
+                {"text": "→ C", "target_node_id": "C", "score": 0},
+            ]},
+            "B": {"id": "B", "choices": []},
+            "C": {"id": "C", "choices": []},
+        },
+        "start_node_id": "A",
+    }
+    block.enable_scoring = True
+    block.max_score = 10
+
+    response = block.simulate_learners(_post(rf, {"learners": 50, "policy": "greedy-max"}))
+    result = json.loads(response.body.decode("utf-8"))
+
+    assert result["success"] is True
+    assert result["end_node_counts"] == {"B": 50}
+    assert result["score_counts"] == {"10": 50}
+    assert [grade["learners"] for grade in result["grade_counts"]] == [0, 50]
+
+
+@pytest.mark.parametrize("payload, error", [
+    ({"learners": 10 ** 6}, "At most"),
+    ({"policy": "random"}, "Unknown policy"),
+])
+def test_simulate_learners_handler_rejects_invalid_requests(rf, block, staff, payload, error):
+    result = json.loads(block.simulate_learners(_post(rf, payload)).body.decode("utf-8"))
+
+    assert result["success"] is False
+    assert error in result["error"]
+
+
+def test_simulate_learners_handler_bounds_learners_by_scenario_size(rf, block, staff):
+    nodes = {f"n{i}": {"id": f"n{i}", "choices": []} for i in range(1000)}
+    block.scenario_data = {"nodes": nodes, "start_node_id": "n0"}
+
+    result = json.loads(block.simulate_learners(_post(rf, {"learners": 5000})).body.decode("utf-8"))
+
+    assert result["success"] is False
+    assert "At most 3000 learners" in result["error"]
+
+
+@pytest.mark.parametrize("handler", ["score_distribution", "simulate_learners"])
+def test_analysis_handlers_are_for_staff_only(rf, block, handler):
+    response = getattr(block, handler)(_post(rf, {"learners": 10}))
+
+    assert response.status_code == 403
+
+
+def test_analysis_handlers_are_open_in_studio(rf, block, settings):
+    settings.SERVICE_VARIANT = "cms"
+
+    response = block.score_distribution(_post(rf, {}))
+
+    assert response.status_code == 200
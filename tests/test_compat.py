@@ -1,9 +1,26 @@
 from types import SimpleNamespace
 from unittest import mock
 
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+
 from branching_xblock import compat
 
 
+@pytest.fixture(autouse=True)
+def _clear_sanitizer_cache():
+    """
+    Keep memoized sanitizer output from leaking between tests.
+    """
+    compat.sanitizer_cache.clear()
+    yield
+    compat.sanitizer_cache.clear()
+
+
+def _use_engine(engine):
+    return mock.patch.object(compat.settings, "BRANCHING_XBLOCK_SANITIZER_ENGINE", engine, create=True)
+
+
 def test_get_site_configuration_value():
     with mock.patch.object(
         compat.settings, "SERVICE_VARIANT", "lms", create=True
@@ -27,10 +44,143 @@ def test_sanitize_html_uses_bleach_defaults():
         calls["strip"] = strip
         return "CLEANED"
 
-    with mock.patch.object(compat, "bleach", SimpleNamespace(clean=fake_clean)):
+    with _use_engine("bleach"), mock.patch.object(compat, "bleach", SimpleNamespace(clean=fake_clean)):
         assert compat.sanitize_html("<b>ok</b>") == "CLEANED"
 
     assert calls["value"] == "<b>ok</b>"
     assert calls["tags"] == compat.DEFAULT_ALLOWED_TAGS
     assert calls["attributes"] == compat.DEFAULT_ALLOWED_ATTRIBUTES
     assert calls["strip"] is True
+
+
+def test_sanitize_html_defaults_to_nh3():
+    with mock.patch.object(compat, "bleach", SimpleNamespace(clean=mock.Mock())) as fake_bleach:
+        assert compat.get_sanitizer_engine() == "nh3"
+        assert compat.sanitize_html('<p onclick="x()">ok<script>alert(1)</script></p>') == "<p>ok</p>"
+
+    fake_bleach.clean.assert_not_called()
+
+
+def test_sanitize_html_escapes_when_engine_is_unavailable():
+    with _use_engine("bleach"), mock.patch.object(compat, "bleach", None):
+        assert compat.sanitize_html("<b>ok</b>") == "&lt;b&gt;ok&lt;/b&gt;"
+
+
+def test_unknown_sanitizer_engine_is_rejected():
+    with _use_engine("tidy"), pytest.raises(ImproperlyConfigured):
+        compat.sanitize_html("<b>ok</b>")
+
+
+SANITIZER_PARITY_CORPUS = [
+    "plain text",
+    "<p>Hello <strong>world</strong></p>",
+    "<h1>Title</h1><h3>Section</h3>",
+    "<ul><li>one</li><li>two</ul>",
+    '<a href="https://example.com" title="t" target="_blank" rel="noopener">link</a>',
+    '<a href="mailto:team@example.com">mail</a>',
+    '<a href="javascript:alert(1)">bad</a>',
+    '<a href="ftp://example.com/file">ftp</a>',
+    '<a href="https://example.com" onclick="steal()" style="color:red">styled</a>',
+    '<img src="x" onerror="alert(1)">after image',
+    '<p class="lead" id="intro">attributes</p>',
+    "Fish &amp; chips &lt;3",
+    "<b>unclosed <em>tags",
+    "<!-- a comment --><p>visible</p>",
+    "line<br>break<hr/>rule",
+    "<div><span>wrapped</span></div>",
+    '<iframe src="https://example.com"></iframe>framed',
+    "<code>if (a < b) {}</code>",
+]
+
+
+@pytest.mark.parametrize("html", SANITIZER_PARITY_CORPUS)
+def test_nh3_matches_bleach_on_parity_corpus(html):
+    if compat.bleach is None:
+        pytest.skip("bleach is not installed")
+
+    with _use_engine("bleach"):
+        expected = compat.sanitize_html(html)
+    with _use_engine("nh3"):
+        assert compat.sanitize_html(html) == expected
+
+
+@pytest.mark.parametrize("html, bleach_output, nh3_output", [
+    ("<script>alert(1)</script>ok", "alert(1)ok", "ok"),
+    ("<style>p {color: red}</style>ok", "p {color: red}ok", "ok"),
+    # Named entities are decoded; both render the same.
+    ("&copy; 2024", "&copy; 2024", "\u00a9 2024"),
+])
+def test_nh3_known_differences_from_bleach(html, bleach_output, nh3_output):
+    if compat.bleach is None:
+        pytest.skip("bleach is not installed")
+
+    with _use_engine("bleach"):
+        assert compat.sanitize_html(html) == bleach_output
+    with _use_engine("nh3"):
+        assert compat.sanitize_html(html) == nh3_output
+
+
+def test_sanitize_html_memoizes_identical_input():
+    fake_clean = mock.Mock(return_value="CLEANED")
+
+    with _use_engine("bleach"), mock.patch.object(compat, "bleach", SimpleNamespace(clean=fake_clean)):
+        assert compat.sanitize_html("<b>ok</b>") == "CLEANED"
+        assert compat.sanitize_html("<b>ok</b>") == "CLEANED"
+        assert compat.sanitize_html("<b>ok</b>", allowed_tags=["b"]) == "CLEANED"
+
+    # The custom allow-list is a different policy, so it is sanitized separately.
+    assert fake_clean.call_count == 2
+    stats = compat.sanitizer_cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 2
+    assert stats["size"] == 2
+
+
+def test_sanitizer_cache_evicts_least_recently_used():
+    cache = compat.SanitizerCache(maxsize=2)
+    cache._configured = True  # keep the bounds given here
+
+    for value in ("a", "b", "a", "c"):
+        cache.get_or_compute("policy", value, str.upper)
+
+    assert cache.stats()["evictions"] == 1
+    assert cache.get_or_compute("policy", "a", str.lower) == "A"
+    assert cache.get_or_compute("policy", "b", str.lower) == "b"
+
+
+def test_sanitizer_cache_enforces_byte_budget():
+    cache = compat.SanitizerCache(maxsize=10, max_bytes=5)
+    cache._configured = True
+
+    cache.get_or_compute("policy", "abc", str.upper)
+    cache.get_or_compute("policy", "def", str.upper)
+    cache.get_or_compute("policy", "too long to cache", str.upper)
+
+    stats = cache.stats()
+    assert stats["size"] == 1
+    assert stats["bytes"] == 3
+    assert stats["evictions"] == 1
+
+
+def test_sanitizer_cache_reads_bounds_from_django_settings(settings):
+    settings.BRANCHING_XBLOCK_SANITIZER_CACHE_SIZE = "0"
+    cache = compat.SanitizerCache()
+
+    with mock.patch.object(compat, "get_site_configuration_value") as get_value:
+        assert cache.get_or_compute("policy", "abc", str.upper) == "ABC"
+
+    get_value.assert_not_called()
+    stats = cache.stats()
+    assert stats["maxsize"] == 0
+    assert stats["max_bytes"] == compat.SANITIZER_CACHE_MAX_BYTES
+    assert stats["size"] == 0
+
+
+def test_has_site_configuration_is_memoized_outside_the_platform():
+    compat.has_site_configuration.cache_clear()
+    try:
+        assert compat.has_site_configuration() is False
+        with mock.patch("builtins.__import__", side_effect=AssertionError("import retried")):
+            assert compat.has_site_configuration() is False
+    finally:
+        compat.has_site_configuration.cache_clear()
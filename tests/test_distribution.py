@@ -0,0 +1,79 @@
+from unittest import mock
+
+from branching_xblock import distribution
+from branching_xblock.distribution import compute_score_distribution
+
+
+def _lattice(levels):
+    """
+    Two nodes per level, each linking to both nodes of the next level: 2 ** levels paths.
+    """
+    nodes = {}
+    for level in range(levels):
+        nodes[f"a{level}"] = {"choices": [
+            {"target_node_id": f"a{level + 1}", "score": 1},
+            {"target_node_id": f"b{level + 1}", "score": 2},
+        ]}
+        nodes[f"b{level}"] = {"choices": [
+            {"target_node_id": f"a{level + 1}", "score": 0},
+            {"target_node_id": f"b{level + 1}", "score": 3},
+        ]}
+    nodes[f"a{levels}"] = {"choices": []}
+    nodes[f"b{levels}"] = {"choices": []}
+    return nodes
+
+
+def test_distribution_counts_every_path_by_total():
+    nodes = {
+        "start": {"choices": [{"target_node_id": "left", "score": 10}, {"target_node_id": "right", "score": 0}]},
+        "left": {"choices": [{"target_node_id": "end", "score": 5}]},
+        "right": {"choices": [{"target_node_id": "end", "score": 5}, {"target_node_id": "end", "score": 15}]},
+        "end": {"choices": []},
+        "orphan": {"choices": [{"target_node_id": "end", "score": 100}]},
+    }
+
+    result = compute_score_distribution(nodes, "start")
+
+    assert result == {
+        "total_paths": 3,
+        "min_score": 5,
+        "max_score": 15,
+        "expected_score": 12.5,
+        "path_counts": {5: 1, 15: 2},
+    }
+
+
+def test_distribution_ignores_dead_ends():
+    nodes = {
+        "start": {"choices": [{"target_node_id": "stuck", "score": 50}, {"target_node_id": "end", "score": 1}]},
+        "stuck": {"choices": [{"target_node_id": "missing", "score": 50}]},
+        "end": {"choices": []},
+    }
+
+    result = compute_score_distribution(nodes, "start")
+
+    assert result["path_counts"] == {1: 1}
+    assert result["expected_score"] == 1
+
+
+def test_distribution_is_exact_beyond_int64():
+    levels = 100
+    result = compute_score_distribution(_lattice(levels), "a0")
+
+    assert result["total_paths"] == 2 ** levels
+    assert sum(result["path_counts"].values()) == 2 ** levels
+    assert result["min_score"] == levels
+    assert result["max_score"] == 3 * levels - 1
+    assert result["expected_score"] == 1.5 * levels
+
+
+def test_distribution_without_a_start_node_or_paths():
+    empty = {"total_paths": 0, "min_score": None, "max_score": None, "expected_score": None, "path_counts": {}}
+
+    assert compute_score_distribution({}, None) == empty
+    assert compute_score_distribution({"A": {"choices": [{"target_node_id": "A"}]}}, "A") == empty
+
+
+def test_distribution_needs_numpy():
+    with mock.patch.object(distribution, "np", None):
+        assert compute_score_distribution(_lattice(2), "a0") is None
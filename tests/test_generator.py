@@ -0,0 +1,128 @@
+import json
+
+import pytest
+from django.test.client import RequestFactory
+from xblock.core import XBlock
+from xblock.field_data import DictFieldData
+from xblock.runtime import DictKeyValueStore, KvsFieldData, MemoryIdManager
+from xblock.test.tools import TestRuntime
+
+from branching_xblock.branching_xblock import IMPORT_TEMPLATE_NODES, BranchingXBlock
+from branching_xblock.generator import SHAPES, generate_nodes, main, scenario_data
+from branching_xblock.graph import find_cycles
+
+ALL_MEDIA = {"none": 1, "image": 1, "single_image": 1, "video": 1, "audio": 1}
+
+
+def _reachable_ids(nodes):
+    by_id = {node["id"]: node for node in nodes}
+    reachable = {nodes[0]["id"]}
+    pending = [nodes[0]["id"]]
+    while pending:
+        for choice in by_id[pending.pop()]["choices"]:
+            if choice["target_node_id"] not in reachable:
+                reachable.add(choice["target_node_id"])
+                pending.append(choice["target_node_id"])
+    return reachable
+
+
+def _post(payload):
+    return RequestFactory().post("/", data=json.dumps(payload), content_type="application/json")
+
+
+@pytest.mark.parametrize("shape", SHAPES)
+@pytest.mark.parametrize("node_count", [1, 2, 10, 97])
+def test_every_shape_is_a_connected_acyclic_scenario(shape, node_count):
+    nodes = generate_nodes(node_count, shape=shape)
+
+    assert [node["id"] for node in nodes] == [f"node-{index}" for index in range(node_count)]
+    assert _reachable_ids(nodes) == {node["id"] for node in nodes}
+    assert find_cycles(scenario_data(nodes)["nodes"]) == (set(), [])
+
+
+def test_generation_is_seeded():
+    options = {"media_mix": ALL_MEDIA, "scores": "skewed", "branching_factor": 3}
+
+    assert generate_nodes(50, seed=4, **options) == generate_nodes(50, seed=4, **options)
+    assert generate_nodes(50, seed=4, **options) != generate_nodes(50, seed=5, **options)
+
+
+def test_nodes_follow_the_import_template():
+    nodes = generate_nodes(20, media_mix=ALL_MEDIA, content_size=2048)
+
+    assert all(set(node) == set(IMPORT_TEMPLATE_NODES[0]) for node in nodes)
+    assert all(len(node["content"]) >= 2048 for node in nodes)
+    assert {node["media"]["type"] for node in nodes} == {"", "image", "single_image", "video", "audio"}
+
+
+def test_layered_shape_uses_depth_and_branching_factor():
+    nodes = generate_nodes(40, branching_factor=3, depth=3)
+
+    assert [len(node["choices"]) for node in nodes] == [3] * 13 + [0] * 27
+    assert [choice["target_node_id"] for choice in nodes[0]["choices"]] == ["node-1", "node-2", "node-3"]
+    assert generate_nodes(40, branching_factor=3) == nodes
+
+
+def test_score_distributions():
+    assert {choice["score"] for node in generate_nodes(30, scores="none") for choice in node["choices"]} == {0}
+    uniform = [choice["score"] for node in generate_nodes(300, scores="uniform") for choice in node["choices"]]
+    assert 0 <= min(uniform) and max(uniform) <= 100 and len(set(uniform)) > 50
+
+
+@pytest.mark.parametrize("kwargs", [
+    {"node_count": 0},
+    {"shape": "star"},
+    {"branching_factor": 0},
+    {"scores": "normal"},
+    {"media_mix": {"gif": 1}},
+    {"media_mix": {"none": 0}},
+])
+def test_invalid_arguments_raise(kwargs):
+    kwargs = {"node_count": 10, **kwargs}
+    with pytest.raises(ValueError):
+        generate_nodes(**kwargs)
+
+
+@pytest.mark.parametrize("handler, payload_key", [("import_nodes", "success"), ("studio_submit", "result")])
+def test_generated_scenarios_save_through_studio_handlers(handler, payload_key):
+    runtime = TestRuntime()
+    runtime._services["field-data"] = DictFieldData({})
+    block = runtime.construct_xblock_from_class(BranchingXBlock, scope_ids=runtime.id_generator.create_usage(
+        runtime.id_generator.create_definition("branching_xblock")
+    ))
+    nodes = generate_nodes(25, media_mix=ALL_MEDIA, scores="uniform", seed=3)
+
+    result = json.loads(getattr(block, handler)(_post({"nodes": nodes})).body)
+
+    assert result[payload_key] in (True, "success"), result
+    assert len(block.scenario_data["nodes"]) == 25
+
+
+def test_cli_writes_import_json(tmp_path, capsys):
+    output = tmp_path / "scenario.json"
+
+    assert main(["12", "--shape", "diamond", "--media-mix", "none=2,video=1", "--seed", "9", "-o", str(output)]) == 0
+    assert json.loads(output.read_text()) == {
+        "nodes": generate_nodes(12, shape="diamond", media_mix={"none": 2.0, "video": 1.0}, seed=9),
+    }
+
+    main(["3"])
+    assert len(json.loads(capsys.readouterr().out)["nodes"]) == 3
+
+    with pytest.raises(SystemExit):
+        main(["3", "--media-mix", "gif=1"])
+
+
+@XBlock.register_temp_plugin(BranchingXBlock, "branching_xblock")
+def test_generated_workbench_scenario_loads():
+    description, xml = BranchingXBlock.workbench_scenarios()[-1]
+    id_manager = MemoryIdManager()
+    runtime = TestRuntime(
+        services={"field-data": KvsFieldData(DictKeyValueStore())}, id_reader=id_manager, id_generator=id_manager,
+    )
+
+    block = runtime.get_block(runtime.parse_xml_string(xml.strip()))
+
+    assert "generated" in description
+    assert len(block.scenario_data["nodes"]) == 12
+    assert block.enable_scoring is True
@@ -0,0 +1,128 @@
+import sys
+
+from branching_xblock.graph import (
+    compute_path_metrics,
+    find_cycles,
+    strongly_connected_components,
+    successor_ids,
+)
+
+
+def _graph(edges, extra_nodes=()):
+    """
+    Build a node map from ``(source, target)`` pairs.
+    """
+    nodes = {node_id: {"choices": []} for node_id in extra_nodes}
+    for source, target in edges:
+        nodes.setdefault(source, {"choices": []})
+        nodes.setdefault(target, {"choices": []})
+        nodes[source]["choices"].append({"target_node_id": target})
+    return nodes
+
+
+def test_successor_ids_skips_missing_targets_and_malformed_choices():
+    nodes = {
+        "A": {"choices": [{"target_node_id": "B"}, {"target_node_id": "missing"}, "bad", {}]},
+        "B": {"choices": None},
+    }
+
+    assert list(successor_ids(nodes, "A")) == ["B"]
+    assert list(successor_ids(nodes, "B")) == []
+
+
+def test_strongly_connected_components_in_reverse_topological_order():
+    nodes = _graph([("A", "B"), ("B", "C"), ("C", "B"), ("C", "D")])
+
+    components = strongly_connected_components(nodes)
+
+    assert sorted(map(sorted, components)) == [["A"], ["B", "C"], ["D"]]
+    order = {node_id: index for index, component in enumerate(components) for node_id in component}
+    assert order["D"] < order["B"] < order["A"]
+
+
+def test_find_cycles_returns_node_set_and_one_cycle_per_component():
+    nodes = _graph([
+        ("start", "A"),
+        ("A", "B"),
+        ("B", "A"),
+        ("start", "C"),
+        ("C", "C"),
+        ("start", "end"),
+    ])
+
+    cycle_node_ids, cycles = find_cycles(nodes)
+
+    assert cycle_node_ids == {"A", "B", "C"}
+    assert cycles == [["A", "B"], ["C"]]
+
+
+def test_find_cycles_includes_every_member_of_a_looping_component():
+    # A -> B -> A is found first; C rejoins the loop through a cross edge.
+    nodes = _graph([("A", "B"), ("B", "A"), ("A", "C"), ("C", "B")])
+
+    cycle_node_ids, cycles = find_cycles(nodes)
+
+    assert cycle_node_ids == {"A", "B", "C"}
+    assert cycles == [["A", "B"]]
+
+
+def test_find_cycles_on_acyclic_graph():
+    nodes = _graph([("A", "B"), ("A", "C"), ("B", "D"), ("C", "D")], extra_nodes=["orphan"])
+
+    assert find_cycles(nodes) == (set(), [])
+
+
+def test_find_cycles_is_iterative_on_long_chains():
+    node_count = 10_000
+    edges = [(f"n{i}", f"n{i + 1}") for i in range(node_count - 1)]
+    edges.append((f"n{node_count - 1}", "n0"))
+    nodes = _graph(edges)
+
+    assert node_count > sys.getrecursionlimit()
+    cycle_node_ids, cycles = find_cycles(nodes)
+
+    assert len(cycle_node_ids) == node_count
+    assert cycles == [[f"n{i}" for i in range(node_count)]]
+
+
+def test_compute_path_metrics_over_a_diamond():
+    nodes = {
+        "start": {"choices": [{"target_node_id": "left", "score": 10}, {"target_node_id": "right", "score": 0}]},
+        "left": {"choices": [{"target_node_id": "end", "score": 5}]},
+        "right": {"choices": [{"target_node_id": "mid", "score": 20}]},
+        "mid": {"choices": [{"target_node_id": "end", "score": 1}]},
+        "end": {"choices": []},
+    }
+
+    metrics = compute_path_metrics(nodes)
+
+    assert metrics["start"] == {
+        "end_reachable": True,
+        "best_remaining_score": 21,
+        "min_remaining_score": 15,
+        "shortest_remaining_depth": 2,
+        "longest_remaining_depth": 3,
+    }
+    assert metrics["end"] == {
+        "end_reachable": True,
+        "best_remaining_score": 0,
+        "min_remaining_score": 0,
+        "shortest_remaining_depth": 0,
+        "longest_remaining_depth": 0,
+    }
+
+
+def test_compute_path_metrics_flags_dead_ends():
+    nodes = {
+        "start": {"choices": [{"target_node_id": "stuck", "score": 5}, {"target_node_id": "end", "score": 1}]},
+        "stuck": {"choices": [{"target_node_id": "missing", "score": 50}]},
+        "end": {"choices": []},
+    }
+
+    metrics = compute_path_metrics(nodes)
+
+    assert metrics["stuck"]["end_reachable"] is False
+    assert metrics["stuck"]["best_remaining_score"] is None
+    # Only the exit that leads to an end counts towards the start node.
+    assert metrics["start"]["best_remaining_score"] == 1
+    assert metrics["start"]["longest_remaining_depth"] == 1
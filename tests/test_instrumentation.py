@@ -0,0 +1,315 @@
+import json
+import logging
+from contextlib import contextmanager
+from unittest import mock
+
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+from django.test.client import RequestFactory
+from xblock.field_data import DictFieldData
+from xblock.test.tools import TestRuntime
+
+from branching_xblock import instrumentation
+from branching_xblock.branching_xblock import BranchingXBlock
+from branching_xblock.generator import generate_nodes
+from branching_xblock.instrumentation import LogSink, Measurement, StatsdSink, memory_sink
+from test_utils.blocks import LEARNER_SCOPE_IDS
+from test_utils.statsd import StatsdStub
+
+
+def _post(payload=None):
+    return RequestFactory().post("/", data=json.dumps(payload or {}), content_type="application/json")
+
+
+@pytest.fixture(autouse=True)
+def _fresh_sinks():
+    instrumentation._build_sink.cache_clear()  # pylint: disable=protected-access
+    memory_sink.clear()
+    yield
+    instrumentation._build_sink.cache_clear()  # pylint: disable=protected-access
+    memory_sink.clear()
+
+
+@pytest.fixture
+def memory(settings):
+    settings.BRANCHING_XBLOCK_INSTRUMENTATION_SINK = "memory"
+    return memory_sink
+
+
+@pytest.fixture
+def block():
+    runtime = TestRuntime()
+    runtime._services["field-data"] = DictFieldData({})
+    runtime.publish = lambda *args, **kwargs: None
+    runtime.handler_url = lambda block, handler_name, *args, **kwargs: f"/handler/{handler_name}"
+    runtime.local_resource_url = lambda block, uri: f"/resource/{uri}"
+    block = runtime.construct_xblock_from_class(BranchingXBlock, scope_ids=LEARNER_SCOPE_IDS)
+    with mock.patch("branching_xblock.branching_xblock.get_site_configuration_value", return_value=""):
+        yield block
+
+
+def _save(block, node_count=12):
+    response = block.studio_submit(_post({"nodes": generate_nodes(node_count, seed=4), "enable_scoring": True}))
+    assert json.loads(response.body)["result"] == "success"
+
+
+def test_nothing_is_recorded_without_a_sink(block, settings):
+    settings.BRANCHING_XBLOCK_INSTRUMENTATION_SINK = None
+    _save(block)
+    block.get_current_state(_post())
+
+    assert memory_sink.measurements == []
+    assert instrumentation.current_measurement() is None
+
+
+def test_instrumented_handlers_stay_handlers():
+    for name in (
+        "get_current_state", "select_choice", "undo_choice", "reset_activity",
+        "submit_path", "get_nodes", "publish_progress",
+        "studio_submit", "export_nodes", "import_nodes", "score_distribution", "simulate_learners",
+    ):
+        assert getattr(getattr(BranchingXBlock, name), "_is_xblock_handler", False), name
+
+
+def test_learner_handler_records_wall_time_size_and_node_count(block, memory):
+    _save(block)
+    memory.clear()
+
+    response = block.select_choice(_post({"choice_index": 0}))
+
+    (measurement,) = memory.named("select_choice")
+    assert measurement.wall > 0
+    assert measurement.response_bytes == len(response.body)
+    assert measurement.node_count == 12
+    assert measurement.usage_id == "test-usage"
+    assert measurement.error is False
+    assert set(measurement.phases) >= set(instrumentation.PHASES)
+
+
+def test_studio_submit_records_validation_sanitization_and_graph_phases(block, memory):
+    _save(block, node_count=20)
+
+    (measurement,) = memory.named("studio_submit")
+    phases = measurement.phases
+    assert phases["validation"] > 0
+    assert phases["sanitization"] > 0
+    assert phases["graph"] > 0
+    # Phases are inclusive: sanitizing during validation counts towards both.
+    assert phases["validation"] >= phases["sanitization"]
+    assert measurement.wall >= phases["validation"]
+    assert measurement.node_count == 20
+
+
+def test_import_nodes_records_validation(block, memory):
+    block.import_nodes(_post({"nodes": generate_nodes(5, seed=1)}))
+
+    (measurement,) = memory.named("import_nodes")
+    assert measurement.phases["validation"] > 0
+    assert measurement.node_count == 5
+
+
+@pytest.mark.parametrize("view", ["student_view", "studio_view"])
+def test_views_record_fragment_size(block, memory, view):
+    _save(block)
+
+    fragment = getattr(block, view)()
+
+    (measurement,) = memory.named(view)
+    assert measurement.response_bytes == len(fragment.content) + len(json.dumps(fragment.json_init_args))
+    assert measurement.node_count == 12
+
+
+def test_failing_call_is_recorded_and_reraised(block, memory):
+    with mock.patch.object(BranchingXBlock, "_get_state", side_effect=RuntimeError("boom")):
+        with pytest.raises(RuntimeError):
+            block.get_current_state(_post())
+
+    (measurement,) = memory.named("get_current_state")
+    assert measurement.error is True
+    assert instrumentation.current_measurement() is None
+
+
+def test_reentered_phase_is_timed_once():
+    measurement = Measurement("handler")
+    with measurement.phase("graph"):
+        with measurement.phase("graph"):
+            pass
+        inner_open = "graph" in measurement._open  # pylint: disable=protected-access
+
+    assert inner_open
+    assert 0 < measurement.phases["graph"]
+    assert measurement.as_dict()["phases_ms"]["graph"] == measurement.phases["graph"] * 1000
+
+
+def test_log_sink_writes_one_line(caplog):
+    measurement = Measurement("select_choice", "block-v1:x")
+    measurement.wall = 0.0125
+    measurement.phases["graph"] = 0.002
+    measurement.response_bytes = 321
+    measurement.node_count = 7
+
+    with caplog.at_level(logging.INFO, logger=instrumentation.__name__):
+        LogSink().record(measurement)
+
+    (message,) = caplog.messages
+    assert message.startswith("branching_xblock handler=select_choice usage_id=block-v1:x wall_ms=12.500 ")
+    assert "graph_ms=2.000" in message
+    assert message.endswith("response_bytes=321 node_count=7 error=false")
+
+
+def test_statsd_sink_sends_to_the_stub(block, settings):
+    with StatsdStub() as stub:
+        settings.BRANCHING_XBLOCK_INSTRUMENTATION_SINK = "statsd"
+        settings.BRANCHING_XBLOCK_STATSD_ADDRESS = stub.address
+        settings.BRANCHING_XBLOCK_STATSD_PREFIX = "lms.bx"
+
+        response = block.get_current_state(_post())
+        lines = stub.wait_for(4 + len(instrumentation.PHASES))
+        instrumentation.get_instrumentation_sink().close()
+
+    assert lines[0] == "lms.bx.get_current_state.calls:1|c"
+    assert lines[1].startswith("lms.bx.get_current_state.wall:") and lines[1].endswith("|ms")
+    assert {line.split(":")[0] for line in lines[2:2 + len(instrumentation.PHASES)]} == {
+        f"lms.bx.get_current_state.phase.{phase}" for phase in instrumentation.PHASES
+    }
+    assert f"lms.bx.get_current_state.response_bytes:{len(response.body)}|h" in lines
+    assert "lms.bx.get_current_state.node_count:0|h" in lines
+
+
+def test_statsd_sink_counts_errors():
+    measurement = Measurement("import_nodes")
+    measurement.error = True
+    sink = StatsdSink(prefix="")
+    try:
+        assert sink.lines(measurement)[:2] == ["import_nodes.calls:1|c", "import_nodes.errors:1|c"]
+    finally:
+        sink.close()
+
+
+def test_sink_can_be_an_object_or_a_dotted_path(settings):
+    sink = instrumentation.MemorySink()
+    settings.BRANCHING_XBLOCK_INSTRUMENTATION_SINK = sink
+    assert instrumentation.get_instrumentation_sink() is sink
+
+    settings.BRANCHING_XBLOCK_INSTRUMENTATION_SINK = "branching_xblock.instrumentation.LogSink"
+    assert isinstance(instrumentation.get_instrumentation_sink(), LogSink)
+
+
+@pytest.mark.parametrize("configured, address", [
+    ("no.such.sink", None),
+    ("statsd", "localhost:port"),
+])
+def test_invalid_configuration_raises(settings, configured, address):
+    settings.BRANCHING_XBLOCK_INSTRUMENTATION_SINK = configured
+    settings.BRANCHING_XBLOCK_STATSD_ADDRESS = address
+    with pytest.raises(ImproperlyConfigured):
+        instrumentation.get_instrumentation_sink()
+
+
+@contextmanager
+def _server_timing(enabled):
+    with mock.patch(
+        "branching_xblock.branching_xblock.has_site_configuration", return_value=True
+    ), mock.patch(
+        "branching_xblock.branching_xblock.get_site_configuration_value",
+        side_effect=lambda block_key, key: enabled if key == "SERVER_TIMING" else "",
+    ) as get_value:
+        yield get_value
+
+
+def _parse_server_timing(header):
+    metrics = {}
+    for metric in header.split(", "):
+        name, duration = metric.split(";dur=")
+        metrics[name] = float(duration)
+    return metrics
+
+
+def test_server_timing_header_when_enabled_for_the_site(block, memory):
+    _save(block)
+    block.save()
+    learner = block.runtime.construct_xblock_from_class(BranchingXBlock, scope_ids=LEARNER_SCOPE_IDS)
+
+    with _server_timing(True):
+        response = learner.select_choice(_post({"choice_index": 0}))
+
+    metrics = _parse_server_timing(response.headers["Server-Timing"])
+    assert list(metrics) == [*instrumentation.PHASES, "total"]
+    assert metrics["field_data"] > 0
+    assert metrics["state"] > 0
+    assert metrics["json"] > 0
+    assert metrics["total"] >= metrics["state"] + metrics["json"]
+
+
+def test_server_timing_header_breaks_down_studio_submit(block, memory):
+    with _server_timing(True):
+        response = block.studio_submit(_post({"nodes": generate_nodes(20, seed=4)}))
+
+    metrics = _parse_server_timing(response.headers["Server-Timing"])
+    assert metrics["validation"] > 0
+    assert metrics["sanitization"] > 0
+    assert metrics["graph"] > 0
+
+
+def test_server_timing_does_not_need_a_sink(block, settings):
+    settings.BRANCHING_XBLOCK_INSTRUMENTATION_SINK = None
+    with _server_timing(True):
+        response = block.get_current_state(_post())
+
+    assert "total;dur=" in response.headers["Server-Timing"]
+    assert memory_sink.measurements == []
+
+
+def test_no_server_timing_header_without_a_sink_by_default(block, settings):
+    settings.BRANCHING_XBLOCK_INSTRUMENTATION_SINK = None
+    with _server_timing(False):
+        response = block.get_current_state(_post())
+
+    assert "Server-Timing" not in response.headers
+    assert memory_sink.measurements == []
+
+
+def test_handlers_look_up_each_site_value_once_per_request(block, memory):
+    site_values = {"SERVER_TIMING": True, "FRONTIER_DEPTH": 2}
+    with mock.patch(
+        "branching_xblock.branching_xblock.has_site_configuration", return_value=True
+    ), mock.patch(
+        "branching_xblock.branching_xblock.get_site_configuration_value",
+        side_effect=lambda block_key, key: site_values.get(key),
+    ) as get_value, mock.patch(
+        "branching_xblock.branching_xblock._bundle_manifest", return_value={"student": {"js": ["modern/student.js"]}},
+    ):
+        block.get_current_state(_post())
+        block.get_current_state(_post())
+
+    keys = [call.args[1] for call in get_value.call_args_list]
+    assert sorted(set(keys)) == ["CLIENT_TRAVERSAL", "FRONTIER_DEPTH", "SERVER_TIMING"]
+    assert len(keys) == 2 * len(set(keys))
+
+
+def test_no_server_timing_header_by_default(block, memory):
+    response = block.get_current_state(_post())
+
+    assert "Server-Timing" not in response.headers
+    assert memory.named("get_current_state")
+
+
+def test_no_server_timing_header_outside_the_platform(block, memory):
+    with mock.patch(
+        "branching_xblock.branching_xblock.get_site_configuration_value", return_value=True
+    ) as get_value:
+        response = block.get_current_state(_post())
+
+    assert "Server-Timing" not in response.headers
+    get_value.assert_not_called()
+
+
+def test_failing_site_configuration_lookup_skips_the_header(block, memory):
+    with mock.patch(
+        "branching_xblock.branching_xblock.has_site_configuration", return_value=True
+    ), mock.patch(
+        "branching_xblock.branching_xblock.get_site_configuration_value", side_effect=RuntimeError("database is down")
+    ):
+        response = block.get_current_state(_post())
+
+    assert "Server-Timing" not in response.headers
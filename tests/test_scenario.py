@@ -0,0 +1,197 @@
+from unittest import mock
+
+import pytest
+
+from branching_xblock import scenario
+from branching_xblock.scenario import (
+    NO_TARGET,
+    CompiledScenario,
+    CompiledScenarioCache,
+    node_image_urls,
+    scenario_content_hash,
+    scenario_content_version,
+)
+
+
+def _scenario_data():
+    return {
+        "nodes": {
+            "A": {
+                "id": "A",
+                "hint": "<img src=x onerror=alert(1)>Start",
+                "choices": [
+                    {"text": "to B", "target_node_id": "B", "score": 5},
+                    {"text": "nowhere", "target_node_id": "missing", "score": 0},
+                ],
+            },
+            "B": {"id": "B", "hint": "Plain", "choices": []},
+            "broken": "not a node",
+        },
+        "start_node_id": "A",
+    }
+
+
+def _compile(data):
+    return CompiledScenario(data, scenario_content_version(data))
+
+
+def test_compiled_scenario_builds_adjacency_and_leaf_flags():
+    compiled = _compile(_scenario_data())
+
+    assert compiled.node_ids == ("A", "B")
+    assert compiled.start_index == 0
+    assert compiled.successors == ((1, NO_TARGET), ())
+    assert compiled.is_leaf == (False, True)
+    assert compiled.is_end_node("B") is True
+    assert compiled.is_end_node("A") is False
+    assert compiled.is_end_node("broken") is False
+    assert compiled.get_node("broken") is None
+
+
+def test_compiled_scenario_presanitizes_hints_without_touching_input():
+    data = _scenario_data()
+    compiled = _compile(data)
+
+    assert "<img" not in compiled.get_safe_node("A")["hint"]
+    assert "<img" not in compiled.learner_nodes["A"]["hint"]
+    # Clean hints are shared rather than copied.
+    assert compiled.get_safe_node("B") is compiled.get_node("B")
+    assert "<img" in data["nodes"]["A"]["hint"]
+
+
+def test_compiled_scenario_is_detached_from_source_data():
+    data = _scenario_data()
+    compiled = _compile(data)
+
+    data["nodes"]["B"]["choices"].append({"text": "x", "target_node_id": "A"})
+
+    assert compiled.get_node("B")["choices"] == []
+
+
+def test_compiled_scenario_tolerates_legacy_list_nodes():
+    compiled = _compile({"nodes": [{"id": "A"}], "start_node_id": "A"})
+
+    assert compiled.node_ids == ()
+    assert compiled.get_node("A") is None
+    assert compiled.learner_nodes == [{"id": "A"}]
+
+
+def test_cache_compiles_once_per_content_version():
+    cache = CompiledScenarioCache(maxsize=4)
+    data = _scenario_data()
+
+    with mock.patch.object(scenario, "CompiledScenario", wraps=CompiledScenario) as compile_mock:
+        first = cache.get_or_compile("block-1", data)
+        second = cache.get_or_compile("block-1", _scenario_data())
+        assert first is second
+        assert compile_mock.call_count == 1
+
+        data["nodes"]["B"]["content"] = "changed"
+        third = cache.get_or_compile("block-1", data)
+        assert third is not first
+        assert compile_mock.call_count == 2
+
+
+def test_cache_keys_stamped_content_on_the_stored_hash():
+    cache = CompiledScenarioCache(maxsize=4)
+    data = _scenario_data()
+    stamp = scenario_content_hash(data["nodes"], data["start_node_id"])
+    data["content_hash"] = stamp
+
+    with mock.patch.object(scenario, "scenario_content_hash") as hash_mock:
+        compiled = cache.get_or_compile("block-1", data)
+
+    hash_mock.assert_not_called()
+    assert compiled.content_hash == stamp
+    assert scenario_content_version({k: v for k, v in data.items() if k != "content_hash"}) == stamp
+
+
+def test_cache_evicts_least_recently_used():
+    cache = CompiledScenarioCache(maxsize=2)
+    data = _scenario_data()
+
+    first = cache.get_or_compile("block-1", data)
+    cache.get_or_compile("block-2", data)
+    cache.get_or_compile("block-1", data)
+    cache.get_or_compile("block-3", data)
+
+    assert len(cache) == 2
+    assert cache.get_or_compile("block-1", data) is first
+
+
+@pytest.mark.parametrize("node_id", [None, 1, "missing"])
+def test_compiled_scenario_lookups_reject_unknown_ids(node_id):
+    compiled = _compile(_scenario_data())
+
+    assert compiled.get_node(node_id) is None
+    assert compiled.get_safe_node(node_id) is None
+    assert compiled.is_end_node(node_id) is False
+
+
+def test_frontier_walks_choices_breadth_first():
+    compiled = _compile({
+        "nodes": {
+            "A": {"id": "A", "choices": [{"target_node_id": "B"}, {"target_node_id": "C"}]},
+            "B": {"id": "B", "choices": [{"target_node_id": "D"}, {"target_node_id": "A"}]},
+            "C": {"id": "C", "hint": "<b onclick=x>C</b>", "choices": [{"target_node_id": "D"}]},
+            "D": {"id": "D", "choices": []},
+        },
+        "start_node_id": "A",
+    })
+
+    assert list(compiled.frontier(["A"], 0)) == ["A"]
+    assert list(compiled.frontier(["A"], 1)) == ["A", "B", "C"]
+    assert list(compiled.frontier(["A"], 5)) == ["A", "B", "C", "D"]
+    assert list(compiled.frontier(["C", "missing", None, "C"], 1)) == ["C", "D"]
+    assert compiled.frontier(["C"], 0)["C"] is compiled.get_safe_node("C")
+
+
+@pytest.mark.parametrize("node, urls", [
+    ({"media": {"type": "single_image", "url": " /a.png "}}, ("/a.png",)),
+    ({"media": {"type": "image"}, "left_image_url": "/l.png", "right_image_url": "/l.png"}, ("/l.png",)),
+    ({"media": {"type": "image"}, "right_image_url": "/r.png", "left_image_url": ""}, ("/r.png",)),
+    ({"media": {"type": "video", "url": "/v.mp4"}, "left_image_url": "/l.png"}, ()),
+    ({"media": "broken"}, ()),
+])
+def test_node_image_urls(node, urls):
+    assert node_image_urls(node) == urls
+
+
+def test_next_image_urls_cover_nodes_one_choice_away():
+    compiled = _compile({
+        "nodes": {
+            "A": {"id": "A", "choices": [
+                {"target_node_id": "B"}, {"target_node_id": "C"}, {"target_node_id": "missing"},
+            ]},
+            "B": {"id": "B", "media": {"type": "single_image", "url": "/b.png"}, "choices": [{"target_node_id": "D"}]},
+            "C": {"id": "C", "media": {"type": "image"}, "left_image_url": "/b.png", "right_image_url": "/c.png"},
+            "D": {"id": "D", "media": {"type": "single_image", "url": "/d.png"}},
+        },
+        "start_node_id": "A",
+    })
+
+    assert compiled.get_next_image_urls("A") == ["/b.png", "/c.png"]
+    assert compiled.get_next_image_urls("B") == ["/d.png"]
+    assert compiled.get_next_image_urls("D") == []
+    assert compiled.get_next_image_urls(None) == []
+
+
+def test_compiled_scenario_uses_stored_path_metrics_or_computes_them():
+    data = _scenario_data()
+    computed = _compile(data).path_metrics
+
+    assert computed["B"]["end_reachable"] is True
+    assert computed["A"]["best_remaining_score"] == 5
+    assert "broken" not in computed
+
+    stored = {"A": {"end_reachable": False}}
+    stamp = scenario_content_hash(data["nodes"], data["start_node_id"])
+    compiled = _compile({**data, "path_metrics": stored, "content_hash": stamp})
+    assert compiled.get_path_metrics("A") == {"end_reachable": False}
+    assert compiled.get_path_metrics(None) is None
+
+    # Nodes edited after the metrics were stored no longer match the stamp.
+    data["nodes"]["B"]["choices"] = [{"target_node_id": "A"}]
+    stale = _compile({**data, "path_metrics": stored, "content_hash": stamp})
+    assert stale.path_metrics != stored
+    assert stale.get_path_metrics("B")["end_reachable"] is False
@@ -0,0 +1,117 @@
+from unittest import mock
+
+import pytest
+
+from branching_xblock import simulation
+from branching_xblock.distribution import compute_score_distribution
+from branching_xblock.simulation import simulate_learners
+
+GRADE_RANGES = [
+    {"label": "Fail", "start": 0, "end": 49},
+    {"label": "Pass", "start": 50, "end": 100},
+]
+
+
+def _scenario():
+    """
+    Start offers three choices, one to a missing node; B ends on E1 or E2.
+    """
+    return {
+        "S": {"choices": [
+            {"target_node_id": "A", "score": 10},
+            {"target_node_id": "B", "score": 0},
+            {"target_node_id": "missing", "score": 50},
+        ]},
+        "A": {"choices": [{"target_node_id": "E1", "score": 5}]},
+        "B": {"choices": [{"target_node_id": "E2", "score": 1}, {"target_node_id": "E1", "score": 0}]},
+        "E1": {"choices": []},
+        "E2": {"choices": []},
+    }
+
+
+def test_uniform_learners_match_the_expected_score():
+    nodes = _scenario()
+
+    result = simulate_learners(nodes, "S", 20000, max_score=15, grade_ranges=GRADE_RANGES)
+
+    assert result["completed"] == 20000
+    assert result["incomplete"] == 0
+    assert set(result["score_counts"]) == {0, 1, 15}
+    assert result["mean_score"] == pytest.approx(compute_score_distribution(nodes, "S")["expected_score"], rel=0.03)
+    assert result["end_node_counts"]["E1"] == pytest.approx(15000, rel=0.03)
+    assert [grade["learners"] for grade in result["grade_counts"]] == [
+        result["score_counts"][0] + result["score_counts"][1],
+        result["score_counts"][15],
+    ]
+    assert result["actions"] == {"select_choice": 40000, "undo_choice": 0, "reset_activity": 0}
+
+
+@pytest.mark.parametrize("policy, score, end_node_id", [("greedy-max", 15, "E1"), ("greedy-min", 0, "E1")])
+def test_greedy_policies_are_deterministic(policy, score, end_node_id):
+    result = simulate_learners(_scenario(), "S", 100, policy)
+
+    assert result["score_counts"] == {score: 100}
+    assert result["end_node_counts"] == {end_node_id: 100}
+
+
+def test_weighted_policy_follows_choice_weights():
+    result = simulate_learners(
+        _scenario(), "S", 1000, "weighted", choice_weights={"S": [0, 1, 5], "B": [1, 0]},
+    )
+
+    assert result["score_counts"] == {1: 1000}
+    assert result["end_node_counts"] == {"E2": 1000}
+
+
+def test_undo_and_reset_follow_the_scenario_settings():
+    options = {"undo_rate": 0.3, "reset_rate": 0.2, "seed": 7}
+
+    disabled = simulate_learners(_scenario(), "S", 5000, **options)
+    enabled = simulate_learners(_scenario(), "S", 5000, enable_undo=True, enable_reset_activity=True, **options)
+
+    assert disabled["actions"]["undo_choice"] == disabled["actions"]["reset_activity"] == 0
+    assert enabled["actions"]["undo_choice"] > 0
+    assert enabled["actions"]["reset_activity"] > 0
+    assert set(enabled["score_counts"]) <= {0, 1, 15}
+    assert enabled == simulate_learners(_scenario(), "S", 5000, enable_undo=True, enable_reset_activity=True, **options)
+
+
+def test_stuck_and_looping_learners_are_incomplete():
+    nodes = {
+        "S": {"choices": [{"target_node_id": "dead", "score": 0}, {"target_node_id": "loop", "score": 0}]},
+        "dead": {"choices": [{"target_node_id": "missing"}]},
+        "loop": {"choices": [{"target_node_id": "loop"}]},
+    }
+
+    result = simulate_learners(nodes, "S", 100, enable_undo=True, undo_rate=0.1)
+
+    assert result["completed"] == 0
+    assert result["incomplete"] == 100
+    assert result["mean_score"] is None
+    assert simulate_learners(nodes, "missing", 10)["incomplete"] == 10
+
+
+def test_scoring_disabled_awards_nothing():
+    result = simulate_learners(_scenario(), "S", 100, "greedy-max", enable_scoring=False)
+
+    assert result["score_counts"] == {0: 100}
+
+
+@pytest.mark.parametrize("kwargs", [
+    {"policy": "random"},
+    {"learners": -1},
+    {"undo_rate": 1.5},
+    {"undo_rate": 0.6, "reset_rate": 0.6},
+    {"policy": "weighted", "choice_weights": {"B": [1]}},
+    {"policy": "weighted", "choice_weights": {"B": [0, 0]}},
+    {"policy": "weighted", "choice_weights": {"B": [-1, 2]}},
+])
+def test_invalid_arguments_raise(kwargs):
+    kwargs = {"learners": 10, **kwargs}
+    with pytest.raises(ValueError):
+        simulate_learners(_scenario(), "S", **kwargs)
+
+
+def test_simulation_needs_numpy():
+    with mock.patch.object(simulation, "np", None):
+        assert simulate_learners(_scenario(), "S", 10) is None
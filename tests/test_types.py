@@ -10,11 +10,13 @@ import pytest
 from pydantic import ValidationError
 
 from branching_xblock.branching_xblock import _default_node
+from branching_xblock.graph import compute_path_metrics
 from branching_xblock.types import (
     Choice,
     GradeRange,
     Media,
     Node,
+    PathMetrics,
     ScenarioData,
     ScenarioSettings,
 )
@@ -39,6 +41,7 @@ def test_scenario_data_round_trips_realistic_payload():
         },
         "start_node_id": "start",
     }
+    payload["path_metrics"] = compute_path_metrics(payload["nodes"])
     assert ScenarioData.model_validate(payload).model_dump() == payload
 
 
@@ -46,6 +49,13 @@ def test_scenario_data_defaults_to_empty_scenario():
     data = ScenarioData()
     assert data.nodes == {}
     assert data.start_node_id is None
+    assert data.path_metrics == {}
+
+
+def test_path_metrics_defaults_describe_a_dead_end():
+    loop = {"loop": {"choices": [{"target_node_id": "loop"}]}}
+
+    assert PathMetrics().model_dump() == compute_path_metrics(loop)["loop"]
 
 
 def test_scenario_settings_defaults():